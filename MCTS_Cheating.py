@@ -2,15 +2,22 @@
 #
 # Einfache Monte-Carlo-Suche im cheating_mode:
 # Der Agent sieht das komplette GameState-Objekt und bewertet
-# jede gültige Karte durch mehrere zufällige Playouts bis zum Spielende.
+# die gültigen Karten durch zufällige Playouts bis zum Spielende.
+# Das Playout-Budget wird per Successive Halving auf die Karten verteilt,
+# die Playouts laufen vektorisiert (batch_playout) ab einem einzigen Snapshot.
+# Die Suche selbst steckt in search_engine.py (ROLLOUT).
+
+import time
 
 import numpy as np
 
 from jass.agents.agent_cheating import AgentCheating
-from jass.game.const import DIAMONDS, team
+from jass.game.const import DIAMONDS
 from jass.game.game_state import GameState
-from jass.game.game_sim import GameSim
-from jass.game.rule_schieber import RuleSchieber
+
+from search_engine import ROLLOUT, shared_engine
+from seeding import new_master_seed, move_rng
+from decision_log import KIND_CARD, AGENT_MC_CHEATING
 
 
 class MonteCarloTrickAgent(AgentCheating):
@@ -18,17 +25,49 @@ class MonteCarloTrickAgent(AgentCheating):
     Cheating-Agent mit einfacher Monte-Carlo-Suche:
 
     - action_trump: wählt immer DIAMONDS (Trumpfwahl ist hier nicht der Fokus)
-    - action_play_card: bewertet jede gültige Karte mit mehreren
-      zufälligen Playouts bis zum Spielende und nimmt die Karte
-      mit dem höchsten durchschnittlichen Punkte-Ergebnis für das eigene Team.
+    - action_play_card: bewertet die gültigen Karten mit zufälligen Playouts
+      bis zum Spielende (Successive Halving: schlechte Karten fallen nach jeder
+      Runde raus) und nimmt die Karte mit dem höchsten durchschnittlichen
+      Punkte-Ergebnis für das eigene Team.
+
+    Args:
+        simulations_per_card: Referenzbudget wie bisher (Playouts pro Karte)
+        playout_fraction: Anteil von simulations_per_card * #Karten, der pro Zug
+            tatsächlich gespielt wird
+        seed: Master-Seed für reproduzierbare Entscheidungen (pro Spiel und Zug
+            wird daraus ein eigener Seed abgeleitet, siehe seeding.py)
+        agent_id: unterscheidet mehrere Agenten mit demselben Master-Seed
+        decision_log: optionales DecisionLog, das jeden Zug aufzeichnet
+
+    Nach jedem Zug enthält last_search_stats die Statistik der Suche als
+    (Anzahl Playouts, Summe der Punkte des eigenen Teams) pro Karte, oder None,
+    wenn nicht gesucht wurde.
     """
 
-    def __init__(self, simulations_per_card: int = 50):
+    def __init__(self, simulations_per_card: int = 50, playout_fraction: float = 0.5, seed: int = None,
+                 agent_id: int = 0, decision_log=None):
         super().__init__()
-        self._rule = RuleSchieber()
-        self._sim = GameSim(self._rule)
         self._simulations_per_card = simulations_per_card
+        self._playout_fraction = playout_fraction
+        self._master_seed = new_master_seed() if seed is None else int(seed)
+        self._agent_id = agent_id
         self._rng = np.random.default_rng()
+        self._decision_log = decision_log
+        self.last_search_stats = None
+
+        # Suche inkl. exakter Lösung der letzten Stiche (Tablebase für alle Agenten geteilt)
+        self._engine = shared_engine()
+
+    @classmethod
+    def from_params(cls, params, seed: int = None, agent_id: int = 0, decision_log=None):
+        """
+        Agent mit den Parametern aus params() erstellen (z.B. für das Replay).
+        """
+        return cls(simulations_per_card=int(params[0]), playout_fraction=float(params[1]), seed=seed,
+                   agent_id=agent_id, decision_log=decision_log)
+
+    def params(self) -> list:
+        return [self._simulations_per_card, self._playout_fraction]
 
     # ------------------------------------------------------------
     # Trumpfwahl (hier bewusst simpel)
@@ -40,77 +79,33 @@ class MonteCarloTrickAgent(AgentCheating):
         """
         return DIAMONDS
 
-    # ------------------------------------------------------------
-    # Hilfsfunktion: ein Playout für eine bestimmte Karte
-    # ------------------------------------------------------------
-    def _simulate_with_card(self, state: GameState, card: int, my_team: int) -> int:
-        """
-        Startet von 'state', spielt zuerst 'card' und simuliert
-        dann den Rest des Spiels zufällig bis is_done() == True.
-
-        Rückgabe:
-            Endpunkte meines Teams (0 oder 1) im simulierten Spiel.
-        """
-        # Startzustand kopieren
-        self._sim.init_from_state(state)
-
-        # Unsere Karte spielen
-        self._sim.action_play_card(card)
-
-        # Rest des Spiels zufällig fertig spielen
-        while not self._sim.is_done():
-            sim_state = self._sim.state
-            valid_cards = self._rule.get_valid_cards_from_state(sim_state)
-            valid_indices = np.flatnonzero(valid_cards)
-
-            if len(valid_indices) == 0:
-                # sollte eigentlich nie passieren, Sicherheitsnetz
-                break
-
-            next_card = self._rng.choice(valid_indices)
-            self._sim.action_play_card(next_card)
-
-        # Am Ende: Punkte meines Teams
-        return int(self._sim.state.points[my_team])
-
     # ------------------------------------------------------------
     # Monte-Carlo Kartenwahl
     # ------------------------------------------------------------
     def action_play_card(self, state: GameState) -> int:
+        start = time.perf_counter()
+        self._rng = move_rng(self._master_seed, self._agent_id, state)
+        self.last_search_stats = None
+        card = self._search_card(state)
+        if self._decision_log is not None:
+            self._decision_log.record(KIND_CARD, AGENT_MC_CHEATING, state, card, self._master_seed,
+                                      self._agent_id, self.params(), time.perf_counter() - start)
+        return card
+
+    def _search_card(self, state: GameState) -> int:
         """
-        Wählt eine Karte über Monte-Carlo-Playouts:
+        Wählt eine Karte über Monte-Carlo-Playouts (search_engine, ROLLOUT):
 
         - Bestimme alle gültigen Karten
-        - Für jede Karte führe N Simulationen bis zum Spielende durch
+        - In den letzten Stichen: exakte Lösung aus der Endspiel-Tablebase
+        - Gleichwertige Karten (card_equivalence) zählen als ein Kandidat
+        - Budget = playout_fraction * simulations_per_card * #Karten
+        - Successive Halving: pro Runde gleich viele Playouts für jede
+          verbleibende Karte, danach fliegt die schlechtere Hälfte raus
         - Wert = durchschnittliche Endpunkte meines Teams
-        - Nimm die Karte mit dem höchsten Durchschnittswert
         """
-        # Gültige Karten für den aktuellen Spieler
-        valid_cards = self._rule.get_valid_cards_from_state(state)
-        valid_indices = np.flatnonzero(valid_cards)
-
-        # Wenn nur eine Karte möglich ist, direkt spielen
-        if len(valid_indices) == 1:
-            return int(valid_indices[0])
-
-        current_player = state.player
-        my_team = team[current_player]
-
-        best_card = None
-        best_value = -1.0
-
-        # Jede gültige Karte durchprobieren
-        for card in valid_indices:
-            total_score = 0
-
-            # Mehrere zufällige Playouts für diese Karte
-            for _ in range(self._simulations_per_card):
-                total_score += self._simulate_with_card(state, int(card), my_team)
-
-            avg_score = total_score / self._simulations_per_card
-
-            if avg_score > best_value:
-                best_value = avg_score
-                best_card = int(card)
-
-        return best_card
+        result = self._engine.evaluate(state, ROLLOUT, self._playout_fraction * self._simulations_per_card,
+                                       rng=self._rng)
+        if result.searched:
+            self.last_search_stats = (result.visits, result.totals)
+        return result.card
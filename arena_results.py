@@ -0,0 +1,279 @@
+# arena_results.py
+#
+# Spaltenweise Ablage von Arena-Resultaten und Auswertung.
+#
+# Ein Resultat-Ordner (Standard Data/arena_results) enthält:
+#   results.json        Spalten (dtype, Form), Agent-Namen (Code = Index), Master-Seed,
+#                       nächste Spielnummer
+#   <spalte>.bin        Rohdaten der Spalte, eine Zeile pro Spiel, nur angehängt
+#
+# Spalten:
+#   game (N,)            Spielnummer (Seed und Geber hängen nur davon ab)
+#   seed (N,)            np.random-Seed, mit dem die Karten gemischt wurden (deal_random_hand)
+#   seats (N, 4)         Agent-Code pro Sitzplatz
+#   dealer, trump, declarer, pushed (N,)
+#   points (N, 2)        Punkte Team 0 / Team 1
+#   move_ms (N, 4, 9)    Rechenzeit jedes Kartenzugs, pro Sitzplatz in Spielreihenfolge
+#
+# Jedes fertige Spiel wird sofort an alle Spalten angehängt. Nach einem Abbruch
+# gilt die kürzeste Spalte; angefangene Zeilen werden beim nächsten Öffnen abgeschnitten.
+#
+# Die Auswertung liest die Spalten per np.memmap in Blöcken, der Speicherbedarf
+# hängt also nicht von der Anzahl Spiele ab:
+#
+#   python arena_results.py                          # Data/arena_results
+#   python arena_results.py Data/arena_results --chunk 1000000
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+
+DEFAULT_RESULTS_DIR = "Data/arena_results"
+MANIFEST_FILE = "results.json"
+
+COLUMNS = {
+    "game": ("<u8", ()),
+    "seed": ("<u4", ()),
+    "seats": ("u1", (4,)),
+    "dealer": ("i1", ()),
+    "trump": ("i1", ()),
+    "declarer": ("i1", ()),
+    "pushed": ("i1", ()),
+    "points": ("<i2", (2,)),
+    "move_ms": ("<f4", (4, 9)),
+}
+
+# Latenz-Histogramm der Auswertung: logarithmische Klassen von 1 µs bis 100 s
+LATENCY_MIN_MS = 1e-3
+LATENCY_BINS_PER_DECADE = 200
+LATENCY_NR_BINS = 8 * LATENCY_BINS_PER_DECADE
+
+
+def _row_bytes(name: str) -> int:
+    dtype, shape = COLUMNS[name]
+    return np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+
+
+def _column_path(results_dir: str, name: str) -> str:
+    return os.path.join(results_dir, name + ".bin")
+
+
+def _nr_complete_rows(results_dir: str) -> int:
+    rows = []
+    for name in COLUMNS:
+        path = _column_path(results_dir, name)
+        rows.append(os.path.getsize(path) // _row_bytes(name) if os.path.exists(path) else 0)
+    return min(rows)
+
+
+class ResultWriter:
+    """
+    Hängt Spiele an einen Resultat-Ordner an (legt ihn bei Bedarf an).
+
+    Args:
+        results_dir: Ordner
+        master_seed: Master-Seed für einen neuen Ordner (bei bestehendem ignoriert)
+    """
+
+    def __init__(self, results_dir: str, master_seed: int = None):
+        self._dir = results_dir
+        os.makedirs(results_dir, exist_ok=True)
+        path = os.path.join(results_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = dict(columns={name: [dtype, list(shape)] for name, (dtype, shape) in COLUMNS.items()},
+                                 agents=[], master_seed=master_seed, next_game=0)
+
+        # angefangene Zeilen (Abbruch mitten im Schreiben) abschneiden
+        self.nr_rows = _nr_complete_rows(results_dir)
+        self._files = {}
+        for name in COLUMNS:
+            f = open(_column_path(results_dir, name), "ab")
+            f.truncate(self.nr_rows * _row_bytes(name))
+            self._files[name] = f
+        self._save_manifest()
+
+    @property
+    def master_seed(self) -> int:
+        return self.manifest["master_seed"]
+
+    def agent_code(self, name: str) -> int:
+        """
+        Code eines Agenten (neue Namen werden hinten angehängt).
+        """
+        agents = self.manifest["agents"]
+        if name not in agents:
+            agents.append(name)
+            self._save_manifest()
+        return agents.index(name)
+
+    def reserve_games(self, nr_games: int) -> int:
+        """
+        Spielnummern für einen Lauf reservieren, gibt die erste zurück.
+        """
+        first = self.manifest["next_game"]
+        self.manifest["next_game"] = first + nr_games
+        self._save_manifest()
+        return first
+
+    def append(self, **row) -> None:
+        """
+        Ein Spiel anhängen (alle Spalten aus COLUMNS als Keyword-Argumente).
+        """
+        for name, (dtype, shape) in COLUMNS.items():
+            value = np.asarray(row[name], dtype=dtype)
+            if value.shape != shape:
+                raise ValueError(f"Spalte {name}: Form {value.shape}, erwartet {shape}")
+            self._files[name].write(value.tobytes())
+        for f in self._files.values():
+            f.flush()
+        self.nr_rows += 1
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def _save_manifest(self) -> None:
+        path = os.path.join(self._dir, MANIFEST_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+def open_columns(results_dir: str):
+    """
+    Spalten als read-only memmaps.
+
+    Returns:
+        (manifest, {Spalte: np.memmap}), alle mit gleich vielen Zeilen
+    """
+    with open(os.path.join(results_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    nr_rows = _nr_complete_rows(results_dir)
+    columns = {}
+    for name, (dtype, shape) in COLUMNS.items():
+        if nr_rows == 0:
+            columns[name] = np.zeros((0,) + shape, dtype=dtype)
+        else:
+            columns[name] = np.memmap(_column_path(results_dir, name), dtype=dtype, mode="r",
+                                      shape=(nr_rows,) + shape)
+    return manifest, columns
+
+
+def iter_chunks(results_dir: str, chunk: int = 1 << 20):
+    """
+    Resultate blockweise: ({Spalte: Array}, manifest) mit höchstens chunk Zeilen.
+    """
+    manifest, columns = open_columns(results_dir)
+    nr_rows = columns["game"].shape[0]
+    for start in range(0, nr_rows, chunk):
+        yield {name: np.asarray(column[start:start + chunk]) for name, column in columns.items()}, manifest
+
+
+class Summary:
+    """
+    Inkrementelle Auswertung: Siegquote und Punktdifferenz pro Paarung
+    (Agenten Team 0 gegen Team 1), Latenz-Perzentile pro Agent.
+    """
+
+    def __init__(self):
+        # Paarung → [Spiele, Siege Team 0 (Unentschieden halb), Summe Diff, Summe Diff²]
+        self.matchups = {}
+        # Agent-Code → Histogramm der Zuglatenz
+        self.latency = {}
+
+    def add(self, chunk: dict) -> None:
+        seats = chunk["seats"].astype(np.int64)
+        points = chunk["points"].astype(np.int64)
+        diff = points[:, 0] - points[:, 1]
+        wins = (diff > 0) + 0.5 * (diff == 0)
+
+        # Paarung als ein Schlüssel: Team 0 = Sitze 0/2, Team 1 = Sitze 1/3
+        keys = seats[:, 0] | (seats[:, 2] << 8) | (seats[:, 1] << 16) | (seats[:, 3] << 24)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = [np.bincount(inverse, weights=w) for w in (wins, diff, diff.astype(np.float64) ** 2)]
+        for i, key in enumerate(unique.tolist()):
+            key = ((key & 0xFF, (key >> 8) & 0xFF), ((key >> 16) & 0xFF, (key >> 24) & 0xFF))
+            acc = self.matchups.setdefault(key, [0, 0.0, 0.0, 0.0])
+            acc[0] += int(counts[i])
+            for j in range(3):
+                acc[j + 1] += float(sums[j][i])
+
+        # Latenzen in log-Klassen pro Agent
+        ms = chunk["move_ms"].astype(np.float64)
+        codes = np.broadcast_to(seats[:, :, None], ms.shape)
+        bins = np.floor((np.log10(np.maximum(ms, LATENCY_MIN_MS)) - math.log10(LATENCY_MIN_MS))
+                        * LATENCY_BINS_PER_DECADE).astype(np.int64)
+        bins = np.minimum(bins, LATENCY_NR_BINS - 1)
+        for code in np.unique(seats).tolist():
+            mask = codes == code
+            hist = self.latency.setdefault(code, np.zeros(LATENCY_NR_BINS, dtype=np.int64))
+            hist += np.bincount(bins[mask], minlength=LATENCY_NR_BINS)
+
+    def latency_percentiles(self, code: int, percentiles=(50, 95, 99)) -> list:
+        """
+        Perzentile der Zuglatenz (ms, Klassenmitte, ~0.6% genau) und Maximum.
+        """
+        hist = self.latency[code]
+        cumulative = np.cumsum(hist)
+        values = []
+        for q in list(percentiles) + [100]:
+            index = int(np.searchsorted(cumulative, q / 100 * cumulative[-1]))
+            values.append(LATENCY_MIN_MS * 10 ** ((index + 0.5) / LATENCY_BINS_PER_DECADE))
+        return values
+
+    def print(self, agents: list) -> None:
+        def team(codes):
+            names = [agents[c] for c in codes]
+            return names[0] if names[0] == names[1] else "+".join(names)
+
+        print(f"{'Team 0':<16} {'Team 1':<16} {'Spiele':>9} {'Siege T0':>9} {'Diff':>8} {'±95%':>6}")
+        for key, (n, wins, s, s2) in sorted(self.matchups.items()):
+            mean = s / n
+            sd = math.sqrt(max(0.0, s2 / n - mean ** 2))
+            print(f"{team(key[0]):<16} {team(key[1]):<16} {n:>9} {wins / n:>9.1%} {mean:>8.1f} "
+                  f"{1.96 * sd / math.sqrt(n):>6.1f}")
+        print()
+        print(f"{'Agent':<16} {'Züge':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for code, hist in sorted(self.latency.items()):
+            p50, p95, p99, top = self.latency_percentiles(code)
+            print(f"{agents[code]:<16} {int(hist.sum()):>10} {p50:>9.2f} {p95:>9.2f} {p99:>9.2f} {top:>9.2f}")
+
+
+def summarize(results_dir: str, chunk: int = 1 << 20):
+    """
+    Auswertung über alle Spiele, blockweise gelesen.
+
+    Returns:
+        (Summary, manifest)
+    """
+    summary = Summary()
+    manifest = None
+    for columns, manifest in iter_chunks(results_dir, chunk):
+        summary.add(columns)
+    if manifest is None:
+        manifest, _ = open_columns(results_dir)
+    return summary, manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arena-Resultate auswerten")
+    parser.add_argument("results", nargs="?", default=DEFAULT_RESULTS_DIR, help="Resultat-Ordner")
+    parser.add_argument("--chunk", type=int, default=1 << 20, help="Zeilen pro gelesenem Block")
+    args = parser.parse_args()
+
+    summary, manifest = summarize(args.results, args.chunk)
+    nr_games = sum(acc[0] for acc in summary.matchups.values())
+    print(f"{args.results}: {nr_games} Spiele")
+    summary.print(manifest["agents"])
+
+
+if __name__ == "__main__":
+    main()
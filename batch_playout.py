@@ -0,0 +1,103 @@
+# batch_playout.py
+#
+# Vektorisierte Zufalls-Playouts im cheating_mode.
+#
+# Statt für jedes Playout einen GameSim per init_from_state (deepcopy) aufzusetzen,
+# wird der GameState einmal als Snapshot in NumPy-Arrays übernommen. Ein Aufruf von
+# run() spielt dann B Spiele gleichzeitig zu Ende: alle Spiele sind immer beim
+# gleichen Kartenzug, nur der Spieler am Zug (Stichgewinner) unterscheidet sich.
+
+import numpy as np
+
+from jass.game.const import card_values, color_of_card
+from jass.game.game_state import GameState
+
+from endgame_tablebase import STRENGTH
+from rule_kernel import valid_cards_batch
+
+
+# STRENGTH_TABLE[trump, lead, card]: Stärke einer Karte im Stich (siehe endgame_tablebase)
+STRENGTH_TABLE = np.array(STRENGTH, dtype=np.int32)
+
+
+class BatchPlayout:
+    """
+    Snapshot eines GameState für vektorisierte Zufalls-Playouts.
+    """
+
+    def __init__(self, state: GameState):
+        self._trump = int(state.trump)
+        self._hands = state.hands.astype(bool)
+        self._nr_tricks = int(state.nr_tricks)
+        self._nr_cards_in_trick = int(state.nr_cards_in_trick)
+        self._trick = np.full(4, -1, dtype=np.int64)
+        self._trick[:self._nr_cards_in_trick] = state.tricks[self._nr_tricks, :self._nr_cards_in_trick]
+        if self._nr_cards_in_trick == 0:
+            self._first = int(state.player)
+        else:
+            self._first = int(state.trick_first_player[self._nr_tricks])
+        self._points = np.array(state.points, dtype=np.int64)
+        self._card_points = card_values[self._trump].astype(np.int64)
+        self._strength = STRENGTH_TABLE[self._trump]
+
+    def run(self, first_cards: np.ndarray, rng: np.random.Generator, played: np.ndarray = None) -> np.ndarray:
+        """
+        Spielt für jede Karte in first_cards ein Spiel zu Ende: zuerst wird die
+        Karte vom Spieler am Zug gespielt, danach zufällige gültige Karten.
+
+        Args:
+            first_cards: (B,) erste Karte pro Playout
+            rng: Zufallsgenerator
+            played: optional (B, Anzahl restliche Karten), erhält die gespielten Karten
+                in Spielreihenfolge (zum Nachspielen im Test)
+
+        Returns:
+            (B, 2) Endpunkte von Team 0 und Team 1
+        """
+        first_cards = np.asarray(first_cards, dtype=np.int64)
+        batch = first_cards.shape[0]
+        rows = np.arange(batch)
+
+        hands = np.broadcast_to(self._hands, (batch, 4, 36)).copy()
+        tricks = np.broadcast_to(self._trick, (batch, 4)).copy()
+        first = np.full(batch, self._first, dtype=np.int64)
+        points = np.broadcast_to(self._points, (batch, 2)).copy()
+
+        nr_tricks = self._nr_tricks
+        n = self._nr_cards_in_trick
+        forced = first_cards
+        move = 0
+
+        while nr_tricks < 9:
+            player = (first - n) % 4
+            if forced is not None:
+                cards = forced
+                forced = None
+            else:
+                valid = valid_cards_batch(hands[rows, player], tricks, n, self._trump)
+                # gleichverteilte Wahl unter den gültigen Karten
+                noise = rng.random((batch, 36))
+                noise[~valid] = -1.0
+                cards = noise.argmax(axis=1)
+
+            hands[rows, player, cards] = False
+            tricks[:, n] = cards
+            n += 1
+            if played is not None:
+                played[:, move] = cards
+            move += 1
+
+            if n == 4:
+                lead = color_of_card[tricks[:, 0]]
+                winner_pos = self._strength[lead[:, None], tricks].argmax(axis=1)
+                winner = (first - winner_pos) % 4
+                trick_points = self._card_points[tricks].sum(axis=1)
+                nr_tricks += 1
+                if nr_tricks == 9:
+                    trick_points += 5
+                points[rows, winner % 2] += trick_points
+                first = winner
+                tricks.fill(-1)
+                n = 0
+
+        return points
@@ -0,0 +1,57 @@
+# bench_adaptive_search.py
+#
+# MyAgentcomplex mit festem vs. adaptivem Suchaufwand auf denselben Spielen:
+# beide spielen (als Team 0) gegen Random-Agenten, gleiche Karten und Seeds.
+# Verglichen werden Iterationen pro Spiel, Zeit pro Zug und Punkte.
+
+import sys
+import time
+
+import numpy as np
+
+from jass.arena.arena import Arena
+from jass.agents.agent_random_schieber import AgentRandomSchieber
+from my_agentcomplex import MyAgentcomplex
+
+
+def run(adaptive: bool, nr_games: int):
+    np.random.seed(1)
+    agents = [MyAgentcomplex(seed=1, agent_id=0), MyAgentcomplex(seed=1, agent_id=2)]
+    opponents = [AgentRandomSchieber(), AgentRandomSchieber()]
+    for i, agent in enumerate(agents):
+        agent._adaptive_search = adaptive
+        opponents[i]._rng = np.random.default_rng(10 + i)
+
+    # Zeit pro Kartenzug messen
+    times = []
+    for agent in agents:
+        play = agent.action_play_card
+
+        def timed(obs, play=play):
+            start = time.perf_counter()
+            card = play(obs)
+            times.append(time.perf_counter() - start)
+            return card
+
+        agent.action_play_card = timed
+
+    arena = Arena(nr_games_to_play=nr_games, print_every_x_games=nr_games + 1)
+    arena.set_players(agents[0], opponents[0], agents[1], opponents[1])
+    arena.play_all_games()
+
+    iterations = sum(agent.nr_iterations for agent in agents)
+    return iterations / nr_games, np.mean(times) * 1e3, arena.points_team_0.mean()
+
+
+def main():
+    nr_games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    print(f"{nr_games} Spiele, Team 0 = MyAgentcomplex, Team 1 = Random")
+    print(f"{'Suche':<10} {'Iter./Spiel':>12} {'ms/Zug':>8} {'Punkte':>8}")
+    for name, adaptive in (("fest", False), ("adaptiv", True)):
+        iterations, ms, points = run(adaptive, nr_games)
+        print(f"{name:<10} {iterations:>12.0f} {ms:>8.1f} {points:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
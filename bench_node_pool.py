@@ -0,0 +1,73 @@
+# bench_node_pool.py
+#
+# Root-MCTS vs. Baumsuche ISMCTS (node_pool.py) bei gleichem Budget, für ISMCTS
+# mit ausreichend grossem Pool und mit kleinem Pool (beide full_policy).
+#
+# Stellungen und Referenz wie in bench_opponent_model.py: Wert jeder gültigen
+# Karte auf den ECHTEN Händen, gemessen wird der mittlere Verlust (Punkte) der
+# gewählten Karte gegenüber der besten Karte, dazu Zeit und belegte Knoten.
+
+import sys
+import time
+
+import numpy as np
+
+from bench_opponent_model import random_position, reference_values
+from game_session import GameSession
+from node_pool import NodePool, DEFAULT_MAX_NODES, FULL_STOP, FULL_RECYCLE, BYTES_PER_NODE
+from search_engine import ISMCTS, MCTS, SearchEngine
+
+BUDGETS = (100, 200, 400)
+SMALL_POOL = 256
+
+VARIANTS = {
+    "mcts": None,
+    f"ismcts-{DEFAULT_MAX_NODES}": (DEFAULT_MAX_NODES, FULL_STOP),
+    f"ismcts-{SMALL_POOL}-stop": (SMALL_POOL, FULL_STOP),
+    f"ismcts-{SMALL_POOL}-recycle": (SMALL_POOL, FULL_RECYCLE),
+}
+
+
+def main():
+    nr_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = np.random.default_rng(11)
+    np.random.seed(11)
+    engine = SearchEngine()
+
+    regret = {(name, budget): [] for name in VARIANTS for budget in BUDGETS}
+    nodes = {key: [] for key in regret}
+    elapsed = {key: 0.0 for key in regret}
+    for i in range(nr_positions):
+        sim, valid = random_position(engine, rng)
+        values = reference_values(sim.state, valid, rng)
+        obs = sim.get_observation()
+        session = GameSession(0)
+        session.update(obs)
+
+        for budget in BUDGETS:
+            for name, pool_args in VARIANTS.items():
+                start = time.perf_counter()
+                if pool_args is None:
+                    result = engine.evaluate(obs, MCTS, budget, rng=np.random.default_rng(i), early_stop=False,
+                                             sampler=session.sample_hidden_hands)
+                else:
+                    pool = NodePool(*pool_args)
+                    result = engine.evaluate(obs, ISMCTS, budget, rng=np.random.default_rng(i), early_stop=False,
+                                             session=session, pool=pool, reuse=False)
+                    nodes[name, budget].append(pool.size)
+                elapsed[name, budget] += time.perf_counter() - start
+                regret[name, budget].append(values.max() - values[result.card])
+
+    print(f"{nr_positions} Stellungen, Verlust gegenüber der besten Karte (Punkte, echte Hände)")
+    print(f"{'Suche':<20} {'Budget':>6} {'Verlust':>8} {'beste Karte':>12} {'ms/Zug':>8} {'Knoten':>7} {'KiB':>5}")
+    for (name, budget), losses in sorted(regret.items(), key=lambda item: item[0][1]):
+        losses = np.array(losses)
+        pool_args = VARIANTS[name]
+        nr_nodes = f"{np.mean(nodes[name, budget]):>7.0f}" if pool_args else f"{'-':>7}"
+        kib = f"{pool_args[0] * BYTES_PER_NODE / 1024:>5.0f}" if pool_args else f"{'-':>5}"
+        print(f"{name:<20} {budget:>6} {losses.mean():>8.2f} {np.mean(losses < 1e-9):>12.1%} "
+              f"{elapsed[name, budget] / nr_positions * 1e3:>8.1f} {nr_nodes} {kib}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# bench_opponent_model.py
+#
+# Gleichverteilte vs. gewichtete Determinizations (opponent_model.py) bei
+# gleichem bzw. kleinerem Budget der MCTS.
+#
+# Stellungen: der Vorhand-Spieler sagt mit der Hand-Heuristik Trumpf an, gespielt
+# wird mit Alpha-Beta über den laufenden Stich (search_engine), also mit
+# Spielern, die Stiche nehmen, wenn sie können.
+# Referenz: Wert jeder gültigen Karte auf den ECHTEN Händen (viele Zufalls-Playouts,
+# gleiche Bewertung wie die Rollouts der MCTS). Gemessen wird der mittlere
+# Verlust (Punkte) der gewählten Karte gegenüber der besten Karte.
+
+import sys
+import time
+
+import numpy as np
+
+from jass.game.const import next_player
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand, convert_one_hot_encoded_cards_to_int_encoded_list
+
+from batch_playout import BatchPlayout
+from game_session import GameSession
+from my_agent import score_hand_for_trump
+from opponent_model import OpponentModelSampler
+from search_engine import ALPHABETA, MCTS, SearchEngine
+
+BUDGETS = (50, 100, 200)
+REFERENCE_PLAYOUTS = 2000
+
+
+def random_position(engine, rng):
+    """
+    Spielt ein Spiel bis zu einer zufälligen Stellung mit mehreren Kandidaten.
+    """
+    rule = engine.rule
+    while True:
+        sim = GameSim(rule=rule)
+        dealer = int(rng.integers(4))
+        sim.init_from_cards(deal_random_hand(), dealer)
+        hand = convert_one_hot_encoded_cards_to_int_encoded_list(sim.state.hands[next_player[dealer]])
+        sim.action_trump(int(np.argmax([score_hand_for_trump(hand, t) for t in range(6)])))
+
+        stop = int(rng.integers(4, 28))
+        while sim.state.nr_played_cards < stop:
+            sim.action_play_card(engine.evaluate(sim.state, ALPHABETA, endgame=False).card)
+
+        valid = np.flatnonzero(rule.get_valid_cards_from_state(sim.state))
+        if valid.size > 1:
+            return sim, valid
+
+
+def reference_values(state, valid, rng) -> np.ndarray:
+    my_team = state.player % 2
+    cards = np.repeat(valid, REFERENCE_PLAYOUTS)
+    points = BatchPlayout(state).run(cards, rng)[:, my_team]
+    values = np.full(36, -np.inf)
+    values[valid] = np.bincount(cards, weights=points, minlength=36)[valid] / REFERENCE_PLAYOUTS
+    return values
+
+
+def main():
+    nr_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = np.random.default_rng(11)
+    np.random.seed(11)
+    engine = SearchEngine()
+
+    regret = {(name, budget): [] for name in ("gleich", "gewichtet") for budget in BUDGETS}
+    elapsed = {key: 0.0 for key in regret}
+    for i in range(nr_positions):
+        sim, valid = random_position(engine, rng)
+        values = reference_values(sim.state, valid, rng)
+        obs = sim.get_observation()
+        session = GameSession(0)
+        session.update(obs)
+
+        for budget in BUDGETS:
+            for name in ("gleich", "gewichtet"):
+                weighted = name == "gewichtet"
+                sampler = OpponentModelSampler(obs, session) if weighted else session.sample_hidden_hands
+                start = time.perf_counter()
+                result = engine.evaluate(obs, MCTS, budget, rng=np.random.default_rng(i), early_stop=False,
+                                         sampler=sampler, weighted=weighted)
+                elapsed[name, budget] += time.perf_counter() - start
+                regret[name, budget].append(values.max() - values[result.card])
+
+    print(f"{nr_positions} Stellungen, Verlust gegenüber der besten Karte (Punkte, echte Hände)")
+    print(f"{'Sampler':<10} {'Budget':>6} {'Verlust':>8} {'beste Karte':>12} {'ms/Zug':>8}")
+    for (name, budget), losses in sorted(regret.items(), key=lambda item: (item[0][1], item[0][0])):
+        losses = np.array(losses)
+        print(f"{name:<10} {budget:>6} {losses.mean():>8.2f} {np.mean(losses < 1e-9):>12.1%} "
+              f"{elapsed[name, budget] / nr_positions * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench_state_template.py
+#
+# Misst nur die State-Aufbau-Phase einer Determinization:
+#   alt: state_from_observation(obs, hands) + GameSim.init_from_state(state)
+#   neu: StateTemplate(obs) einmal pro Zug + template.stamp(hands) pro Iteration
+
+import time
+
+import numpy as np
+
+from jass.game.game_sim import GameSim
+from jass.game.game_state_util import state_from_observation
+from jass.game.game_util import deal_random_hand
+from jass.game.rule_schieber import RuleSchieber
+from state_template import StateTemplate
+
+
+def random_observation(rule, rng, nr_cards: int):
+    sim = GameSim(rule=rule)
+    sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+    sim.action_trump(int(rng.integers(6)))
+    while sim.state.nr_played_cards < nr_cards:
+        valid = np.flatnonzero(rule.get_valid_cards_from_state(sim.state))
+        sim.action_play_card(int(rng.choice(valid)))
+    return sim.get_observation(), sim.state.hands.copy()
+
+
+def main():
+    np.random.seed(0)
+    rng = np.random.default_rng(0)
+    rule = RuleSchieber()
+
+    nr_moves = 50
+    iterations = 200
+
+    moves = [random_observation(rule, rng, int(rng.integers(0, 32))) for _ in range(nr_moves)]
+
+    start = time.perf_counter()
+    for obs, hands in moves:
+        for _ in range(iterations):
+            state = state_from_observation(obs, hands)
+            sim = GameSim(rule=rule)
+            sim.init_from_state(state)
+    t_old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for obs, hands in moves:
+        template = StateTemplate(rule, obs)
+        for _ in range(iterations):
+            sim = template.stamp(hands)
+    t_new = time.perf_counter() - start
+
+    # gleicher Inhalt wie der alte Weg
+    for obs, hands in moves[:10]:
+        assert StateTemplate(rule, obs).stamp(hands).state == state_from_observation(obs, hands)
+
+    n = nr_moves * iterations
+    print(f"{n} Determinizations ({nr_moves} Züge x {iterations} Iterationen)")
+    print(f"alt: {t_old / n * 1e6:.1f} µs pro Iteration")
+    print(f"neu: {t_new / n * 1e6:.1f} µs pro Iteration")
+    print(f"Speedup State-Aufbau: {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# card_equivalence.py
+#
+# Äquivalenzklassen von Karten für die Suche.
+#
+# Zwei Karten derselben Farbe sind strategisch gleich, wenn sie in der
+# Rangfolge (abhängig vom Trumpf) benachbart sind, nachdem die bereits
+# gespielten Karten dazwischen entfernt wurden, und gleich viele Punkte zählen.
+# Beispiel Farbe (kein Trumpf): 7 und 6 sind gleich (je 0 Punkte), ebenso 9 und 6,
+# wenn 8 und 7 schon gespielt sind. Ass und König sind nie gleich (11 vs. 4 Punkte).
+#
+# Karten im laufenden Stich zählen NICHT als gespielt: ob eine Karte den Stich
+# schlägt, hängt gerade an ihnen (K♥ liegt, A♥ und D♥ sind nicht gleich).
+#
+# Die Suche (Root der Agenten, Minimax, Endspiel-Löser) rechnet nur noch einen
+# Repräsentanten pro Klasse. Die zufälligen Rollouts wählen weiterhin
+# gleichverteilt unter allen gültigen Karten, sonst würde sich die
+# Verteilung der Playouts ändern.
+
+import numpy as np
+
+from jass.game.const import UNE_UFE, card_values
+
+# Offsets (A=0, K=1, Q=2, J=3, 10=4, 9=5, 8=6, 7=7, 6=8) von der stärksten zur schwächsten Karte
+TRUMP_ORDER = (3, 5, 0, 1, 2, 4, 6, 7, 8)
+OBE_ORDER = (0, 1, 2, 3, 4, 5, 6, 7, 8)
+UNE_ORDER = (8, 7, 6, 5, 4, 3, 2, 1, 0)
+
+
+def colour_order(colour: int, trump: int) -> tuple:
+    """
+    Karten einer Farbe von der stärksten zur schwächsten.
+    """
+    if trump == UNE_UFE:
+        order = UNE_ORDER
+    elif trump == colour:
+        order = TRUMP_ORDER
+    else:
+        order = OBE_ORDER
+    return tuple(colour * 9 + offset for offset in order)
+
+
+# ORDERS[trump][colour] = Karten der Farbe in Rangfolge
+ORDERS = [[colour_order(colour, trump) for colour in range(4)] for trump in range(6)]
+
+# NEXT_STRONGER[trump][card] = stärkere Karten derselben Farbe, die nächststärkere zuerst
+NEXT_STRONGER = [[tuple(reversed(ORDERS[trump][card // 9][:ORDERS[trump][card // 9].index(card)]))
+                  for card in range(36)] for trump in range(6)]
+
+# Punkte als Python-Listen (schneller als numpy-Indizes in der Bit-Suche)
+_POINTS = [[int(card_values[trump, card]) for card in range(36)] for trump in range(6)]
+
+
+def gone_mask(tricks: np.ndarray, nr_tricks: int) -> np.ndarray:
+    """
+    Karten aus abgeschlossenen Stichen als Maske (36,) bool.
+    Funktioniert mit GameObservation und GameState (tricks, nr_tricks).
+    """
+    gone = np.zeros(36, dtype=bool)
+    played = tricks[:nr_tricks].ravel()
+    gone[played[played >= 0]] = True
+    return gone
+
+
+def equivalence_classes(cards, trump: int, gone: np.ndarray) -> list:
+    """
+    Teilt die Karten (z.B. die gültigen Karten) in Äquivalenzklassen.
+
+    Args:
+        cards: Kartenindizes
+        trump: Trumpf 0..5
+        gone: Maske der Karten aus abgeschlossenen Stichen
+
+    Returns:
+        Liste von Klassen (Listen von Karten in Rangfolge), sortiert nach der
+        kleinsten Karte der Klasse
+    """
+    cards = [int(card) for card in cards]
+    points = _POINTS[trump]
+
+    # Farben mit nur einer Karte sind immer eine eigene Klasse
+    by_colour = [[], [], [], []]
+    for card in cards:
+        by_colour[card // 9].append(card)
+
+    classes = []
+    for colour, colour_cards in enumerate(by_colour):
+        if len(colour_cards) < 2:
+            if colour_cards:
+                classes.append(colour_cards)
+            continue
+        current = []
+        for card in ORDERS[trump][colour]:
+            if gone[card]:
+                continue
+            if card not in colour_cards:
+                # eine Karte dazwischen ist noch im Spiel → Kette bricht ab
+                if current:
+                    classes.append(current)
+                    current = []
+                continue
+            if current and points[card] != points[current[0]]:
+                classes.append(current)
+                current = []
+            current.append(card)
+        if current:
+            classes.append(current)
+
+    classes.sort(key=min)
+    return classes
+
+
+def representatives(classes: list) -> np.ndarray:
+    """
+    Eine Karte pro Klasse (jeweils die mit dem kleinsten Index), aufsteigend.
+    """
+    return np.array([min(cls) for cls in classes], dtype=np.int64)
+
+
+def reduce_card_bits(valid: int, alive: int, trump: int) -> int:
+    """
+    Bitmasken-Version für die exakte Suche: pro Klasse bleibt nur die stärkste Karte.
+
+    Args:
+        valid: gültige Karten des Spielers am Zug (Bitmaske)
+        alive: alle Karten, die noch im Spiel sind, inkl. laufendem Stich (Bitmaske)
+        trump: Trumpf 0..5
+
+    Returns:
+        reduzierte Bitmaske der gültigen Karten
+    """
+    stronger = NEXT_STRONGER[trump]
+    points = _POINTS[trump]
+    reduced = valid
+    bits = valid
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        card = low.bit_length() - 1
+        for other in stronger[card]:
+            if (alive >> other) & 1:
+                if (valid >> other) & 1 and points[other] == points[card]:
+                    reduced ^= low
+                break
+    return reduced
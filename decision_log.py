@@ -0,0 +1,280 @@
+# decision_log.py
+#
+# Entscheidungs-Log und Replay-Tool.
+#
+# Jeder Zug eines Agenten wird als ein Record fester Grösse (NumPy structured
+# dtype, ~200 Byte) an eine Binärdatei angehängt: Observation bzw. GameState,
+# Master-Seed, Agent-Parameter, gewählte Aktion und Rechenzeit.
+#
+# Da die Zufallszahlen pro Zug nur aus Master-Seed und Observation abgeleitet
+# werden (siehe seeding.py), kann jeder geloggte Zug bit-genau wiederholt werden.
+# Ausnahme: Züge der Baumsuche, die den Suchbaum früherer Züge weiterverwendet hat
+# (MyAgentcomplex.replayable); diese werden beim Replay übersprungen:
+#
+#   python decision_log.py Data/decisions.bin               # alle Züge prüfen
+#   python decision_log.py Data/decisions.bin --index 17 --profile
+
+import argparse
+import cProfile
+import os
+import pstats
+import threading
+import time
+
+import numpy as np
+
+from jass.game.game_observation import GameObservation
+from jass.game.game_state import GameState
+
+LOG_MAGIC = b'JDL1'
+LOG_HEADER_SIZE = 16
+
+KIND_TRUMP = 0
+KIND_CARD = 1
+
+# Agenten-Codes im Log
+AGENT_COMPLEX = 1
+AGENT_MC_CHEATING = 2
+
+# Plätze für die Agenten-Parameter (params() des Agenten, mit 0 aufgefüllt)
+NR_PARAMS = 8
+
+RECORD_DTYPE = np.dtype([
+    ('kind', 'u1'),
+    ('agent', 'u1'),
+    ('cheating', 'u1'),
+    ('action', 'i1'),
+    ('dealer', 'i1'),
+    ('player', 'i1'),
+    ('trump', 'i1'),
+    ('forehand', 'i1'),
+    ('declared_trump', 'i1'),
+    ('nr_tricks', 'i1'),
+    ('nr_cards_in_trick', 'i1'),
+    ('nr_played_cards', 'i1'),
+    ('hands', '<u8', (4,)),
+    ('tricks', 'i1', (9, 4)),
+    ('trick_first_player', 'i1', (9,)),
+    ('trick_winner', 'i1', (9,)),
+    ('trick_points', '<i2', (9,)),
+    ('points', '<i2', (2,)),
+    ('master_seed', '<u8', (2,)),
+    ('agent_id', '<u4'),
+    ('params', '<f8', (NR_PARAMS,)),
+    ('elapsed', '<f8'),
+])
+
+_CARD_WEIGHTS = 1 << np.arange(36, dtype=np.uint64)
+
+
+class NotReplayableError(ValueError):
+    """
+    Record, den das Replay aus sich allein nicht nachrechnen kann.
+    """
+
+
+def _to_bits(one_hot: np.ndarray) -> int:
+    return int(np.dot(one_hot.astype(np.uint64), _CARD_WEIGHTS))
+
+
+def _from_bits(bits: int) -> np.ndarray:
+    return ((int(bits) >> np.arange(36)) & 1).astype(np.int32)
+
+
+class DecisionLog:
+    """
+    Append-only Binärlog für Agenten-Entscheidungen (thread-safe).
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            header = bytearray(LOG_HEADER_SIZE)
+            header[0:4] = LOG_MAGIC
+            header[4:8] = np.uint32(RECORD_DTYPE.itemsize).tobytes()
+            with open(path, 'wb') as f:
+                f.write(bytes(header))
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def record(self, kind: int, agent: int, obs, action: int, master_seed: int, agent_id: int,
+               params, elapsed: float) -> None:
+        """
+        Einen Zug anhängen. obs ist eine GameObservation oder (cheating) ein GameState.
+        """
+        rec = np.zeros(1, dtype=RECORD_DTYPE)[0]
+        rec['kind'] = kind
+        rec['agent'] = agent
+        rec['action'] = action
+        rec['dealer'] = obs.dealer
+        rec['player'] = obs.player
+        rec['trump'] = obs.trump
+        rec['forehand'] = obs.forehand
+        rec['declared_trump'] = obs.declared_trump
+        rec['nr_tricks'] = obs.nr_tricks
+        rec['nr_cards_in_trick'] = obs.nr_cards_in_trick
+        rec['nr_played_cards'] = obs.nr_played_cards
+
+        if isinstance(obs, GameState):
+            rec['cheating'] = 1
+            rec['hands'] = [_to_bits(obs.hands[p]) for p in range(4)]
+        else:
+            rec['hands'][obs.player] = _to_bits(obs.hand)
+
+        rec['tricks'] = obs.tricks
+        rec['trick_first_player'] = obs.trick_first_player
+        rec['trick_winner'] = obs.trick_winner
+        rec['trick_points'] = obs.trick_points
+        rec['points'] = obs.points
+        rec['master_seed'] = [master_seed & 0xFFFFFFFFFFFFFFFF, (master_seed >> 64) & 0xFFFFFFFFFFFFFFFF]
+        rec['agent_id'] = agent_id
+        params = list(params) + [0.0] * (NR_PARAMS - len(params))
+        rec['params'] = params
+        rec['elapsed'] = elapsed
+
+        with self._lock:
+            with open(self._path, 'ab') as f:
+                f.write(rec.tobytes())
+
+
+def read_log(path: str) -> np.ndarray:
+    """
+    Ganzes Log als structured array (memory-mapped).
+    """
+    with open(path, 'rb') as f:
+        header = f.read(LOG_HEADER_SIZE)
+    if header[0:4] != LOG_MAGIC:
+        raise ValueError(f'Kein Entscheidungs-Log: {path}')
+    itemsize = int(np.frombuffer(header[4:8], dtype='<u4')[0])
+    if itemsize != RECORD_DTYPE.itemsize:
+        raise ValueError(f'Record-Grösse {itemsize} passt nicht zu dieser Version ({RECORD_DTYPE.itemsize})')
+    count = (os.path.getsize(path) - LOG_HEADER_SIZE) // itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=LOG_HEADER_SIZE, shape=(count,))
+
+
+def master_seed_of(rec) -> int:
+    return int(rec['master_seed'][0]) | (int(rec['master_seed'][1]) << 64)
+
+
+def _fill_common(target, rec) -> None:
+    target.dealer = int(rec['dealer'])
+    target.player = int(rec['player'])
+    target.trump = int(rec['trump'])
+    target.forehand = int(rec['forehand'])
+    target.declared_trump = int(rec['declared_trump'])
+    target.tricks[:, :] = rec['tricks']
+    target.trick_first_player[:] = rec['trick_first_player']
+    target.trick_winner[:] = rec['trick_winner']
+    target.trick_points[:] = rec['trick_points']
+    target.nr_tricks = int(rec['nr_tricks'])
+    target.nr_cards_in_trick = int(rec['nr_cards_in_trick'])
+    target.nr_played_cards = int(rec['nr_played_cards'])
+    target.points[:] = rec['points']
+    if target.nr_played_cards < 36:
+        target.current_trick = target.tricks[target.nr_tricks]
+    else:
+        target.current_trick = None
+
+
+def record_to_observation(rec) -> GameObservation:
+    obs = GameObservation()
+    _fill_common(obs, rec)
+    obs.player_view = obs.player
+    obs.hand[:] = _from_bits(rec['hands'][obs.player])
+    return obs
+
+
+def record_to_state(rec) -> GameState:
+    state = GameState()
+    _fill_common(state, rec)
+    for p in range(4):
+        state.hands[p, :] = _from_bits(rec['hands'][p])
+    return state
+
+
+def agent_from_record(rec):
+    """
+    Agent mit denselben Parametern und demselben Master-Seed wie im Log erstellen.
+    """
+    # lokale Imports, da die Agenten selbst dieses Modul verwenden
+    from my_agentcomplex import MyAgentcomplex
+    from MCTS_Cheating import MonteCarloTrickAgent
+
+    seed = master_seed_of(rec)
+    agent_id = int(rec['agent_id'])
+    if rec['agent'] == AGENT_COMPLEX:
+        if not MyAgentcomplex.replayable(rec['params']):
+            raise NotReplayableError('Baumsuche mit weiterverwendetem Teilbaum früherer Züge')
+        return MyAgentcomplex.from_params(rec['params'], seed=seed, agent_id=agent_id)
+    if rec['agent'] == AGENT_MC_CHEATING:
+        return MonteCarloTrickAgent.from_params(rec['params'], seed=seed, agent_id=agent_id)
+    raise ValueError(f'Unbekannter Agent-Code {rec["agent"]}')
+
+
+def replay(rec):
+    """
+    Einen geloggten Zug neu rechnen.
+
+    Returns:
+        (Aktion, Rechenzeit in Sekunden)
+
+    Raises:
+        NotReplayableError: Zug hängt von früheren Zügen ab (weiterverwendeter Suchbaum)
+    """
+    agent = agent_from_record(rec)
+    obs = record_to_state(rec) if rec['cheating'] else record_to_observation(rec)
+    start = time.perf_counter()
+    if rec['kind'] == KIND_TRUMP:
+        action = agent.action_trump(obs)
+    else:
+        action = agent.action_play_card(obs)
+    return int(action), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Geloggte Agenten-Züge wiederholen')
+    parser.add_argument('log')
+    parser.add_argument('--index', type=int, default=None, help='nur diesen Record wiederholen')
+    parser.add_argument('--profile', action='store_true', help='Replay mit cProfile ausgeben')
+    args = parser.parse_args()
+
+    records = read_log(args.log)
+    indices = range(records.shape[0]) if args.index is None else [args.index]
+
+    mismatches = 0
+    skipped = 0
+    for i in indices:
+        rec = records[i]
+        try:
+            agent_from_record(rec)
+        except NotReplayableError as e:
+            skipped += 1
+            print(f"#{i}: Zug {int(rec['nr_played_cards'])} übersprungen ({e})")
+            continue
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            action, elapsed = replay(rec)
+            profiler.disable()
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+        else:
+            action, elapsed = replay(rec)
+
+        same = (action == int(rec['action']))
+        mismatches += 0 if same else 1
+        print(f"#{i}: Zug {int(rec['nr_played_cards'])} geloggt={int(rec['action'])} replay={action} "
+              f"{'OK' if same else 'ABWEICHUNG'} ({rec['elapsed'] * 1000:.1f}ms -> {elapsed * 1000:.1f}ms)")
+
+    print(f"{len(indices) - skipped} Züge wiederholt, {mismatches} Abweichungen, "
+          f"{skipped} nicht reproduzierbar übersprungen")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
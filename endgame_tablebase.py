@@ -0,0 +1,489 @@
+# endgame_tablebase.py
+#
+# Exakte Endspiel-Datenbank (Tablebase) für die letzten Stiche.
+#
+# Sobald nur noch wenige Stiche (standardmässig 3 oder weniger) zu spielen sind,
+# lässt sich das Spiel mit perfekter Information (alle Hände bekannt, also im
+# cheating_mode oder in einer Determinization) exakt lösen.
+#
+# - Offline-Generator: erzeugt Endspiel-Stellungen, löst sie exakt und schreibt
+#   sie in ein kompaktes Binärformat (sortierte uint64-Schlüssel + uint16-Werte).
+# - Lookup-API: EndgameTablebase.probe(state) liefert das exakte Resultat für
+#   einen GameState. Die Datei wird per np.memmap eingeblendet; Stellungen, die
+#   nicht in der Datei stehen, werden direkt exakt gelöst und im Speicher gecacht.
+#
+# Schlüssel (62 Bit): Farb-Symmetrie wird herausgerechnet (Trumpffarbe -> Farbe 0,
+# übrige Farben sortiert), Spieler werden relativ zum Spieler am Zug kodiert.
+#   Bits  0..35: welche Karten sind noch im Spiel (kanonische Kartenindizes)
+#   Bits 36..59: Besitzer (2 Bit, relativ) jeder noch vorhandenen Karte
+#   Bits 60..61: Modus (0 = Farbtrumpf, 1 = Obe-Abe, 2 = Une-Ufe)
+#
+# Wert (16 Bit): Punkte des Teams am Zug in den restlichen Stichen (inkl. 5 Punkte
+# für den letzten Stich) im unteren Byte, beste (kanonische) Karte im oberen Byte.
+#
+# Hinweis: Der volle Raum aller 3-Stich-Endspiele ist auch nach Symmetrie-
+# Reduktion viel zu gross (~1e13 Stellungen), um ihn vollständig aufzuzählen.
+# Der Generator löst deshalb Stellungen aus gesampelten Spielen; fehlende
+# Stellungen werden zur Laufzeit exakt gelöst (wenige hundert Blätter).
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from jass.game.const import card_values, color_of_card, offset_of_card, OBE_ABE, UNE_UFE, next_player
+from jass.game.game_state import GameState
+from jass.game.game_util import deal_random_hand
+
+from card_equivalence import reduce_card_bits
+from rule_kernel import valid_card_bits
+
+
+DEFAULT_TB_FILE = os.path.join(os.path.dirname(__file__), 'Data', 'endgame_tb.bin')
+
+# maximale Anzahl Stiche, für die der Schlüssel (12 Karten * 2 Bit) ausgelegt ist
+TB_MAX_TRICKS = 3
+
+TB_MAGIC = b'JTB1'
+TB_VERSION = 1
+TB_HEADER_SIZE = 32
+
+# ---------------------------------------------------------
+# Bit-Tabellen (Karten als Bits in einem int, Bit i = Karte i)
+# ---------------------------------------------------------
+
+COLOUR_BITS = [0x1FF << (9 * c) for c in range(4)]
+CARD_BITS = [1 << c for c in range(36)]
+
+# Rangfolge im Trumpf (nach offset): Bauer > Nell > Ass > König > Dame > 10 > 8 > 7 > 6
+_TRUMP_ORDER = {3: 9, 5: 8, 0: 7, 1: 6, 2: 5, 4: 4, 6: 3, 7: 2, 8: 1}
+
+# Punkte pro Trumpf-Modus und Karte als Python-Listen (schneller als numpy-Indizes)
+CARD_POINTS = [[int(card_values[t, c]) for c in range(36)] for t in range(6)]
+
+# Summe der Punkte eines 9-Bit-Farbmusters: SUIT_POINTS[trump][colour][pattern]
+SUIT_POINTS = [[[sum(CARD_POINTS[t][9 * c + o] for o in range(9) if (p >> o) & 1)
+                 for p in range(512)] for c in range(4)] for t in range(6)]
+
+
+def _card_strength(card: int, lead: int, trump: int) -> int:
+    """
+    Stärke einer Karte im Stich bei gegebener Anspielfarbe (höher = gewinnt).
+    Entspricht RuleSchieber.calc_winner.
+    """
+    colour = color_of_card[card]
+    offset = offset_of_card[card]
+    if trump < 4 and colour == trump:
+        return 100 + _TRUMP_ORDER[offset]
+    if colour != lead:
+        return 0
+    if trump == UNE_UFE:
+        return 1 + offset
+    return 9 - offset
+
+
+# STRENGTH[trump][lead][card]
+STRENGTH = [[[_card_strength(c, lead, t) for c in range(36)] for lead in range(4)] for t in range(6)]
+
+
+def hand_points(hands, trump: int) -> int:
+    """
+    Summe der Kartenpunkte aller noch gehaltenen Karten.
+    """
+    total = 0
+    for hand in hands:
+        for c in range(4):
+            total += SUIT_POINTS[trump][c][(hand >> (9 * c)) & 0x1FF]
+    return total
+
+
+def hands_to_bits(hands: np.ndarray) -> list:
+    """
+    One-Hot-Hände (4 x 36) in eine Liste von 4 Bitmasken umwandeln.
+    """
+    weights = 1 << np.arange(36, dtype=np.uint64)
+    return [int(np.dot(hands[p].astype(np.uint64), weights)) for p in range(4)]
+
+
+def _last_trick_team0(hands, leader: int, trump: int) -> int:
+    """
+    Punkte von Team 0 im letzten Stich (jeder Spieler hat genau eine Karte).
+    """
+    trick = [hands[(leader - pos) % 4].bit_length() - 1 for pos in range(4)]
+    strength = STRENGTH[trump][color_of_card[trick[0]]]
+    best_pos = 0
+    for pos in range(1, 4):
+        if strength[trick[pos]] > strength[trick[best_pos]]:
+            best_pos = pos
+    if (leader - best_pos) % 2 != 0:
+        return 0
+    points_table = CARD_POINTS[trump]
+    return points_table[trick[0]] + points_table[trick[1]] + points_table[trick[2]] + points_table[trick[3]] + 5
+
+
+def _iter_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# ---------------------------------------------------------
+# Kanonische Schlüssel
+# ---------------------------------------------------------
+
+def canonical_key(hands, trump: int):
+    """
+    Kanonischer Schlüssel einer Stellung am Stichanfang.
+
+    Args:
+        hands: 4 Bitmasken, relativ zum Spieler am Zug (hands[0] = Spieler am Zug)
+        trump: Trumpf-Modus 0..5
+
+    Returns:
+        (key, colour_map): colour_map[echte Farbe] = kanonische Farbe
+    """
+    # Signatur pro Farbe: 9-Bit-Muster aller vier Spieler (eindeutig pro Besitzverteilung)
+    patterns = [[(hands[p] >> (9 * c)) & 0x1FF for p in range(4)] for c in range(4)]
+    signatures = [(pat[0] << 27) | (pat[1] << 18) | (pat[2] << 9) | pat[3] for pat in patterns]
+
+    if trump < 4:
+        mode = 0
+        others = sorted((c for c in range(4) if c != trump), key=lambda c: -signatures[c])
+        order = [trump] + others
+    else:
+        mode = 1 if trump == OBE_ABE else 2
+        order = sorted(range(4), key=lambda c: -signatures[c])
+
+    colour_map = [0, 0, 0, 0]
+    presence = 0
+    owner_bits = 0
+    nr_cards = 0
+    for canon, c in enumerate(order):
+        colour_map[c] = canon
+        pat = patterns[c]
+        suit_presence = pat[0] | pat[1] | pat[2] | pat[3]
+        presence |= suit_presence << (9 * canon)
+        for o in _iter_bits(suit_presence):
+            bit = 1 << o
+            owner = 0 if pat[0] & bit else 1 if pat[1] & bit else 2 if pat[2] & bit else 3
+            owner_bits |= owner << (2 * nr_cards)
+            nr_cards += 1
+
+    key = presence | (owner_bits << 36) | (mode << 60)
+    return key, colour_map
+
+
+def _map_card(card: int, colour_map) -> int:
+    return 9 * colour_map[card // 9] + card % 9
+
+
+def _unmap_card(card: int, colour_map) -> int:
+    colour = colour_map.index(card // 9)
+    return 9 * colour + card % 9
+
+
+# ---------------------------------------------------------
+# Tablebase
+# ---------------------------------------------------------
+
+class EndgameTablebase:
+    """
+    Exakte Endspiel-Lösungen für die letzten max_tricks Stiche.
+
+    Lookup-Reihenfolge für eine Stellung am Stichanfang:
+    1. In-Memory-Cache (auch für neu gelöste Stellungen)
+    2. memory-mapped Tablebase-Datei (binäre Suche auf sortierten Schlüsseln)
+    3. exakte Minimax-Lösung
+    """
+
+    def __init__(self, path: str = None, max_tricks: int = TB_MAX_TRICKS, cache_size: int = 200000):
+        self._max_tricks = min(max_tricks, TB_MAX_TRICKS)
+        self._cache = {}
+        self._cache_size = cache_size
+        self._keys = None
+        self._values = None
+
+        if path is not None and os.path.exists(path):
+            self._keys, self._values = load_tablebase(path)
+
+        # Statistik
+        self.nr_probes = 0
+        self.nr_file_hits = 0
+        self.nr_solved = 0
+
+    @property
+    def max_tricks(self) -> int:
+        return self._max_tricks
+
+    @property
+    def nr_file_entries(self) -> int:
+        return 0 if self._keys is None else int(self._keys.shape[0])
+
+    # ------------------------------------------------------------
+    # öffentliche API
+    # ------------------------------------------------------------
+    def probe(self, state: GameState, max_tricks: int = None):
+        """
+        Exaktes Resultat eines GameState (perfekte Information), falls höchstens
+        max_tricks Stiche (inkl. laufendem Stich) übrig sind.
+
+        Returns:
+            None, wenn die Stellung zu gross ist, sonst (points, best_card):
+            points = np.array([Punkte Team 0, Punkte Team 1]) am Spielende,
+            best_card = beste Karte für den Spieler am Zug.
+        """
+        if max_tricks is None:
+            max_tricks = self._max_tricks
+        tricks_left = 9 - state.nr_tricks
+        if state.nr_played_cards >= 36 or tricks_left > min(max_tricks, self._max_tricks):
+            return None
+
+        self.nr_probes += 1
+        hands = hands_to_bits(state.hands)
+        n = state.nr_cards_in_trick
+        trick = [int(c) for c in state.tricks[state.nr_tricks, :n]]
+        first = int(state.trick_first_player[state.nr_tricks])
+        if n == 0:
+            first = int(state.player)
+
+        team0, best_card = self._trick_value(hands, trick, first, int(state.trump), tricks_left)
+        total = hand_points(hands, state.trump) + sum(CARD_POINTS[state.trump][c] for c in trick) + 5
+
+        points = np.array(state.points, dtype=np.int32).copy()
+        points[0] += team0
+        points[1] += total - team0
+        return points, best_card
+
+    def solve_boundary(self, hands, trump: int, tricks_left: int):
+        """
+        Stellung am Stichanfang lösen.
+
+        Args:
+            hands: 4 Bitmasken relativ zum Spieler am Zug
+            trump: Trumpf-Modus
+            tricks_left: Anzahl verbleibender Stiche
+
+        Returns:
+            (Punkte des Teams am Zug, beste Karte)
+        """
+        key, colour_map = canonical_key(hands, trump)
+
+        value = self._cache.get(key)
+        if value is None:
+            value = self._lookup_file(key)
+            if value is not None:
+                self.nr_file_hits += 1
+        if value is None:
+            self.nr_solved += 1
+            team0, card = self._trick_value(list(hands), [], 0, trump, tricks_left)
+            value = team0 | (_map_card(card, colour_map) << 8)
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[key] = value
+            return team0, card
+
+        return value & 0xFF, _unmap_card(value >> 8, colour_map)
+
+    # ------------------------------------------------------------
+    # interne Suche
+    # ------------------------------------------------------------
+    def _lookup_file(self, key: int):
+        if self._keys is None or self._keys.shape[0] == 0:
+            return None
+        key = np.uint64(key)
+        idx = int(np.searchsorted(self._keys, key))
+        if idx < self._keys.shape[0] and self._keys[idx] == key:
+            return int(self._values[idx])
+        return None
+
+    def _trick_value(self, hands, trick, first: int, trump: int, tricks_left: int):
+        """
+        Minimax über den laufenden Stich (Spieler absolut, Team 0 = Spieler 0 und 2).
+
+        Returns:
+            (Punkte von Team 0 in den restlichen Stichen inkl. laufendem Stich, beste Karte)
+        """
+        n = len(trick)
+        if n == 4:
+            strength = STRENGTH[trump][color_of_card[trick[0]]]
+            best_pos = 0
+            for pos in range(1, 4):
+                if strength[trick[pos]] > strength[trick[best_pos]]:
+                    best_pos = pos
+            winner = (first - best_pos) % 4
+            points_table = CARD_POINTS[trump]
+            points = points_table[trick[0]] + points_table[trick[1]] + points_table[trick[2]] + points_table[trick[3]]
+            if tricks_left == 1:
+                points += 5
+                return (points if winner % 2 == 0 else 0), -1
+
+            if tricks_left == 2:
+                # letzter Stich: jeder hat nur noch eine Karte, keine Wahl mehr
+                own = points if winner % 2 == 0 else 0
+                return own + _last_trick_team0(hands, winner, trump), -1
+
+            rotated = [hands[(r + winner) % 4] for r in range(4)]
+            sub, _ = self.solve_boundary(rotated, trump, tricks_left - 1)
+            if winner % 2 == 0:
+                return points + sub, -1
+            rest = hand_points(hands, trump) + 5
+            return rest - sub, -1
+
+        player = (first - n) % 4
+        valid = valid_card_bits(hands[player], trick, trump)
+        if valid & (valid - 1):
+            # gleichwertige Karten nur einmal durchrechnen (card_equivalence)
+            alive = hands[0] | hands[1] | hands[2] | hands[3]
+            for card in trick:
+                alive |= CARD_BITS[card]
+            valid = reduce_card_bits(valid, alive, trump)
+        maximize = (player % 2 == 0)
+
+        best_value = -1 if maximize else 1 << 16
+        best_card = -1
+        hand = hands[player]
+        for card in _iter_bits(valid):
+            hands[player] = hand & ~CARD_BITS[card]
+            trick.append(card)
+            value, _ = self._trick_value(hands, trick, first, trump, tricks_left)
+            trick.pop()
+            if (maximize and value > best_value) or (not maximize and value < best_value):
+                best_value = value
+                best_card = card
+        hands[player] = hand
+        return best_value, best_card
+
+    def cache_items(self):
+        """
+        Alle (Schlüssel, Wert)-Paare aus dem In-Memory-Cache.
+        """
+        return self._cache.items()
+
+
+# ---------------------------------------------------------
+# Binärformat
+# ---------------------------------------------------------
+
+def write_tablebase(path: str, keys: np.ndarray, values: np.ndarray, max_tricks: int) -> None:
+    """
+    Schreibt die Tablebase: 32 Byte Header, dann sortierte uint64-Schlüssel
+    und die zugehörigen uint16-Werte.
+    """
+    order = np.argsort(keys, kind='stable')
+    keys = np.ascontiguousarray(keys[order], dtype='<u8')
+    values = np.ascontiguousarray(values[order], dtype='<u2')
+
+    header = bytearray(TB_HEADER_SIZE)
+    header[0:4] = TB_MAGIC
+    header[4:8] = np.uint32(TB_VERSION).tobytes()
+    header[8:12] = np.uint32(max_tricks).tobytes()
+    header[16:24] = np.uint64(keys.shape[0]).tobytes()
+
+    with open(path, 'wb') as f:
+        f.write(bytes(header))
+        f.write(keys.tobytes())
+        f.write(values.tobytes())
+
+
+def load_tablebase(path: str):
+    """
+    Blendet eine Tablebase-Datei per np.memmap ein.
+
+    Returns:
+        (keys, values) als read-only memmaps
+    """
+    with open(path, 'rb') as f:
+        header = f.read(TB_HEADER_SIZE)
+    if header[0:4] != TB_MAGIC:
+        raise ValueError(f'Keine Endspiel-Tablebase: {path}')
+    version = int(np.frombuffer(header[4:8], dtype='<u4')[0])
+    if version != TB_VERSION:
+        raise ValueError(f'Unbekannte Tablebase-Version {version}: {path}')
+    count = int(np.frombuffer(header[16:24], dtype='<u8')[0])
+    if count == 0:
+        return np.zeros(0, dtype='<u8'), np.zeros(0, dtype='<u2')
+
+    keys = np.memmap(path, dtype='<u8', mode='r', offset=TB_HEADER_SIZE, shape=(count,))
+    values = np.memmap(path, dtype='<u2', mode='r', offset=TB_HEADER_SIZE + 8 * count, shape=(count,))
+    return keys, values
+
+
+# ---------------------------------------------------------
+# Offline-Generator
+# ---------------------------------------------------------
+
+def _random_endgame(rng: np.random.Generator, tricks_left: int):
+    """
+    Zufälliges Spiel bis zum Beginn der letzten tricks_left Stiche spielen.
+
+    Returns:
+        (hands relativ zum Spieler am Zug, trump)
+    """
+    hands_one_hot = deal_random_hand()
+    hands = hands_to_bits(hands_one_hot)
+    trump = int(rng.integers(0, 6))
+    leader = int(rng.integers(0, 4))
+
+    for _ in range(9 - tricks_left):
+        trick = []
+        player = leader
+        for _ in range(4):
+            valid = list(_iter_bits(valid_card_bits(hands[player], trick, trump)))
+            card = valid[int(rng.integers(0, len(valid)))]
+            hands[player] &= ~CARD_BITS[card]
+            trick.append(card)
+            player = next_player[player]
+        strength = STRENGTH[trump][color_of_card[trick[0]]]
+        best_pos = max(range(4), key=lambda pos: strength[trick[pos]])
+        leader = (leader - best_pos) % 4
+
+    return [hands[(r + leader) % 4] for r in range(4)], trump
+
+
+def build_tablebase(path: str, max_tricks: int = TB_MAX_TRICKS, nr_positions: int = 100000,
+                    seed: int = 0) -> int:
+    """
+    Erzeugt eine Tablebase aus nr_positions gesampelten Endspielen mit
+    max_tricks Stichen. Alle dabei gelösten Teilstellungen (weniger Stiche)
+    werden mitgespeichert.
+
+    Returns:
+        Anzahl Einträge in der Datei
+    """
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    tb = EndgameTablebase(path=None, max_tricks=max_tricks, cache_size=1 << 62)
+
+    start = time.time()
+    for i in range(nr_positions):
+        hands, trump = _random_endgame(rng, max_tricks)
+        tb.solve_boundary(hands, trump, max_tricks)
+        if (i + 1) % 10000 == 0:
+            print(f'{i + 1}/{nr_positions} Stellungen, {len(tb._cache)} Einträge, '
+                  f'{time.time() - start:.1f}s')
+
+    items = list(tb.cache_items())
+    keys = np.array([k for k, _ in items], dtype=np.uint64)
+    values = np.array([v for _, v in items], dtype=np.uint16)
+    write_tablebase(path, keys, values, max_tricks)
+    return keys.shape[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Endspiel-Tablebase erzeugen')
+    parser.add_argument('--out', default=DEFAULT_TB_FILE)
+    parser.add_argument('--tricks', type=int, default=TB_MAX_TRICKS)
+    parser.add_argument('--positions', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.time()
+    count = build_tablebase(args.out, args.tricks, args.positions, args.seed)
+    size = os.path.getsize(args.out)
+    print(f'Gespeichert: {args.out} ({count} Einträge, {size / 1e6:.1f} MB, {time.time() - start:.1f}s)')
+
+
+if __name__ == '__main__':
+    main()
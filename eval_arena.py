@@ -0,0 +1,109 @@
+# eval_arena.py
+#
+# Evaluation zwischen unseren Agenten mit Ablage jedes einzelnen Spiels.
+#
+# Die Test-Skripte geben nur die Punktesumme am Ende aus. Hier wird jedes fertige
+# Spiel sofort an einen spaltenweisen Resultat-Ordner angehängt (arena_results.py):
+# Seed, Sitzplätze, Trumpf, Punkte und Rechenzeit jedes Kartenzugs. Ein Abbruch
+# verliert höchstens die laufenden Blöcke.
+#
+# - Sitzplätze wie in selfplay.py (complex, mc, random)
+# - Spiele laufen blockweise in einem Prozess-Pool; der Hauptprozess schreibt
+# - Die Karten eines Spiels hängen nur von (Master-Seed, Spielnummer) ab, der Geber
+#   ist Spielnummer % 4. Weitere Läufe im selben Ordner hängen neue Spielnummern an.
+#
+# Aufruf:
+#   python eval_arena.py --games 10000 --agents complex random complex random
+#   python eval_arena.py --games 10000 --agents random complex random complex   # Sitze getauscht
+#   python arena_results.py                                                     # Auswertung
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+from jass.game.rule_schieber import RuleSchieber
+
+from arena_results import DEFAULT_RESULTS_DIR, ResultWriter, summarize
+from seeding import new_master_seed
+from selfplay import AGENT_NAMES, make_agent, play_game
+
+# spawn_key-Präfix für die Evaluation (Farm: 1 << 32)
+ARENA_KEY = 2 << 32
+
+
+def move_ms_per_seat(move_seconds: np.ndarray, trick_first_player: np.ndarray) -> np.ndarray:
+    """
+    Rechenzeiten der 36 Kartenzüge (Spielreihenfolge) nach Sitzplatz (4, 9) in ms.
+    """
+    move_ms = np.zeros((4, 9), dtype=np.float32)
+    for move in range(36):
+        trick, pos = divmod(move, 4)
+        move_ms[(int(trick_first_player[trick]) - pos) % 4, trick] = move_seconds[move] * 1e3
+    return move_ms
+
+
+def play_block(first_game: int, nr_games: int, agent_names: list, master_seed: int) -> list:
+    """
+    Einstiegspunkt für den Prozess-Pool: spielt die Spiele first_game.. und gibt
+    pro Spiel die Spalten für ResultWriter.append zurück (ohne seats).
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(entropy=master_seed, spawn_key=(ARENA_KEY, first_game, 0)))
+    agents = [make_agent(name, master_seed, seat, rng) for seat, name in enumerate(agent_names)]
+    sim = GameSim(rule=RuleSchieber())
+    move_seconds = np.zeros(36)
+
+    rows = []
+    for game in range(first_game, first_game + nr_games):
+        game_rng = np.random.default_rng(np.random.SeedSequence(entropy=master_seed, spawn_key=(ARENA_KEY, game)))
+        seed = int(game_rng.integers(1 << 32))
+        np.random.seed(seed)
+        record = play_game(sim, agents, deal_random_hand(), dealer=game % 4, move_seconds=move_seconds)
+        rows.append(dict(game=game, seed=seed, dealer=record["dealer"], trump=record["trump"],
+                         declarer=record["declarer"], pushed=record["pushed"], points=record["points"],
+                         move_ms=move_ms_per_seat(move_seconds, record["trick_first_player"])))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agenten gegeneinander spielen und jedes Spiel ablegen")
+    parser.add_argument("--out", default=DEFAULT_RESULTS_DIR, help="Resultat-Ordner")
+    parser.add_argument("--games", type=int, default=1000, help="Anzahl Spiele dieses Laufs")
+    parser.add_argument("--agents", nargs=4, default=["complex", "random", "complex", "random"],
+                        choices=AGENT_NAMES, help="Agent pro Sitzplatz 0..3")
+    parser.add_argument("--games-per-block", type=int, default=20, help="Spiele pro Job im Prozess-Pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=None, help="Master-Seed eines neuen Ordners (Standard: zufällig)")
+    args = parser.parse_args()
+
+    writer = ResultWriter(args.out, new_master_seed() if args.seed is None else args.seed)
+    master_seed = writer.master_seed
+    seats = [writer.agent_code(name) for name in args.agents]
+    first_game = writer.reserve_games(args.games)
+    print(f"{args.out}: {writer.nr_rows} Spiele vorhanden, spiele {args.games} ({' '.join(args.agents)}, "
+          f"Seed {master_seed}, {args.workers} Prozesse)")
+
+    start = time.perf_counter()
+    nr_games = 0
+    blocks = range(first_game, first_game + args.games, args.games_per_block)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        jobs = [pool.submit(play_block, first, min(args.games_per_block, first_game + args.games - first),
+                            args.agents, master_seed) for first in blocks]
+        for job in as_completed(jobs):
+            for row in job.result():
+                writer.append(seats=seats, **row)
+            nr_games += len(job.result())
+            elapsed = time.perf_counter() - start
+            print(f"{nr_games}/{args.games} Spiele, {nr_games / elapsed * 3600:.0f} Spiele/h")
+    writer.close()
+
+    summary, manifest = summarize(args.out)
+    summary.print(manifest["agents"])
+
+
+if __name__ == "__main__":
+    main()
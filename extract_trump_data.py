@@ -3,24 +3,36 @@
 # Extrahiert Trumpf-Trainingsdaten aus den Swisslos-Logs
 # jass_game_000x.txt
 #
-# Output: Data/trump_train_sw.npz mit X (N x 36), y (N)
+# Output: Data/trump_train_sw.npz mit X (N x 36), y (N), X_forehand (N x 36), pushed (N)
+#         Data/trump_shards/shard_*.npz (gepackte Hände, für train_trump_model.py)
+#
+# Pro Spiel zwei Beispiele: Trumpf (Hand des Ansagers → Trumpf, bei geschobenen
+# Spielen also die Wahl des Partners) und Schieben (Hand der Vorhand → geschoben ja/nein).
 
 import json
 import glob
+import os
 import numpy as np
 
-from jass.game.const import card_strings
-
-# Mapping Kartenstring -> Index 0..35
-CARD_INDEX = {s: i for i, s in enumerate(card_strings)}
+from jass.game.const import next_player
+from jass.game.game_state import GameState
+from jass.game.game_state_util import calculate_starting_hands_from_game
+from trump_data import DEFAULT_SHARD_DIR, list_shards, pack_hands, write_shards
 
 
 def game_to_example(line: str):
     """
-    Nimmt eine JSON-Zeile (ein Spiel) und liefert (x, y):
-      x: 36-dim One-Hot-Hand des Trumpfspielers
+    Nimmt eine JSON-Zeile (ein Spiel) und liefert (x, y, x_forehand, pushed):
+      x: 36-dim One-Hot-Hand des Spielers, der den Trumpf angesagt hat
+         (Vorhand oder, nach dem Schieben, ihr Partner)
       y: trump (int)
+      x_forehand: 36-dim One-Hot-Hand der Vorhand
+      pushed: 1, wenn die Vorhand geschoben hat, sonst 0
     oder None, wenn etwas nicht passt.
+
+    Im Log ist "forehand" kein Spieler, sondern ein Flag (1 = Vorhand hat
+    angesagt, 0 = geschoben); die Vorhand ist next_player[dealer]. Die Hände
+    werden wie in jass-kit rekonstruiert (Spielreihenfolge next_player).
     """
     try:
         entry = json.loads(line)
@@ -31,47 +43,27 @@ def game_to_example(line: str):
         return None
 
     game = entry["game"]
-
-    # Trumpf-Label
-    if "trump" not in game:
+    if "trump" not in game or len(game.get("tricks", [])) != 9:
         return None
-    trump = int(game["trump"])  # 0..5
-
-    dealer = int(game.get("dealer", 0))
-    forehand = int(game.get("forehand", (dealer + 1) % 4))
-    tricks = game.get("tricks", [])
-
-    # Hände rekonstruieren: jede gespielte Karte gehört zum Spieler,
-    # der an dieser Stelle in der Stichreihenfolge ist.
-    hands = {0: [], 1: [], 2: [], 3: []}
-
-    for trick in tricks:
-        cards = trick.get("cards", [])
-        first = int(trick.get("first", 0))
-        if len(cards) != 4:
-            return None
-
-        for i, card_str in enumerate(cards):
-            player = (first + i) % 4
-            hands[player].append(card_str)
-
-    # Jede Hand sollte 9 Karten haben
-    if any(len(hands[p]) != 9 for p in range(4)):
+    if any(len(trick.get("cards", [])) != 4 for trick in game["tricks"]):
         return None
 
-    trump_player = forehand
-    hand_cards = hands[trump_player]
+    try:
+        state = GameState.from_json(game)
+    except (KeyError, ValueError, TypeError):
+        return None
+    if state is None:
+        return None
 
-    # 36-dim One-Hot
-    x = np.zeros(36, dtype=np.int8)
-    for cs in hand_cards:
-        idx = CARD_INDEX.get(cs)
-        if idx is None:
-            return None
-        x[idx] = 1
+    hands = calculate_starting_hands_from_game(state)
+    if not np.all(hands.sum(axis=1) == 9) or not (0 <= state.trump <= 5):
+        return None
 
-    y = trump
-    return x, y
+    forehand_player = next_player[state.dealer]
+    x = hands[state.declared_trump].astype(np.int8)
+    x_forehand = hands[forehand_player].astype(np.int8)
+    pushed = int(state.forehand == 0)
+    return x, int(state.trump), x_forehand, pushed
 
 
 def main():
@@ -85,6 +77,8 @@ def main():
 
     X_list = []
     Y_list = []
+    X_fh_list = []
+    pushed_list = []
 
     for path in files:
         print(f"Verarbeite: {path}")
@@ -96,9 +90,11 @@ def main():
                 result = game_to_example(line)
                 if result is None:
                     continue
-                x, y = result
+                x, y, x_forehand, pushed = result
                 X_list.append(x)
                 Y_list.append(y)
+                X_fh_list.append(x_forehand)
+                pushed_list.append(pushed)
 
     if not X_list:
         print("Keine Beispiele extrahiert.")
@@ -106,15 +102,25 @@ def main():
 
     X = np.stack(X_list, axis=0)
     y = np.array(Y_list, dtype=np.int8)
+    X_forehand = np.stack(X_fh_list, axis=0)
+    pushed = np.array(pushed_list, dtype=np.int8)
 
     print("Gesammelte Beispiele:", X.shape[0])
+    print(f"Davon geschoben: {int(pushed.sum())} ({pushed.mean():.1%})")
     print("Feature-Dimension:", X.shape[1])
 
     # Speichern als .npz
     out_path = "Data/trump_train_sw.npz"
-    np.savez(out_path, X=X, y=y)
+    np.savez(out_path, X=X, y=y, X_forehand=X_forehand, pushed=pushed)
     print(f"Gespeichert nach: {out_path}")
 
+    # Shards für das Streaming-Training neu schreiben
+    for old_shard in list_shards(DEFAULT_SHARD_DIR):
+        os.remove(old_shard)
+    paths = write_shards(DEFAULT_SHARD_DIR, pack_hands(X), y,
+                         fh_hands=pack_hands(X_forehand), pushed=pushed)
+    print(f"{len(paths)} Shards gespeichert nach: {DEFAULT_SHARD_DIR}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+# game_history.py
+#
+# Kompakte Historie eines Spiels für die Agenten.
+#
+# Statt bei jedem Zug (oder jeder Iteration der Suche) obs.tricks,
+# obs.trick_first_player und obs.current_trick als NumPy-Arrays in Python-Schleifen
+# neu zu durchsuchen, wird die Historie einmal pro neuer Observation um die neu
+# gespielten Karten ergänzt. Danach sind alle Abfragen Tabellenzugriffe:
+#
+#   card_player[card]      wer die Karte gespielt hat (-1 = noch nicht gespielt)
+#   played[player]         gespielte Karten des Spielers (Maske 36)
+#   nr_played[player]      Anzahl gespielter Karten
+#   voids[player, colour]  Spieler hat die Farbe nicht angegeben
+#   excluded[player]       Karten, die der Spieler sicher nicht mehr hat
+#   points[team]           Punkte aus abgeschlossenen Stichen (inkl. letzter Stich +5)
+#
+# Alle Arrays haben eine feste Grösse und werden nie neu angelegt.
+
+import numpy as np
+
+from jass.game.const import color_of_card, J_offset
+
+
+class GameHistory:
+    """
+    Historie eines Spiels, inkrementell aus Observations (oder GameStates) nachgeführt.
+    """
+
+    __slots__ = ('card_player', 'played', 'nr_played', 'voids', 'excluded', 'points', 'nr_cards')
+
+    def __init__(self):
+        self.card_player = np.full(36, -1, dtype=np.int8)
+        self.played = np.zeros((4, 36), dtype=bool)
+        self.nr_played = np.zeros(4, dtype=np.int32)
+        self.voids = np.zeros((4, 4), dtype=bool)
+        self.excluded = np.zeros((4, 36), dtype=bool)
+        self.points = np.zeros(2, dtype=np.int32)
+        self.nr_cards = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.card_player.nbytes + self.played.nbytes + self.nr_played.nbytes + \
+            self.voids.nbytes + self.excluded.nbytes + self.points.nbytes
+
+    def reset(self) -> None:
+        self.card_player.fill(-1)
+        self.played.fill(False)
+        self.nr_played.fill(0)
+        self.voids.fill(False)
+        self.excluded.fill(False)
+        self.points.fill(0)
+        self.nr_cards = 0
+
+    def update(self, obs) -> None:
+        """
+        Karten, die seit dem letzten Aufruf gespielt wurden, übernehmen.
+        Ist die Observation älter als die Historie (anderes Spiel), wird neu aufgebaut.
+        """
+        nr_played_cards = int(obs.nr_played_cards)
+        if nr_played_cards < self.nr_cards:
+            self.reset()
+
+        trump = int(obs.trump)
+        for i in range(self.nr_cards, nr_played_cards):
+            t, pos = divmod(i, 4)
+            card = int(obs.tricks[t, pos])
+            player = (int(obs.trick_first_player[t]) - pos) % 4
+            self.card_player[card] = player
+            self.played[player, card] = True
+            self.nr_played[player] += 1
+            if pos > 0:
+                self._check_follow(player, int(obs.tricks[t, 0]), card, trump)
+            if pos == 3:
+                self.points[int(obs.trick_winner[t]) % 2] += int(obs.trick_points[t])
+        self.nr_cards = nr_played_cards
+
+    def _check_follow(self, player: int, lead: int, card: int, trump: int) -> None:
+        """
+        Farbe nicht angegeben (und nicht getrumpft) → der Spieler hat keine Karte der
+        Anfangsfarbe mehr (bei Trumpf-Anspiel bis auf den Bauer, den man nie angeben muss).
+        """
+        lead_colour = color_of_card[lead]
+        colour = color_of_card[card]
+        if colour == lead_colour or colour == trump:
+            return
+        self.voids[player, lead_colour] = True
+        self.excluded[player, lead_colour * 9:lead_colour * 9 + 9] = True
+        if lead_colour == trump:
+            self.excluded[player, trump * 9 + J_offset] = False
+
+    def unknown_cards(self, hand: np.ndarray) -> np.ndarray:
+        """
+        Karten, die weder gespielt noch in der eigenen Hand sind.
+        """
+        return np.flatnonzero((self.card_player < 0) & (np.asarray(hand) == 0))
+
+    def hand_sizes(self, player: int, hand: np.ndarray) -> np.ndarray:
+        """
+        Anzahl Karten pro Spieler (4,); die eigene Hand ist bekannt.
+        """
+        sizes = 9 - self.nr_played
+        sizes[player] = int(np.sum(hand))
+        return sizes
@@ -0,0 +1,219 @@
+# game_session.py
+#
+# Zustand pro Spiel für den Service (und jeden anderen langlebigen Agenten).
+#
+# Der PlayerService ruft action_play_card für jedes Spiel Zug um Zug auf. Statt
+# bei jedem Zug alles aus der Observation neu zu berechnen, hält eine GameSession
+# die Daten, die von Zug zu Zug wachsen:
+#   - die Historie des Spiels (game_history.py): wer welche Karte gespielt hat,
+#     Karten, die ein Spieler sicher nicht mehr hat (nicht Farbe angegeben)
+#   - das Such-Konto des adaptiven Suchaufwands (MyAgentcomplex)
+#   - optional den Suchbaum (node_pool.NodePool), dessen Teilbaum beim nächsten Zug
+#     weiterverwendet wird
+# Pro Zug werden nur die seit dem letzten Zug neu gespielten Karten verarbeitet,
+# daraus entstehen einmal pro Zug die Vorgaben für die Determinizations
+# (unbekannte Karten, Anzahl Karten pro Gegner).
+#
+# Bis auf Such-Konto und Suchbaum lässt sich alles in einer Session aus der Observation
+# neu aufbauen: fehlt die Session (neu, abgelaufen, verdrängt), wird sie aus der
+# ganzen Historie erstellt und die Determinizations bleiben gleich. Das Konto
+# beginnt dann wieder bei 0 (das Replay nimmt das Budget ohnehin aus dem Log).
+#
+# Der SessionStore hält die Sessions nach Spiel (seeding.game_key), verdrängt die
+# am längsten nicht benutzte, sobald das Speicherlimit erreicht ist, und löscht
+# Sessions, die länger als idle_timeout nicht benutzt wurden.
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+from game_history import GameHistory
+from seeding import game_key
+
+# Speicher einer Session ohne Arrays (Objekt, Attribute, Eintrag im Store), grob geschätzt
+SESSION_OVERHEAD_BYTES = 1024
+
+
+class GameSession:
+    """
+    Daten eines Spiels aus Sicht eines Spielers.
+
+    Attributes:
+        key: game_key des Spiels
+        last_used: Zeitpunkt der letzten Verwendung (clock des Stores)
+        search_bank: Such-Konto (eingesparte Iterationen) für die restlichen Züge
+        history: GameHistory (wer was gespielt hat, Farben nicht angegeben, Punkte)
+        unknown_cards: unbekannte Karten beim aktuellen Zug (weder gespielt noch eigene Hand)
+        hidden_counts: Anzahl Karten pro Spieler beim aktuellen Zug (4,)
+        search_tree: NodePool der Baumsuche (ISMCTS) oder None
+        stored_bytes: vom SessionStore verbuchter Speicher (nbytes beim letzten get)
+    """
+
+    __slots__ = ('key', 'last_used', 'search_bank', 'history', 'unknown_cards', 'hidden_counts', 'search_tree',
+                 'stored_bytes')
+
+    def __init__(self, key: int, now: float = 0.0):
+        self.key = key
+        self.last_used = now
+        self.search_bank = 0
+        self.history = GameHistory()
+        self.unknown_cards = np.zeros(0, dtype=np.int64)
+        self.hidden_counts = np.zeros(4, dtype=np.int32)
+        self.search_tree = None
+        self.stored_bytes = 0
+
+    @property
+    def excluded(self) -> np.ndarray:
+        """
+        Karten, die ein Spieler sicher nicht hat (4, 36).
+        """
+        return self.history.excluded
+
+    def nbytes(self) -> int:
+        """
+        Geschätzter Speicher der Session.
+        """
+        nbytes = SESSION_OVERHEAD_BYTES + self.history.nbytes + self.unknown_cards.nbytes + self.hidden_counts.nbytes
+        if self.search_tree is not None:
+            nbytes += self.search_tree.nbytes
+        return nbytes
+
+    def update(self, obs) -> None:
+        """
+        Neu gespielte Karten seit dem letzten Zug übernehmen und die Vorgaben
+        für die Determinizations dieses Zuges berechnen.
+        """
+        self.history.update(obs)
+        self.unknown_cards = self.history.unknown_cards(obs.hand)
+        self.hidden_counts = self.history.hand_sizes(obs.player, obs.hand)
+
+    def sample_hidden_hands(self, obs, rng: np.random.Generator) -> np.ndarray:
+        """
+        Determinization mit den Vorgaben des aktuellen Zuges (nach update): die
+        unbekannten Karten werden gleichverteilt auf die anderen Spieler verteilt.
+        Schnittstelle des Samplers der MCTS (search_engine).
+
+        Returns:
+            hands: (4, 36) one-hot, inkl. eigener Hand
+        """
+        hands = np.zeros((4, 36), dtype=np.int32)
+        me = obs.player
+        hands[me, :] = obs.hand
+
+        cards = rng.permutation(self.unknown_cards)
+        idx = 0
+        for p in range(4):
+            if p == me:
+                continue
+            need = int(self.hidden_counts[p])
+            hands[p, cards[idx:idx + need]] = 1
+            idx += need
+        return hands
+
+
+class SessionStore:
+    """
+    Sessions pro Spiel mit Leerlauf-Timeout und Speicherlimit (LRU-Verdrängung).
+    Thread-sicher (der Service bearbeitet mehrere Tische gleichzeitig).
+
+    Verbucht wird der Speicher einer Session bei jedem get (stored_bytes); einen
+    Suchbaum hängt der Agent mit attach_search_tree an, damit er sofort zählt.
+
+    Args:
+        idle_timeout: Sekunden ohne Zug, nach denen eine Session gelöscht wird
+        max_bytes: Speicherlimit über alle Sessions
+        clock: Zeitquelle (Standard time.monotonic)
+    """
+
+    def __init__(self, idle_timeout: float = 600.0, max_bytes: int = 64 * 1024 * 1024, clock=time.monotonic):
+        self._idle_timeout = idle_timeout
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._sessions = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Statistik
+        self.nr_hits = 0
+        self.nr_misses = 0
+        self.nr_expired = 0
+        self.nr_evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, obs) -> GameSession:
+        """
+        Session des Spiels (neu, falls nicht vorhanden), aktualisiert auf die Observation.
+        """
+        key = game_key(obs)
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            session = self._sessions.pop(key, None)
+            if session is None:
+                self.nr_misses += 1
+                session = GameSession(key, now)
+            else:
+                self.nr_hits += 1
+                self._bytes -= session.stored_bytes
+            session.update(obs)
+            session.last_used = now
+            self._sessions[key] = session
+            session.stored_bytes = session.nbytes()
+            self._bytes += session.stored_bytes
+            self._evict()
+            return session
+
+    def attach_search_tree(self, session: GameSession, tree) -> None:
+        """
+        Suchbaum (NodePool) an die Session hängen und den Speicher sofort verbuchen
+        (verdrängt nötigenfalls ältere Sessions).
+        """
+        with self._lock:
+            session.search_tree = tree
+            if self._sessions.get(session.key) is not session:
+                return
+            nbytes = session.nbytes()
+            self._bytes += nbytes - session.stored_bytes
+            session.stored_bytes = nbytes
+            self._evict()
+
+    def discard(self, key: int) -> None:
+        """
+        Session löschen (z.B. nach dem letzten Zug des Spiels).
+        """
+        with self._lock:
+            session = self._sessions.pop(key, None)
+            if session is not None:
+                self._bytes -= session.stored_bytes
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "hits": self.nr_hits,
+                "misses": self.nr_misses,
+                "expired": self.nr_expired,
+                "evicted": self.nr_evicted,
+            }
+
+    def _expire(self, now: float) -> None:
+        # älteste Session zuerst (Reihenfolge = letzte Verwendung)
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self._idle_timeout:
+                break
+            self._sessions.popitem(last=False)
+            self._bytes -= session.stored_bytes
+            self.nr_expired += 1
+
+    def _evict(self) -> None:
+        # die zuletzt benutzte Session bleibt immer erhalten
+        while self._bytes > self._max_bytes and len(self._sessions) > 1:
+            _, session = self._sessions.popitem(last=False)
+            self._bytes -= session.stored_bytes
+            self.nr_evicted += 1
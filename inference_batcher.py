@@ -0,0 +1,155 @@
+# inference_batcher.py
+#
+# Batching-Schicht vor der Modell-Auswertung im Service.
+#
+# Viele gleichzeitige Tische (Threads des Flask-Servers) rufen das Modell mit je
+# einer Hand auf. Statt pro Anfrage einen eigenen Forward-Pass zu rechnen, sammelt
+# ein Hintergrund-Thread die Anfragen, bis max_batch_size erreicht oder die älteste
+# Anfrage max_latency alt ist, rechnet einen vektorisierten Forward-Pass und
+# verteilt die Zeilen des Resultats zurück an die wartenden Futures.
+#
+# Das Modell ist eine beliebige Funktion predict_fn(X (B, ...)) → Array (B, ...)
+# oder Tupel von Arrays mit B Zeilen (z.B. FusedTrumpModel.predict).
+
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# so viele Wartezeiten werden für die Perzentile behalten
+WAIT_WINDOW = 10000
+
+
+class InferenceBatcher:
+    """
+    Sammelt Einzel-Anfragen aus mehreren Threads zu Batches.
+
+    Args:
+        predict_fn: vektorisierte Modell-Funktion
+        max_batch_size: maximale Anzahl Anfragen pro Forward-Pass
+        max_latency: maximale zusätzliche Wartezeit einer Anfrage in Sekunden
+        name: Name des Hintergrund-Threads (für Logs/Metriken)
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 32, max_latency: float = 0.002, name: str = "inference"):
+        self._predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+
+        # Metriken
+        self._nr_requests = 0
+        self._nr_batches = 0
+        self._nr_errors = 0
+        self._forward_time = 0.0
+        self._wait_sum = 0.0
+        self._waits = collections.deque(maxlen=WAIT_WINDOW)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, x) -> Future:
+        """
+        Eine Anfrage (eine Zeile, ohne Batch-Dimension) einreihen.
+        """
+        future = Future()
+        self._queue.put((np.asarray(x), future, time.perf_counter()))
+        return future
+
+    def predict(self, x):
+        """
+        Blockierend: Resultat für eine Zeile (Array bzw. Tupel von Zeilen).
+        """
+        return self.submit(x).result()
+
+    def close(self) -> None:
+        """
+        Hintergrund-Thread beenden (bereits eingereihte Anfragen werden noch bearbeitet).
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    # ---------------------------------------------------------
+    # Hintergrund-Thread
+    # ---------------------------------------------------------
+    def _run(self) -> None:
+        closing = False
+        while not closing:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = item[2] + self.max_latency
+
+            # bis zur Deadline auf weitere Anfragen warten ...
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+
+            self._evaluate(batch)
+
+    def _evaluate(self, batch: list) -> None:
+        start = time.perf_counter()
+        X = np.stack([x for x, _, _ in batch])
+        try:
+            out = self._predict_fn(X)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            with self._lock:
+                self._nr_errors += 1
+            return
+        forward_time = time.perf_counter() - start
+
+        for i, (_, future, _) in enumerate(batch):
+            future.set_result(tuple(o[i] for o in out) if isinstance(out, tuple) else out[i])
+
+        with self._lock:
+            self._nr_requests += len(batch)
+            self._nr_batches += 1
+            self._forward_time += forward_time
+            for _, _, enqueued in batch:
+                self._waits.append(start - enqueued)
+                self._wait_sum += start - enqueued
+
+    # ---------------------------------------------------------
+    # Metriken
+    # ---------------------------------------------------------
+    def metrics(self) -> dict:
+        """
+        Durchsatz und Wartezeiten seit dem Start.
+        """
+        with self._lock:
+            uptime = time.perf_counter() - self._start_time
+            waits = np.array(self._waits) if self._waits else np.zeros(1)
+            n = max(self._nr_requests, 1)
+            return dict(
+                name=self.name,
+                max_batch_size=self.max_batch_size,
+                max_latency_ms=self.max_latency * 1e3,
+                requests=self._nr_requests,
+                batches=self._nr_batches,
+                errors=self._nr_errors,
+                queue_length=self._queue.qsize(),
+                mean_batch_size=self._nr_requests / max(self._nr_batches, 1),
+                requests_per_second=self._nr_requests / max(uptime, 1e-9),
+                forward_requests_per_second=self._nr_requests / max(self._forward_time, 1e-9),
+                mean_forward_ms=self._forward_time / max(self._nr_batches, 1) * 1e3,
+                mean_queue_wait_ms=self._wait_sum / n * 1e3,
+                p95_queue_wait_ms=float(np.percentile(waits, 95)) * 1e3,
+                max_queue_wait_ms=float(waits.max()) * 1e3,
+            )
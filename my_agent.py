@@ -3,10 +3,12 @@ import numpy as np
 import joblib
 
 from jass.game.const import *
-from jass.game.rule_schieber import RuleSchieber
 from jass.game.game_util import convert_one_hot_encoded_cards_to_int_encoded_list
 from jass.agents.agent import Agent
 
+from rule_kernel import RuleKernel
+from trump_model import decide_trump, load_fused_model, push_allowed
+
 # ---------------------------------------------------------
 # Einfache Bewertungs-Tabellen pro Rang (0..8)
 # Rang 0 = Ass, 1 = König, 2 = Dame, 3 = Bauer, 4 = 10, 5 = 9, 6 = 8, 7 = 7, 8 = 6
@@ -61,13 +63,77 @@ def card_strength(card: int, trump: int) -> int:
         return NO_TRUMP_SCORE[rank]
 
 
+# ---------------------------------------------------------
+# Batch-Auswertung der Heuristik (viele Stellungen gleichzeitig)
+# ---------------------------------------------------------
+
+# CARD_STRENGTH_TABLE[trump, card] = card_strength(card, trump)
+CARD_STRENGTH_TABLE = np.array([[card_strength(card, trump) for card in range(36)] for trump in range(6)],
+                               dtype=np.int64)
+
+# Reihenfolge, in der action_trump die Trümpfe prüft (bei gleicher Bewertung gewinnt der erste)
+_HEURISTIC_TRUMP_ORDER = np.array([CLUBS, SPADES, HEARTS, DIAMONDS, OBE_ABE, UNE_UFE])
+
+# Trümpfe pro Trumpf-Modus (Obe-Abe/Une-Ufe: keine)
+_TRUMP_CARDS = np.array([[trump < 4 and color_of_card[card] == trump for card in range(36)] for trump in range(6)])
+
+
+def heuristic_trump_batch(hands: np.ndarray, push_allowed: np.ndarray) -> np.ndarray:
+    """
+    Heuristische Trumpfwahl (score_hand_for_trump, Schiebe-Schwelle 68) für N Hände,
+    identisch zum Heuristik-Zweig von MyAgent.action_trump.
+
+    Args:
+        hands: (N, 36) One-Hot-Hände
+        push_allowed: (N,) bool, ob geschoben werden darf
+
+    Returns:
+        (N,) Trumpf 0..5 oder PUSH
+    """
+    scores = np.asarray(hands, dtype=np.int64) @ CARD_STRENGTH_TABLE[_HEURISTIC_TRUMP_ORDER].T
+    best = scores.argmax(axis=1)
+    push = np.asarray(push_allowed, dtype=bool) & (scores[np.arange(len(best)), best] < 68)
+    return np.where(push, PUSH, _HEURISTIC_TRUMP_ORDER[best])
+
+
+def heuristic_play_card_batch(valid: np.ndarray, trumps: np.ndarray, cards_left: np.ndarray) -> np.ndarray:
+    """
+    Kartenwahl von MyAgent.action_play_card für N Stellungen in einem Durchgang.
+
+    Frühe Phase (mehr als 5 Karten): schwächste gültige Karte, wenn möglich kein Trumpf;
+    späte Phase: stärkste gültige Karte. Bei gleicher Stärke gewinnt wie in der
+    Schleife die Karte mit dem kleinsten Index.
+
+    Args:
+        valid: (N, 36) gültige Karten
+        trumps: (N,) Trumpf-Modus 0..5
+        cards_left: (N,) Anzahl Karten auf der Hand
+
+    Returns:
+        (N,) gewählte Karte (0, wenn keine Karte gültig ist)
+    """
+    valid = np.asarray(valid, dtype=bool)
+    trumps = np.asarray(trumps, dtype=np.int64)
+    strength = CARD_STRENGTH_TABLE[trumps]
+
+    non_trump = valid & ~_TRUMP_CARDS[trumps]
+    candidates = np.where(non_trump.any(axis=1)[:, None], non_trump, valid)
+    weakest = np.where(candidates, strength, np.iinfo(np.int64).max).argmin(axis=1)
+    strongest = np.where(valid, strength, np.iinfo(np.int64).min).argmax(axis=1)
+
+    cards = np.where(np.asarray(cards_left) > 5, weakest, strongest)
+    return np.where(valid.any(axis=1), cards, 0)
+
+
 class MyAgent(Agent):
     """
     Mein Jass-Agent:
     - Trumpfwahl mit ML-Modell (Multi-Layer-Perceptron aus scikit-learn)
       * Input: Hand als One-Hot-Vektor (1x36)
       * Output: Klasse 0..5 (CLUBS, SPADES, HEARTS, DIAMONDS, OBE_ABE, UNE_UFE)
-      * Wenn Modell unsicher ist und Schieben erlaubt ist → PUSH.
+      * Schieben: eigenes Schiebe-Modell, zusammen mit dem Trumpf-Modell in
+        einem Forward-Pass (trump_model.py), Wahrscheinlichkeiten kalibriert.
+      * Ohne Schiebe-Modell: PUSH, wenn das Trumpf-Modell unsicher ist.
       * Wenn Modell nicht geladen werden kann → einfache Heuristik.
     - Kartenwahl:
       * In der frühen Phase (mehr als 5 Karten): schwache Karte abwerfen,
@@ -77,7 +143,7 @@ class MyAgent(Agent):
 
     def __init__(self):
         super().__init__()
-        self._rule = RuleSchieber()
+        self._rule = RuleKernel()
 
         # Trumpf-ML-Modell laden
         model_path = os.path.join(os.path.dirname(__file__), 'Data', 'trump_model_sw.joblib')
@@ -88,15 +154,35 @@ class MyAgent(Agent):
             print(f"[MyAgent] Konnte Trumpfmodell nicht laden ({model_path}): {e}")
             self._trump_model = None
 
+        # Trumpf- und Schiebe-Modell in einem Forward-Pass (hat Vorrang, falls vorhanden)
+        self._fused_model = load_fused_model()
+
+        # optionaler InferenceBatcher vor dem Fused-Modell (Service mit vielen Tischen)
+        self._trump_batcher = None
+
+    def set_trump_batcher(self, batcher) -> None:
+        """
+        Trumpf-Anfragen über einen InferenceBatcher (inference_batcher.py) rechnen,
+        der das Fused-Modell für mehrere gleichzeitige Spiele bündelt. None → direkt.
+        """
+        self._trump_batcher = batcher
+
     # ---------------------------------------------------------
     # Trumpfwahl
     # ---------------------------------------------------------
     def action_trump(self, obs) -> int:
         """
         Wählt den Trumpf:
-        1. Wenn ML-Modell vorhanden → Modellvorhersage + Unsicherheitscheck.
-        2. Sonst → heuristische Bewertung der Hand.
+        1. Wenn Trumpf/Schiebe-Modell vorhanden → kalibrierte Vorhersage beider Köpfe
+           (über den InferenceBatcher, falls gesetzt).
+        2. Wenn ML-Modell vorhanden → Modellvorhersage + Unsicherheitscheck.
+        3. Sonst → heuristische Bewertung der Hand.
         """
+        if self._trump_batcher is not None:
+            trump_proba, push_proba = self._trump_batcher.predict(np.asarray(obs.hand, dtype=np.float64))
+            return decide_trump(trump_proba, push_proba, obs)
+        if self._fused_model is not None:
+            return self._fused_model.choose_trump(obs)
 
         # Hand als 1x36-Featurevektor
         hand_vec = np.array(obs.hand, dtype=np.float32).reshape(1, -1)
@@ -109,7 +195,7 @@ class MyAgent(Agent):
             best_conf = float(proba[best_class])
 
             # Darf ich schieben?
-            can_push = getattr(obs, "push_allowed", False)
+            can_push = push_allowed(obs)
             CONF_THRESHOLD = 0.30  # falls Modell weniger als 30% sicher ist
 
             if can_push and best_conf < CONF_THRESHOLD:
@@ -132,12 +218,35 @@ class MyAgent(Agent):
 
         # Einfache Push-Logik wie im Notebook
         THRESHOLD = 68
-        can_push = getattr(obs, "push_allowed", False)
+        can_push = push_allowed(obs)
         if can_push and best_score < THRESHOLD:
             return PUSH
 
         return best_trump
 
+    def action_trump_batch(self, hands: np.ndarray, push_allowed: np.ndarray) -> np.ndarray:
+        """
+        action_trump für N Hände auf einmal (gleiche Reihenfolge der Modelle, ohne
+        InferenceBatcher). push_allowed (N,) ist der Wert, den action_trump pro
+        Observation verwendet.
+
+        Returns:
+            (N,) Trumpf 0..5 oder PUSH
+        """
+        hands = np.asarray(hands)
+        push_allowed = np.asarray(push_allowed, dtype=bool)
+        if self._fused_model is not None:
+            trump_proba, push_proba = self._fused_model.predict(hands.astype(np.float64))
+            return np.where(push_allowed & (push_proba > 0.5), PUSH, trump_proba.argmax(axis=1))
+
+        if self._trump_model is not None:
+            proba = self._trump_model.predict_proba(hands.astype(np.float32))
+            best_class = proba.argmax(axis=1)
+            best_conf = proba[np.arange(len(best_class)), best_class]
+            return np.where(push_allowed & (best_conf < 0.30), PUSH, best_class)
+
+        return heuristic_trump_batch(hands, push_allowed)
+
     # ---------------------------------------------------------
     # Kartenwahl
     # ---------------------------------------------------------
@@ -201,3 +310,17 @@ class MyAgent(Agent):
                     best_card = card
 
             return int(best_card)
+
+    def action_play_card_batch(self, hands: np.ndarray, valid: np.ndarray, trumps: np.ndarray) -> np.ndarray:
+        """
+        action_play_card für N Stellungen auf einmal (z.B. geloggte Stellungen).
+
+        Args:
+            hands: (N, 36) Hand des Spielers am Zug
+            valid: (N, 36) gültige Karten (z.B. rule_kernel.valid_cards_batch)
+            trumps: (N,) Trumpf-Modus
+
+        Returns:
+            (N,) gewählte Karte
+        """
+        return heuristic_play_card_batch(valid, trumps, np.asarray(hands).sum(axis=1))
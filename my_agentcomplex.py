@@ -1,20 +1,34 @@
 import os
+import threading
+import time
 import numpy as np
 import joblib
 
 from jass.game.const import *
-from jass.game.rule_schieber import RuleSchieber
 from jass.game.game_util import convert_one_hot_encoded_cards_to_int_encoded_list
-from jass.game.game_sim import GameSim
-from jass.game.game_state_util import state_from_observation
 from jass.agents.agent import Agent
 
+from search_engine import MCTS, ISMCTS, shared_engine
+from node_pool import NodePool, DEFAULT_MAX_NODES, FULL_STOP, FULL_RECYCLE
+from seeding import new_master_seed, move_rng
+from game_session import GameSession, SessionStore
+from opponent_model import OpponentModelSampler
+from rule_kernel import RuleKernel
+from decision_log import KIND_TRUMP, KIND_CARD, AGENT_COMPLEX
+from trump_model import decide_trump, load_fused_model, push_allowed
+
 
 from jass.game.const import *
-from jass.game.rule_schieber import RuleSchieber
 from jass.game.game_util import convert_one_hot_encoded_cards_to_int_encoded_list
 from jass.agents.agent import Agent
 
+# Baumsuche im Entscheidungs-Log (params): full_policy als Index, Weiterverwendung
+# des Teilbaums (aus / an, Zug ohne alten Baum / an, Zug mit altem Baum)
+TREE_POLICIES = [FULL_STOP, FULL_RECYCLE]
+TREE_REUSE_OFF = 0
+TREE_REUSE_FRESH = 1
+TREE_REUSED = 2
+
 # ---------------------------------------------------------
 # Einfache Bewertungs-Tabellen pro Rang (0..8)
 # Rang 0 = Ass, 1 = König, 2 = Dame, 3 = Bauer, 4 = 10, 5 = 9, 6 = 8, 7 = 7, 8 = 6
@@ -75,25 +89,79 @@ class MyAgentcomplex(Agent):
     - Trumpfwahl mit ML-Modell (Multi-Layer-Perceptron aus scikit-learn)
       * Input: Hand als One-Hot-Vektor (1x36)
       * Output: Klasse 0..5 (CLUBS, SPADES, HEARTS, DIAMONDS, OBE_ABE, UNE_UFE)
-      * Wenn Modell unsicher ist und Schieben erlaubt ist → PUSH.
+      * Schieben: eigenes Schiebe-Modell, zusammen mit dem Trumpf-Modell in
+        einem Forward-Pass (trump_model.py), Wahrscheinlichkeiten kalibriert.
+      * Ohne Schiebe-Modell: PUSH, wenn das Trumpf-Modell unsicher ist.
       * Wenn Modell nicht geladen werden kann → einfache Heuristik.
     - Kartenwahl:
       * In der frühen Phase (mehr als 5 Karten): schwache Karte abwerfen,
         möglichst keine Trumpfkarte.
       * In der späten Phase (5 oder weniger Karten): starke Karte spielen.
+    - last_search_stats: nach jedem Kartenzug (N, W) der Root-MCTS pro Karte
+      (W = Summe der Punktdifferenzen), None wenn nicht gesucht wurde. Pro Thread:
+      der Service rechnet mehrere Tische gleichzeitig mit demselben Agenten, der
+      Zustand eines Zuges (RNG, Budget, Statistik) liegt deshalb nicht im Agenten.
     """
 
-    def __init__(self):
+    def __init__(self, seed: int = None, agent_id: int = 0, decision_log=None):
+        """
+        Args:
+            seed: Master-Seed; daraus wird pro Spiel und Zug ein eigener Seed
+                abgeleitet (siehe seeding.py). None → zufälliger Master-Seed.
+            agent_id: unterscheidet mehrere Agenten mit demselben Master-Seed
+            decision_log: optionales DecisionLog, das jeden Zug aufzeichnet
+        """
         super().__init__()
-        self._rule = RuleSchieber()
-        
-        # RNG für MCTS
-        self._rng = np.random.default_rng()
+        self._rule = RuleKernel()
+
+        # RNG für MCTS (wird pro Zug aus dem Master-Seed neu abgeleitet)
+        self._master_seed = new_master_seed() if seed is None else int(seed)
+        self._agent_id = agent_id
+        self._decision_log = decision_log
+
+        # Statistik der letzten Suche des Threads (last_search_stats)
+        self._thread_local = threading.local()
+        self._stats_lock = threading.Lock()
 
         # MCTS-Parameter
         self._mcts_iterations = 200
         self._mcts_exploration_c = 1.4
 
+        # Adaptiver Suchaufwand:
+        # - alle gültigen Karten gleichwertig (card_equivalence) → keine Suche
+        # - Suche bricht ab, sobald die meistbesuchte Karte nicht mehr überholt werden kann
+        # - ein Teil der eingesparten Iterationen geht pro Spiel in ein Konto und
+        #   erhöht das Budget der späteren Züge (Budget pro Zug = Basis + Konto / Restzüge)
+        self._adaptive_search = True
+        self._bank_fraction = 0.5
+        self._convergence_check = 10
+        self._fixed_budget = None   # Replay: Budget aus dem Entscheidungs-Log
+        self.nr_iterations = 0      # Statistik: Iterationen insgesamt
+
+        # Endspiel: Rollouts brechen ab, sobald höchstens so viele Stiche übrig
+        # sind, und nehmen das exakte Resultat aus der Tablebase
+        self._endgame_tricks = 2
+
+        # Zustand pro Spiel (Konto, Vorgaben für die Determinizations), von Zug zu Zug nachgeführt
+        self._sessions = SessionStore()
+
+        # Determinizations nach Trumpfwahl und Spielverlauf gewichten (opponent_model.py).
+        # Aus: in bench_opponent_model.py gleich gute Entscheidungen wie gleichverteilt,
+        # aber ~7% mehr Zeit pro Zug. Einschalten mit enable_opponent_model.
+        self._opponent_model = False
+
+        # Baumsuche (ISMCTS) mit Knoten in einem NodePool fester Grösse pro Spiel
+        # statt Root-MCTS, siehe enable_tree_search.
+        # Aus: in bench_node_pool.py gleich gute Entscheidungen wie die Root-MCTS bei
+        # gleichem Budget, aber ~10% mehr Zeit pro Zug.
+        self._tree_search = False
+        self._max_nodes = DEFAULT_MAX_NODES
+        self._full_policy = FULL_STOP
+        self._tree_reuse = True
+
+        # Suche (Tablebase und Cache für alle Agenten im Prozess geteilt)
+        self._engine = shared_engine()
+
         # Trumpf-ML-Modell laden
         model_path = os.path.join(os.path.dirname(__file__), 'Data', 'trump_model_sw.joblib')
         try:
@@ -102,17 +170,127 @@ class MyAgentcomplex(Agent):
         except Exception as e:
             print(f"[MyAgent] Konnte Trumpfmodell nicht laden ({model_path}): {e}")
             self._trump_model = None
-    
+
+        # Trumpf- und Schiebe-Modell in einem Forward-Pass (hat Vorrang, falls vorhanden)
+        self._fused_model = load_fused_model()
+
+        # optionaler InferenceBatcher vor dem Fused-Modell (Service mit vielen Tischen)
+        self._trump_batcher = None
+
+    @classmethod
+    def from_params(cls, params, seed: int = None, agent_id: int = 0, decision_log=None):
+        """
+        Agent mit den Suchparametern aus params() erstellen (z.B. für das Replay).
+        """
+        agent = cls(seed=seed, agent_id=agent_id, decision_log=decision_log)
+        agent._mcts_iterations = int(params[0])
+        agent._mcts_exploration_c = float(params[1])
+        agent._endgame_tricks = int(params[2])
+        if len(params) > 3 and params[3] > 0:
+            agent._fixed_budget = int(params[3])
+        if len(params) > 4:
+            agent.enable_opponent_model(bool(params[4]))
+        if len(params) > 7 and params[5] > 0:
+            agent.enable_tree_search(max_nodes=int(params[5]), full_policy=TREE_POLICIES[int(params[6])],
+                                     reuse=params[7] != TREE_REUSE_OFF)
+        return agent
+
+    @staticmethod
+    def replayable(params) -> bool:
+        """
+        False für Züge, die ein Replay aus dem einen Record nicht nachrechnen kann
+        (Baumsuche, die den Teilbaum früherer Züge weiterverwendet hat).
+        """
+        return not (len(params) > 7 and params[5] > 0 and params[7] == TREE_REUSED)
+
+    def params(self, budget: int = 0, tree_reused: bool = False) -> list:
+        """
+        Suchparameter, die ins Entscheidungs-Log geschrieben werden
+        (inkl. Budget des Zuges, damit das Replay ohne Konto auskommt):
+        Iterationen, C, Endspiel-Stiche, Budget, Opponent-Modell, Knoten der
+        Baumsuche (0 = Root-MCTS), full_policy, Weiterverwendung (TREE_REUSE_*).
+        """
+        if not self._tree_search:
+            tree = [0, 0, TREE_REUSE_OFF]
+        elif not self._tree_reuse:
+            tree = [self._max_nodes, TREE_POLICIES.index(self._full_policy), TREE_REUSE_OFF]
+        else:
+            tree = [self._max_nodes, TREE_POLICIES.index(self._full_policy),
+                    TREE_REUSED if tree_reused else TREE_REUSE_FRESH]
+        return [self._mcts_iterations, self._mcts_exploration_c, self._endgame_tricks, budget,
+                int(self._opponent_model)] + tree
+
+    @property
+    def last_search_stats(self):
+        """
+        (N, W) der letzten Suche dieses Threads oder None.
+        """
+        return getattr(self._thread_local, "search_stats", None)
+
+    def _log_decision(self, kind: int, obs, action: int, start: float, budget: int = 0,
+                      tree_reused: bool = False) -> None:
+        if self._decision_log is not None:
+            self._decision_log.record(kind, AGENT_COMPLEX, obs, action, self._master_seed, self._agent_id,
+                                      self.params(budget, tree_reused), time.perf_counter() - start)
+
+    def set_trump_batcher(self, batcher) -> None:
+        """
+        Trumpf-Anfragen über einen InferenceBatcher (inference_batcher.py) rechnen,
+        der das Fused-Modell für mehrere gleichzeitige Spiele bündelt. None → direkt.
+        """
+        self._trump_batcher = batcher
+
+    def set_session_store(self, sessions: SessionStore) -> None:
+        """
+        SessionStore mit eigenem Timeout/Speicherlimit verwenden (z.B. im Service).
+        """
+        self._sessions = sessions
+
+    def enable_opponent_model(self, enabled: bool = True) -> None:
+        """
+        Determinizations der Root-MCTS nach Trumpfwahl und Spielverlauf gewichten
+        (opponent_model.py) statt gleichverteilt. Wird ins Entscheidungs-Log geschrieben.
+        """
+        self._opponent_model = enabled
+
+    def enable_tree_search(self, max_nodes: int = DEFAULT_MAX_NODES, full_policy: str = FULL_STOP,
+                           reuse: bool = True) -> None:
+        """
+        Kartenwahl mit ISMCTS statt Root-MCTS. Jede Session bekommt einen NodePool mit
+        max_nodes Knoten (node_pool.BYTES_PER_NODE Byte pro Knoten), der Speicher pro
+        Spiel ist damit fest. full_policy: Verhalten bei vollem Pool (FULL_STOP,
+        FULL_RECYCLE); reuse: Teilbaum des letzten Zuges weiterverwenden.
+        Steht im Entscheidungs-Log (params); Züge, die einen alten Teilbaum
+        weiterverwenden, kann das Replay nicht nachrechnen (replayable).
+        """
+        NodePool(1, full_policy)    # prüft full_policy
+        self._tree_search = True
+        self._max_nodes = max_nodes
+        self._full_policy = full_policy
+        self._tree_reuse = reuse
 
     # ---------------------------------------------------------
     # Trumpfwahl
     # ---------------------------------------------------------
     def action_trump(self, obs) -> int:
+        start = time.perf_counter()
+        trump = self._choose_trump(obs)
+        self._log_decision(KIND_TRUMP, obs, trump, start)
+        return trump
+
+    def _choose_trump(self, obs) -> int:
         """
         Wählt den Trumpf:
-        1. Wenn ML-Modell vorhanden → Modellvorhersage + Unsicherheitscheck.
-        2. Sonst → heuristische Bewertung der Hand.
+        1. Wenn Trumpf/Schiebe-Modell vorhanden → kalibrierte Vorhersage beider Köpfe
+           (über den InferenceBatcher, falls gesetzt).
+        2. Wenn ML-Modell vorhanden → Modellvorhersage + Unsicherheitscheck.
+        3. Sonst → heuristische Bewertung der Hand.
         """
+        if self._trump_batcher is not None:
+            trump_proba, push_proba = self._trump_batcher.predict(np.asarray(obs.hand, dtype=np.float64))
+            return decide_trump(trump_proba, push_proba, obs)
+        if self._fused_model is not None:
+            return self._fused_model.choose_trump(obs)
 
         # Hand als 1x36-Featurevektor
         hand_vec = np.array(obs.hand, dtype=np.float32).reshape(1, -1)
@@ -125,7 +303,7 @@ class MyAgentcomplex(Agent):
             best_conf = float(proba[best_class])
 
             # Darf ich schieben?
-            can_push = getattr(obs, "push_allowed", False)
+            can_push = push_allowed(obs)
             CONF_THRESHOLD = 0.30  # falls Modell weniger als 30% sicher ist
 
             if can_push and best_conf < CONF_THRESHOLD:
@@ -148,7 +326,7 @@ class MyAgentcomplex(Agent):
 
         # Einfache Push-Logik wie im Notebook
         THRESHOLD = 68
-        can_push = getattr(obs, "push_allowed", False)
+        can_push = push_allowed(obs)
         if can_push and best_score < THRESHOLD:
             return PUSH
 
@@ -158,168 +336,91 @@ class MyAgentcomplex(Agent):
     # Kartenwahl
     # ---------------------------------------------------------
     def action_play_card(self, obs) -> int:
+        start = time.perf_counter()
+        rng = move_rng(self._master_seed, self._agent_id, obs)
+        session = self._sessions.get(obs)
+        card, budget, stats, tree_reused = self._mcts_play_card(obs, session, rng)
+        self._thread_local.search_stats = stats
+        if int(np.sum(obs.hand)) <= 1:
+            # letzte Karte des Spiels
+            self._sessions.discard(session.key)
+        self._log_decision(KIND_CARD, obs, card, start, budget, tree_reused)
+        return card
+
+    def _mcts_play_card(self, obs, session: GameSession, rng: np.random.Generator):
         """
-        Wählt eine gültige Karte mit Monte Carlo Tree Search (Root-MCTS + Determinization).
+        Wählt eine gültige Karte mit Monte Carlo Tree Search (Root-MCTS + Determinization,
+        search_engine, MCTS).
 
         - Knoten = aktueller Zustand (obs)
         - Kanten = mögliche Karten
         - UCB1 steuert Exploration vs. Exploitation
-        """
-        valid_mask = self._rule.get_valid_cards_from_obs(obs)
-        valid_cards = np.flatnonzero(valid_mask)
-
-        # Trivialfall: nur eine gültige Karte
-        if valid_cards.size == 1:
-            return int(valid_cards[0])
-
-        my_player = obs.player
-        my_team = 0 if my_player in (0, 2) else 1
-
-        # Statistik pro Karte (global über alle Determinizations)
-        N = np.zeros(36, dtype=np.int32)    # Besuchszahlen
-        W = np.zeros(36, dtype=np.float32)  # Summe der Rewards
-
-        C = self._mcts_exploration_c
-        iterations = self._mcts_iterations
-
-        for it in range(iterations):
-            # ---- 1) Determinization: versteckte Hände sampeln ----
-            hands = self._sample_hidden_hands(obs)
-
-            # ---- 2) State aus Observation + Händen erzeugen ----
-            state = state_from_observation(obs, hands)
-
-            # ---- 3) Selection: wähle Karte mit UCB1 ----
-            total_visits = 1 + N[valid_cards].sum()
+        - Determinizations aus den Vorgaben der Session (unbekannte Karten, Kartenzahl pro Spieler),
+          gewichtet nach Trumpfwahl und Spielverlauf (opponent_model.py)
+        - mit enable_tree_search: ISMCTS, Baum im NodePool der Session
 
-            best_ucb = -1e18
-            best_card = int(valid_cards[0])
-
-            for card in valid_cards:
-                n = N[card]
-                if n == 0:
-                    ucb = 1e9  # Erzwinge mind. 1 Besuch
-                else:
-                    exploit = W[card] / n
-                    explore = C * np.sqrt(np.log(total_visits) / n)
-                    ucb = exploit + explore
-
-                if ucb > best_ucb:
-                    best_ucb = ucb
-                    best_card = int(card)
-
-            # ---- 4) Expansion + Simulation: spiele best_card & rollout ----
-            # Wir kopieren den State in einen GameSim und führen best_card aus
-            sim = GameSim(rule=self._rule)
-            sim.init_from_state(state)
-
-            sim.action_play_card(best_card)
-
-            # Rest zufällig spielen
-            reward = self._simulate_random_game(sim.state, my_team)
-
-            # ---- 5) Backpropagation: Statistik updaten ----
-            N[best_card] += 1
-            W[best_card] += reward
-
-        # ---- 6) Aktion wählen: Karte mit den meisten Besuchen ----
-        visits_valid = N[valid_cards]
-        best_idx = int(np.argmax(visits_valid))
-        best_card_final = int(valid_cards[best_idx])
-
-        return best_card_final
-
-        
-    def _sample_hidden_hands(self, obs) -> np.ndarray:
+        Returns:
+            (Karte, Budget (0 ohne Suche), (N, W) der Suche oder None,
+             True wenn die Baumsuche einen Teilbaum früherer Züge weiterverwendet hat)
         """
-        Erzeuge eine zufällige, konsistente Verteilung der unbekannten Karten
-        auf die Gegnerhände.
-
-        Rückgabe:
-            hands: Array der Form (4, 36), one-hot, inkl. unserer eigenen Hand.
+        iterations = self._move_budget(obs, session)
+        if self._opponent_model:
+            sampler = OpponentModelSampler(obs, session)
+        else:
+            sampler = session.sample_hidden_hands
+        if self._tree_search:
+            # ISMCTS ohne Gewichte: Determinizations gleichverteilt
+            sampler = session.sample_hidden_hands
+            if session.search_tree is None:
+                self._sessions.attach_search_tree(session, NodePool(self._max_nodes, self._full_policy))
+            result = self._engine.evaluate(obs, ISMCTS, iterations, rng=rng,
+                                           exploration_c=self._mcts_exploration_c,
+                                           endgame_tricks=self._endgame_tricks,
+                                           early_stop=self._adaptive_search,
+                                           convergence_check=self._convergence_check,
+                                           sampler=sampler, session=session,
+                                           pool=session.search_tree, reuse=self._tree_reuse)
+        else:
+            result = self._engine.evaluate(obs, MCTS, iterations, rng=rng,
+                                           exploration_c=self._mcts_exploration_c,
+                                           endgame_tricks=self._endgame_tricks,
+                                           early_stop=self._adaptive_search,
+                                           convergence_check=self._convergence_check,
+                                           sampler=sampler, weighted=self._opponent_model)
+
+        if not result.searched:
+            # alle gültigen Karten gleichwertig → Einsparung fürs Konto
+            if self._adaptive_search and result.stats["nr_valid"] > 1:
+                self._update_bank(obs, session, 0)
+            return result.card, 0, None, False
+
+        nr_done = result.stats["iterations"]
+        with self._stats_lock:
+            self.nr_iterations += nr_done
+        if self._adaptive_search:
+            self._update_bank(obs, session, nr_done)
+
+        return result.card, iterations, (result.visits, result.totals), result.stats.get("reused", False)
+
+    def _move_budget(self, obs, session: GameSession) -> int:
         """
-        hands = np.zeros((4, 36), dtype=np.int32)
-
-        me = obs.player        # aktueller Spielerindex (0..3)
-        hands[me, :] = obs.hand
-
-        # --- 1) Gespielte Karten finden ------------------------------------
-        played_mask = np.zeros(36, dtype=bool)
-        cards_played_by_player = np.zeros(4, dtype=np.int32)
-
-        # Vollständig abgeschlossene Stiche
-        for t in range(obs.nr_tricks):
-            first = obs.trick_first_player[t]
-            if first == -1:
-                continue
-            for pos in range(4):
-                card = int(obs.tricks[t, pos])
-                if card == -1:
-                    continue
-                played_mask[card] = True
-                player = (first + pos) & 3
-                cards_played_by_player[player] += 1
-
-        # Aktueller (noch nicht vollständiger) Stich
-        if obs.nr_cards_in_trick > 0:
-            first = obs.trick_first_player[obs.nr_tricks]
-            if first != -1:
-                for pos in range(obs.nr_cards_in_trick):
-                    card = int(obs.current_trick[pos])
-                    if card == -1:
-                        continue
-                    played_mask[card] = True
-                    player = (first + pos) & 3
-                    cards_played_by_player[player] += 1
-
-        # --- 2) Wie viele Karten sollte jeder Spieler noch haben? ----------
-        remaining_per_player = 9 - cards_played_by_player
-        # unsere Hand kennen wir genau:
-        remaining_per_player[me] = int(np.sum(obs.hand))
-
-        # --- 3) Unbekannte Karten einsammeln -------------------------------
-        unknown_cards = [
-            c for c in range(36)
-            if (not played_mask[c]) and (obs.hand[c] == 0)
-        ]
-
-        self._rng.shuffle(unknown_cards)
-
-        others = [p for p in range(4) if p != me]
-
-        # --- 4) Unbekannte Karten auf Gegner verteilen ---------------------
-        idx = 0
-        for p in others:
-            need = int(remaining_per_player[p])
-            cards_for_p = unknown_cards[idx:idx + need]
-            for card in cards_for_p:
-                hands[p, card] = 1
-            idx += need
-
-        return hands
-
-    def _simulate_random_game(self, state, my_team: int) -> float:
+        Iterationen für diesen Zug: Basis plus ein gleichmässiger Anteil des Kontos
+        für die restlichen Züge mit Auswahl.
         """
-        Rollout: spiele von diesem State aus zufällig zu Ende und
-        gib (Punkte_mein_Team - Punkte_anderes_Team) zurück.
+        if self._fixed_budget is not None:
+            return self._fixed_budget
+        if not self._adaptive_search:
+            return self._mcts_iterations
+        moves_left = max(1, int(np.sum(obs.hand)) - 1)
+        return self._mcts_iterations + session.search_bank // moves_left
+
+    def _update_bank(self, obs, session: GameSession, used: int) -> None:
         """
-        sim = GameSim(rule=self._rule)
-        sim.init_from_state(state)
-
-        while not sim.is_done():
-            current_player = sim.state.player
-            valid = self._rule.get_valid_cards_from_state(sim.state)
-            valid_indices = np.flatnonzero(valid)
-            if valid_indices.size == 0:
-                break
-            card = int(self._rng.choice(valid_indices))
-            sim.action_play_card(card)
-
-        # Punkte auslesen
-        points0 = int(sim.state.points[0])
-        points1 = int(sim.state.points[1])
-
-        if my_team == 0:
-            return float(points0 - points1)
-        else:
-            return float(points1 - points0)
+        Konto des Spiels nachführen: Mehrverbrauch abziehen, einen Teil der
+        Einsparung gutschreiben. Nach dem letzten Zug mit Auswahl ist es leer.
+        """
+        if self._fixed_budget is not None:
+            return
+        base = self._mcts_iterations
+        bank = session.search_bank - max(0, used - base) + int(self._bank_fraction * max(0, base - used))
+        session.search_bank = max(0, bank) if int(np.sum(obs.hand)) > 2 else 0
@@ -0,0 +1,192 @@
+# node_pool.py
+#
+# Knoten-Pool für die Baumsuche (ISMCTS in search_engine.py).
+#
+# Statt einem Python-Objekt pro Knoten liegen alle Knoten in vorab angelegten
+# NumPy-Arrays (structure of arrays), Knoten = Index:
+#
+#   visits[i]       Besuche
+#   avail[i]        wie oft der Knoten verfügbar war (ISMCTS: Karte in der
+#                   Determinization gültig)
+#   value[i]        Summe der Rewards aus Sicht des Teams am Zug an der Wurzel
+#   card[i]         Karte der Kante zum Knoten (-1 = Wurzel)
+#   first_child[i]  Index des ersten Kindes (-1 = noch nicht expandiert)
+#   nr_children[i]  Anzahl Kinder; die Kinder liegen zusammenhängend ab first_child
+#
+# Der Speicher ist damit fest: max_nodes * BYTES_PER_NODE, unabhängig davon, wie
+# lange gesucht wird. Ist der Pool voll, entscheidet full_policy:
+#
+#   FULL_STOP      keine weiteren Knoten, die Suche läuft mit Rollouts ab den
+#                  bestehenden Blättern weiter
+#   FULL_RECYCLE   alles unterhalb der Kinder der Wurzel verwerfen (die Statistik
+#                  der Wurzel-Kinder, nach der gewählt wird, bleibt) und weiter bauen
+#
+# Zwischen zwei Zügen desselben Spiels kann der Teilbaum unter den inzwischen
+# gespielten Karten als neue Wurzel übernommen werden (reroot), der Rest wird
+# verworfen und der Teilbaum an den Anfang des Pools kopiert.
+
+import numpy as np
+
+FULL_STOP = "stop"
+FULL_RECYCLE = "recycle"
+
+# 36 KiB pro Spiel; eine Suche mit 400 Iterationen belegt ~1000 Knoten
+DEFAULT_MAX_NODES = 2048
+
+# visits, avail, value, first_child (je 4 Byte), card, nr_children (je 1 Byte)
+BYTES_PER_NODE = 18
+
+
+class NodePool:
+    """
+    Baum in festen Arrays.
+
+    Args:
+        max_nodes: Anzahl Knoten im Pool
+        full_policy: FULL_STOP oder FULL_RECYCLE
+    """
+
+    __slots__ = ('max_nodes', 'full_policy', 'visits', 'avail', 'value', 'card', 'first_child', 'nr_children',
+                 'size', 'root_nr_played', 'nr_full', 'nr_recycled')
+
+    def __init__(self, max_nodes: int = DEFAULT_MAX_NODES, full_policy: str = FULL_STOP):
+        if full_policy not in (FULL_STOP, FULL_RECYCLE):
+            raise ValueError(f"Unbekannte full_policy: {full_policy}")
+        self.max_nodes = max_nodes
+        self.full_policy = full_policy
+        self.visits = np.zeros(max_nodes, dtype=np.int32)
+        self.avail = np.zeros(max_nodes, dtype=np.int32)
+        self.value = np.zeros(max_nodes, dtype=np.float32)
+        self.card = np.full(max_nodes, -1, dtype=np.int8)
+        self.first_child = np.full(max_nodes, -1, dtype=np.int32)
+        self.nr_children = np.zeros(max_nodes, dtype=np.int8)
+        self.size = 0
+        self.root_nr_played = -1
+        # Statistik
+        self.nr_full = 0
+        self.nr_recycled = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.visits.nbytes + self.avail.nbytes + self.value.nbytes + self.card.nbytes + \
+            self.first_child.nbytes + self.nr_children.nbytes
+
+    def reset(self, nr_played_cards: int) -> int:
+        """
+        Leerer Baum mit einer Wurzel (Index 0) für die Stellung nach nr_played_cards Karten.
+        """
+        self.size = 0
+        self.root_nr_played = nr_played_cards
+        return self._alloc(1, -1)
+
+    def add_children(self, node: int, cards) -> bool:
+        """
+        Kinder für cards an node anhängen. False, wenn der Pool voll ist.
+        """
+        nr_cards = len(cards)
+        if self.size + nr_cards > self.max_nodes:
+            self.nr_full += 1
+            return False
+        start = self._alloc(nr_cards, -1)
+        self.card[start:start + nr_cards] = cards
+        self.first_child[node] = start
+        self.nr_children[node] = nr_cards
+        return True
+
+    def make_room(self, nr_nodes: int = 36) -> None:
+        """
+        Vor einer Iteration: mit FULL_RECYCLE Platz schaffen, falls weniger als
+        nr_nodes Knoten frei sind (Knoten-Indizes unter der Wurzel ändern sich dabei).
+        """
+        if self.full_policy == FULL_RECYCLE and self.size + nr_nodes > self.max_nodes:
+            self._recycle()
+
+    def find_child(self, node: int, card: int) -> int:
+        """
+        Index des Kindes mit der Karte card, -1 wenn nicht vorhanden.
+        """
+        start = int(self.first_child[node])
+        if start < 0:
+            return -1
+        for child in range(start, start + int(self.nr_children[node])):
+            if self.card[child] == card:
+                return child
+        return -1
+
+    def reroot(self, cards_since_root: list, nr_played_cards: int) -> bool:
+        """
+        Teilbaum unter den seit der Wurzel gespielten Karten als neue Wurzel übernehmen.
+        False (und leerer Baum), wenn der Pfad nicht im Baum steht.
+        """
+        node = 0 if self.size > 0 else -1
+        for card in cards_since_root:
+            if node < 0:
+                break
+            node = self.find_child(node, card)
+        if node < 0:
+            self.reset(nr_played_cards)
+            return False
+        self._compact(node)
+        self.card[0] = -1
+        self.root_nr_played = nr_played_cards
+        return True
+
+    # ---------------------------------------------------------
+
+    def _alloc(self, count: int, card: int) -> int:
+        start = self.size
+        end = start + count
+        self.visits[start:end] = 0
+        self.avail[start:end] = 0
+        self.value[start:end] = 0.0
+        self.card[start:end] = card
+        self.first_child[start:end] = -1
+        self.nr_children[start:end] = 0
+        self.size = end
+        return start
+
+    def _recycle(self) -> bool:
+        """
+        Alle Enkel der Wurzel verwerfen (Wurzel und ihre Kinder bleiben mit Statistik).
+        """
+        start = int(self.first_child[0])
+        if start < 0:
+            return False
+        count = int(self.nr_children[0])
+        if start != 1:
+            self._compact(0)
+            start = 1
+        self.first_child[start:start + count] = -1
+        self.nr_children[start:start + count] = 0
+        self.size = 1 + count
+        self.nr_recycled += 1
+        return True
+
+    def _compact(self, root: int) -> None:
+        """
+        Teilbaum unter root in Breitensuche an den Anfang des Pools kopieren (root → 0).
+        Kinder eines Knotens bleiben zusammenhängend.
+        """
+        order = [root]
+        new_first = [-1]
+        size = 1
+        i = 0
+        while i < len(order):
+            node = order[i]
+            start = int(self.first_child[node])
+            if start >= 0:
+                count = int(self.nr_children[node])
+                new_first[i] = size
+                order.extend(range(start, start + count))
+                new_first.extend([-1] * count)
+                size += count
+            i += 1
+
+        index = np.array(order, dtype=np.int64)
+        self.visits[:size] = self.visits[index]
+        self.avail[:size] = self.avail[index]
+        self.value[:size] = self.value[index]
+        self.card[:size] = self.card[index]
+        self.nr_children[:size] = self.nr_children[index]
+        self.first_child[:size] = new_first
+        self.size = size
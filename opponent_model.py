@@ -0,0 +1,207 @@
+# opponent_model.py
+#
+# Gewichtete Determinizations für die MCTS von MyAgentcomplex.
+#
+# Die gleichverteilte Verteilung der unbekannten Karten ignoriert, was Trumpfwahl
+# und Spielverlauf über die anderen Hände verraten. Das Modell hier bewertet eine
+# Verteilung mit einem einfachen Likelihood-Modell, das pro Zug einmal als
+# Tabelle log_weight[Spieler, Karte] berechnet wird:
+#
+#   - wer Trumpf angesagt hat, hält eher die starken Trümpfe (Bauer, Nell, ...),
+#     bei Obenabe die Asse, bei Undenufe die Sechser
+#   - wer einen Stich der Gegner mit einer tieferen Karte der Anfangsfarbe
+#     laufen lässt ("duckt"), hat eher keine Karte dieser Farbe, die den Stich
+#     gewonnen hätte
+#
+# Harte Vorgaben (Farbe nicht angegeben → keine Karte dieser Farbe mehr, siehe
+# game_session.py) werden beim Verteilen immer eingehalten. Die weichen Vorgaben
+# steuern, wohin die Karten verteilt werden; das Importance-Gewicht
+# (Likelihood / Vorschlagswahrscheinlichkeit) geht in die Root-Statistik ein.
+#
+# Die Faktoren für den Ansager entsprechen dem Verhältnis P(Ansager hat die
+# Karte) / P(ein anderer Spieler hat sie), gemessen auf zufälligen Händen mit
+# der Trumpf-Heuristik von my_agent (score_hand_for_trump).
+
+import math
+
+import numpy as np
+
+from jass.game.const import J_offset, Nine_offset, A_offset, K_offset, OBE_ABE, UNE_UFE
+
+from card_equivalence import ORDERS
+from endgame_tablebase import STRENGTH
+
+# Faktoren der Likelihood pro Karte
+DECLARER_FACTORS = ((J_offset, 6.0), (Nine_offset, 4.0), (A_offset, 1.8))   # Trumpf-Ansager
+DECLARER_TRUMP_FACTOR = 1.3                                                 # übrige Trümpfe
+DECLARER_OBE_FACTORS = ((A_offset, 1.7), (K_offset, 1.4))
+DECLARER_UNE_FACTORS = ((8, 2.0), (7, 1.8), (6, 1.5))                       # Sechser, Siebner, Achter
+DUCK_FACTOR = 0.5
+
+
+# Machbarkeit beim Verteilen: Typ einer Karte = Bitmaske der Spieler (0..2), die sie
+# haben können. Für jede Spielermenge S muss gelten: Karten, die nur an Spieler in S
+# gehen können <= freie Plätze in S (Hall). Reserve[S] = freie Plätze - solche Karten.
+# S = alle drei Spieler ist immer genau erfüllt und wird nicht geprüft.
+_SETS = range(1, 7)
+# _BLOCKS[T][p]: Mengen S, deren Reserve sinkt, wenn eine Karte vom Typ T an p geht
+_BLOCKS = [[tuple(S for S in _SETS if (S >> p) & 1 and T & ~S) for p in range(3)] for T in range(8)]
+# _DELTA[T][p]: Änderung der Reserve pro Menge S
+_DELTA = [[tuple((S, ((T & ~S) == 0) - ((S >> p) & 1)) for S in _SETS) for p in range(3)] for T in range(8)]
+
+
+def card_log_weights(obs) -> np.ndarray:
+    """
+    Log-Likelihood-Faktoren pro Spieler und Karte (4, 36) aus Trumpfwahl und Spielverlauf.
+    """
+    log_weight = np.zeros((4, 36), dtype=np.float64)
+    trump = int(obs.trump)
+
+    # 1) Trumpf-Ansager
+    declarer = int(obs.declared_trump)
+    if declarer != -1:
+        if trump == OBE_ABE:
+            factors = [(colour * 9 + offset, f) for colour in range(4) for offset, f in DECLARER_OBE_FACTORS]
+        elif trump == UNE_UFE:
+            factors = [(colour * 9 + offset, f) for colour in range(4) for offset, f in DECLARER_UNE_FACTORS]
+        else:
+            factors = [(trump * 9 + offset, DECLARER_TRUMP_FACTOR) for offset in range(9)]
+            factors += [(trump * 9 + offset, f) for offset, f in DECLARER_FACTORS]
+        for card, factor in factors:
+            log_weight[declarer, card] = math.log(factor)
+
+    # 2) Ducken: Gegner führt den Stich mit der Anfangsfarbe, Spieler gibt tiefer an
+    duck = math.log(DUCK_FACTOR)
+    for t in range(obs.nr_tricks):
+        first = int(obs.trick_first_player[t])
+        lead = int(obs.tricks[t, 0]) // 9
+        strength = STRENGTH[trump][lead]
+        best_pos = 0
+        for pos in range(1, 4):
+            card = int(obs.tricks[t, pos])
+            best = int(obs.tricks[t, best_pos])
+            player = (first - pos) % 4
+            leader = (first - best_pos) % 4
+            if card // 9 == lead and best // 9 == lead and (player - leader) % 2 == 1 \
+                    and strength[card] < strength[best]:
+                order = ORDERS[trump][lead]
+                for stronger in order[:order.index(best)]:
+                    log_weight[player, stronger] += duck
+            if strength[card] > strength[best]:
+                best_pos = pos
+
+    return log_weight
+
+
+class OpponentModelSampler:
+    """
+    Gewichtete Determinizations für einen Zug.
+
+    Aufruf wie GameSession.sample_hidden_hands, gibt aber (hands, weight) zurück
+    (MCTS mit weighted=True).
+
+    Die Karten werden einzeln verteilt (die am stärksten eingeschränkten zuerst,
+    sonst zufällige Reihenfolge), jede an Spieler p mit Wahrscheinlichkeit
+    ~ Faktor[p, Karte] * freie Plätze[p], ausgeschlossene Karten nie. Das Gewicht
+    Ziel / Vorschlag macht daraus die Verteilung des Likelihood-Modells.
+
+    Args:
+        obs: Observation des Zuges
+        session: GameSession, auf die Observation nachgeführt (unbekannte Karten,
+            Kartenzahl und ausgeschlossene Karten pro Spieler)
+        log_weight: Log-Faktoren (4, 36), Standard card_log_weights(obs)
+    """
+
+    def __init__(self, obs, session, log_weight: np.ndarray = None):
+        if log_weight is None:
+            log_weight = card_log_weights(obs)
+        self._me = int(obs.player)
+        self._hand = np.asarray(obs.hand, dtype=np.int32)
+        self._cards = session.unknown_cards
+        self._others = [p for p in range(4) if p != self._me]
+        self._counts = [int(session.hidden_counts[p]) for p in self._others]
+
+        # pro unbekannter Karte die Faktoren der drei anderen Spieler (0 = ausgeschlossen)
+        factors = np.exp(log_weight[self._others][:, self._cards])
+        factors[session.excluded[self._others][:, self._cards]] = 0.0
+        self._factors = [tuple(column) for column in factors.T.tolist()]
+        self._log_factors = [tuple(column) for column in log_weight[self._others][:, self._cards].T.tolist()]
+
+        # Karten mit den wenigsten möglichen Spielern zuerst verteilen (sonst bleiben
+        # am Schluss oft nur noch Karten übrig, die der Spieler mit freien Plätzen nicht haben kann)
+        allowed = factors > 0.0
+        self._nr_allowed = allowed.sum(axis=0).astype(np.float64)
+
+        # Typ pro Karte und Reserve pro Spielermenge (nur nötig mit ausgeschlossenen Karten)
+        types = (allowed * np.array([[1], [2], [4]])).sum(axis=0)
+        types[types == 0] = 7
+        self._types = types.tolist()
+        self._constrained = bool(np.any(types != 7))
+        self._reserve = [len(self._types) + 1] * 7    # Index 0 ungenutzt
+        for S in _SETS:
+            within = sum(1 for T in self._types if (T & ~S) == 0)
+            self._reserve[S] = sum(c for i, c in enumerate(self._counts) if (S >> i) & 1) - within
+
+        # log(Anzahl Verteilungen ohne Vorgaben): Gewicht 1 für die Gleichverteilung
+        self._log_nr_deals = math.lgamma(len(self._factors) + 1) - sum(math.lgamma(c + 1) for c in self._counts)
+
+        # Statistik
+        self.nr_samples = 0
+        self.nr_conflicts = 0
+
+    def __call__(self, obs, rng: np.random.Generator):
+        self.nr_samples += 1
+        nr_cards = len(self._factors)
+        order = np.argsort(self._nr_allowed + rng.random(nr_cards)).tolist()
+        uniforms = rng.random(nr_cards).tolist()
+
+        free = list(self._counts)
+        reserve = list(self._reserve)
+        constrained = self._constrained
+        owner = [0] * nr_cards
+        log_target = 0.0
+        log_proposal = 0.0
+        for k, u in zip(order, uniforms):
+            f = self._factors[k]
+            p0, p1, p2 = f[0] * free[0], f[1] * free[1], f[2] * free[2]
+            if constrained and 0 in reserve:
+                # keine Karte an einen Spieler, wenn danach eine andere Karte keinen Platz mehr hätte
+                blocks = _BLOCKS[self._types[k]]
+                if p0 > 0.0 and any(reserve[S] == 0 for S in blocks[0]):
+                    p0 = 0.0
+                if p1 > 0.0 and any(reserve[S] == 0 for S in blocks[1]):
+                    p1 = 0.0
+                if p2 > 0.0 and any(reserve[S] == 0 for S in blocks[2]):
+                    p2 = 0.0
+            total = p0 + p1 + p2
+            if total <= 0.0:
+                # Vorgaben nicht mehr erfüllbar → an einen Spieler mit freien Plätzen
+                self.nr_conflicts += 1
+                p0, p1, p2 = float(free[0]), float(free[1]), float(free[2])
+                total = p0 + p1 + p2
+            u *= total
+            if u < p0:
+                p, chosen = 0, p0
+            elif u < p0 + p1:
+                p, chosen = 1, p1
+            elif p2 > 0.0:
+                p, chosen = 2, p2
+            else:
+                # Rundung bei u ≈ total: letzter möglicher Spieler
+                p, chosen = (1, p1) if p1 > 0.0 else (0, p0)
+            owner[k] = p
+            free[p] -= 1
+            if constrained:
+                for S, delta in _DELTA[self._types[k]][p]:
+                    reserve[S] += delta
+            log_target += self._log_factors[k][p]
+            log_proposal += math.log(chosen / total)
+
+        owner = np.array(owner)
+        hands = np.zeros((4, 36), dtype=np.int32)
+        hands[self._me] = self._hand
+        for i, p in enumerate(self._others):
+            hands[p, self._cards[owner == i]] = 1
+        # Ziel / Vorschlag, relativ zur Gleichverteilung (1 / #Verteilungen)
+        weight = math.exp(log_target - log_proposal - self._log_nr_deals)
+        return hands, weight
@@ -0,0 +1,180 @@
+# rule_kernel.py
+#
+# Gültige Karten (Schieber-Regeln) über eine vorberechnete Tabelle.
+#
+# RuleSchieber.get_valid_cards verzweigt bei jedem Aufruf in Python und rechnet
+# mit mehreren NumPy-Operationen auf der Hand. Die gültigen Karten sind aber
+# immer hand & MASKE, wobei die Maske nur abhängt von:
+#
+#   trump            Trumpf-Modus 0..5
+#   lead             Anspielfarbe 0..3, 4 = erste Karte im Stich
+#   lowest           Offset des tiefsten im Stich gespielten Trumpfs 0..8, 9 = keiner
+#                    (wie in RuleSchieber über den grössten Kartenindex bestimmt)
+#   composition      3 Bits über die Hand:
+#                      HAVE_LEAD    Hand hat Karten der Anspielfarbe
+#                      ONLY_TRUMPS  Hand besteht nur aus Trümpfen
+#                      ONLY_JACK    einziger Trumpf der Hand ist der Bauer
+#
+# Alle 6 * 5 * 10 * 8 Masken werden beim Import einmal aus den Regeln berechnet
+# (inkl. Bauer-Ausnahme und Untertrumpf-Verbot). Danach sind es pro Aufruf ein
+# paar Bit- bzw. Array-Operationen und ein Tabellenzugriff:
+#
+#   valid_card_bits(hand, trick, trump)        Hand als Bitmaske (Alpha-Beta, Tablebase)
+#   valid_cards_batch(hands, tricks, n, trump) B Stellungen gleichzeitig (BatchPlayout)
+#   RuleKernel                                 RuleSchieber mit Tabelle in get_valid_cards
+#
+# test_rule_kernel.py prüft alle drei gegen RuleSchieber.
+
+import numpy as np
+
+from jass.game.const import color_of_card, higher_trump, lower_trump, J_offset
+from jass.game.rule_schieber import RuleSchieber
+
+HAVE_LEAD = 1
+ONLY_TRUMPS = 2
+ONLY_JACK = 4
+
+NO_LEAD = 4
+NO_TRUMP_PLAYED = 9
+
+ALL_CARDS = (1 << 36) - 1
+COLOUR_BITS = [0x1FF << (9 * c) for c in range(4)]
+JACK_BITS = [1 << (9 * c + J_offset) for c in range(4)]
+
+_HIGHER_TRUMP_BITS = [sum(1 << j for j in range(36) if higher_trump[c, j]) for c in range(36)]
+_LOWER_TRUMP_BITS = [sum(1 << j for j in range(36) if lower_trump[c, j]) for c in range(36)]
+
+# Farbe pro Karte als Python-Liste (schneller als color_of_card[card] mit numpy)
+_COLOUR_OF_CARD = [int(c) for c in color_of_card]
+
+
+def _rule_mask(trump: int, lead: int, lowest: int, composition: int) -> int:
+    """
+    Maske der erlaubten Karten nach den Schieber-Regeln (Aufbau wie RuleSchieber.get_valid_cards).
+    """
+    if lead == NO_LEAD:
+        return ALL_CARDS
+    have_lead = composition & HAVE_LEAD
+    if trump >= 4:
+        return COLOUR_BITS[lead] if have_lead else ALL_CARDS
+
+    if lead == trump:
+        # Trumpf angespielt: bedienen, ausser keine Trümpfe oder nur noch der Bauer
+        if not have_lead or composition & ONLY_JACK:
+            return ALL_CARDS
+        return COLOUR_BITS[trump]
+
+    if lowest == NO_TRUMP_PLAYED:
+        return COLOUR_BITS[lead] | COLOUR_BITS[trump] if have_lead else ALL_CARDS
+
+    # es wurde schon getrumpft: nicht untertrumpfen, ausser die Hand hat nur noch Trümpfe
+    if composition & ONLY_TRUMPS:
+        return ALL_CARDS
+    lowest_card = trump * 9 + lowest
+    if have_lead:
+        return COLOUR_BITS[lead] | (COLOUR_BITS[trump] & _HIGHER_TRUMP_BITS[lowest_card])
+    return ALL_CARDS & ~(COLOUR_BITS[trump] & _LOWER_TRUMP_BITS[lowest_card])
+
+
+# MASK_BITS[trump][lead][lowest][composition]
+MASK_BITS = [[[[_rule_mask(trump, lead, lowest, composition) for composition in range(8)]
+               for lowest in range(10)] for lead in range(5)] for trump in range(6)]
+
+# gleiche Tabelle als (6, 5, 10, 8, 36) bool für die Array-Varianten
+MASK_TABLE = np.array([[[[[(m >> card) & 1 for card in range(36)] for m in by_lowest]
+                         for by_lowest in by_lead] for by_lead in by_trump] for by_trump in MASK_BITS], dtype=bool)
+
+# Offset jeder Karte in ihrer Farbe, für Index-Rechnungen mit Arrays
+_OFFSET = np.arange(36) % 9
+_COLOUR = np.asarray(color_of_card, dtype=np.int64)
+# Karten pro Farbe als (36, 4), für die Farbzählung einer Hand per Matrixprodukt
+_COLOUR_MATRIX = (np.arange(36)[:, None] // 9 == np.arange(4)[None, :]).astype(np.int64)
+
+
+def valid_card_bits(hand: int, trick: list, trump: int) -> int:
+    """
+    Gültige Karten als Bitmaske, identisch zu RuleSchieber.get_valid_cards.
+
+    Args:
+        hand: Hand als Bitmaske (Bit i = Karte i)
+        trick: bereits gespielte Karten im aktuellen Stich
+        trump: Trumpf-Modus 0..5
+    """
+    if not trick:
+        return hand
+
+    lead = _COLOUR_OF_CARD[trick[0]]
+    composition = HAVE_LEAD if hand & COLOUR_BITS[lead] else 0
+    lowest = NO_TRUMP_PLAYED
+    if trump < 4:
+        trumps = hand & COLOUR_BITS[trump]
+        if trumps == hand:
+            composition |= ONLY_TRUMPS
+        if trumps == JACK_BITS[trump]:
+            composition |= ONLY_JACK
+        for card in trick[1:]:
+            if _COLOUR_OF_CARD[card] == trump and (lowest == NO_TRUMP_PLAYED or card - trump * 9 > lowest):
+                lowest = card - trump * 9
+    return hand & MASK_BITS[trump][lead][lowest][composition]
+
+
+def valid_cards_batch(hands: np.ndarray, tricks: np.ndarray, nr_cards_in_trick: int, trump: int) -> np.ndarray:
+    """
+    Gültige Karten für B Stellungen gleichzeitig, identisch zu RuleSchieber.get_valid_cards.
+
+    Args:
+        hands: (B, 36) bool, Hand des Spielers am Zug
+        tricks: (B, 4) int, Karten des laufenden Stichs
+        nr_cards_in_trick: Anzahl bereits gespielter Karten im Stich (für alle gleich)
+        trump: Trumpf-Modus 0..5
+
+    Returns:
+        (B, 36) bool
+    """
+    if nr_cards_in_trick == 0:
+        return hands
+
+    lead = _COLOUR[tricks[:, 0]]
+    counts = hands.astype(np.int64) @ _COLOUR_MATRIX
+    rows = np.arange(hands.shape[0])
+    composition = (counts[rows, lead] > 0).astype(np.int64)
+
+    lowest = np.full(hands.shape[0], NO_TRUMP_PLAYED, dtype=np.int64)
+    if trump < 4:
+        nr_trumps = counts[:, trump]
+        composition |= np.where(nr_trumps == counts.sum(axis=1), ONLY_TRUMPS, 0)
+        composition |= np.where((nr_trumps == 1) & hands[:, trump * 9 + J_offset], ONLY_JACK, 0)
+        for pos in range(1, nr_cards_in_trick):
+            card = tricks[:, pos]
+            offset = _OFFSET[card]
+            lowest = np.where((_COLOUR[card] == trump) & ((lowest == NO_TRUMP_PLAYED) | (offset > lowest)),
+                              offset, lowest)
+
+    return hands & MASK_TABLE[trump, lead, lowest, composition]
+
+
+class RuleKernel(RuleSchieber):
+    """
+    RuleSchieber mit get_valid_cards über die Masken-Tabelle.
+    Gewinner und Punkte eines Stichs wie RuleSchieber.
+    """
+
+    def get_valid_cards(self, hand: np.ndarray, current_trick, move_nr: int, trump: int) -> np.ndarray:
+        if move_nr == 0:
+            return hand
+
+        lead = _COLOUR_OF_CARD[current_trick[0]]
+        counts = (hand @ _COLOUR_MATRIX).tolist()
+        composition = HAVE_LEAD if counts[lead] else 0
+        lowest = NO_TRUMP_PLAYED
+        if trump < 4:
+            nr_trumps = counts[trump]
+            if nr_trumps == sum(counts):
+                composition |= ONLY_TRUMPS
+            if nr_trumps == 1 and hand[trump * 9 + J_offset]:
+                composition |= ONLY_JACK
+            for pos in range(1, move_nr):
+                card = int(current_trick[pos])
+                if _COLOUR_OF_CARD[card] == trump and (lowest == NO_TRUMP_PLAYED or card - trump * 9 > lowest):
+                    lowest = card - trump * 9
+        return hand * MASK_TABLE[trump, lead, lowest, composition]
@@ -0,0 +1,578 @@
+# search_engine.py
+#
+# Gemeinsame Such-Engine für alle Agenten.
+#
+#   engine = shared_engine()
+#   result = engine.evaluate(state, ROLLOUT, budget, rng=rng)
+#   result.card, result.values, result.visits, result.stats
+#
+# Algorithmen:
+#   ROLLOUT    perfekte Information (GameState): zufällige Playouts ab der Stellung,
+#              Budget per Successive Halving verteilt (MonteCarloTrickAgent)
+#   ALPHABETA  perfekte Information: Alpha-Beta über den laufenden Stich auf
+#              Bitmasken (MinimaxTrickAgent)
+#   MCTS       Observation: Root-UCB über Determinizations mit zufälligen
+#              Rollouts (MyAgentcomplex)
+#   ISMCTS     Observation: Baumsuche über Determinizations (Information Set MCTS),
+#              Knoten in einem NodePool fester Grösse (node_pool.py)
+#
+# Gemeinsam für alle Algorithmen:
+#   - nur eine gültige Karte → keine Suche
+#   - perfekte Information und wenige Stiche übrig → exakt aus der Endspiel-Tablebase
+#   - Suche nur über einen Repräsentanten pro Klasse gleichwertiger Karten
+#
+# Erweiterbar über register(name, fn) und die Optionen der Algorithmen
+# (Simulator für die Playouts, Sampler für die Determinizations). Die Tablebase
+# (inkl. Cache) gehört zur Engine; shared_engine() teilt sie zwischen allen
+# Agenten eines Prozesses.
+
+import math
+import time
+
+import numpy as np
+
+from jass.game.const import team
+from jass.game.game_sim import GameSim
+
+from batch_playout import BatchPlayout
+from card_equivalence import equivalence_classes, gone_mask, representatives, reduce_card_bits
+from endgame_tablebase import EndgameTablebase, DEFAULT_TB_FILE, CARD_BITS, CARD_POINTS, STRENGTH, hands_to_bits
+from game_session import GameSession
+from node_pool import NodePool
+from rule_kernel import RuleKernel, valid_card_bits
+from state_template import StateTemplate
+
+ROLLOUT = "rollout"
+ALPHABETA = "alphabeta"
+MCTS = "mcts"
+ISMCTS = "ismcts"
+
+
+class SearchResult:
+    """
+    Resultat einer Suche.
+
+    Attributes:
+        card: gewählte Karte
+        values: Wert pro Karte (36,), aus Sicht des Teams am Zug; nur für
+            durchsuchte Karten gültig (bei ALPHABETA für nicht gewählte Karten
+            eine obere Schranke)
+        visits: Anzahl Playouts/Besuche pro Karte (36,)
+        totals: Summe der Werte pro Karte (36,), also values = totals / visits
+        searched: False, wenn ohne Suche entschieden wurde (eine Karte/Klasse)
+        stats: weitere Zahlen (Iterationen, Knoten, Zeit, Tablebase-Treffer)
+    """
+
+    def __init__(self, card: int, visits=None, totals=None, values=None, searched: bool = True, **stats):
+        self.card = int(card)
+        self.visits = np.zeros(36, dtype=np.int64) if visits is None else visits
+        self.totals = np.zeros(36, dtype=np.float64) if totals is None else totals
+        if values is None:
+            values = np.zeros(36, dtype=np.float64)
+            np.divide(self.totals, self.visits, out=values, where=self.visits > 0)
+        self.values = values
+        self.searched = searched
+        self.stats = stats
+
+
+class SearchEngine:
+    """
+    Such-Engine mit einheitlicher API evaluate(state, algorithm, budget).
+
+    Args:
+        rule: Spielregeln (Standard RuleKernel)
+        endgame_tb: Endspiel-Tablebase (Standard: Data/endgame_tb.bin, falls vorhanden)
+    """
+
+    def __init__(self, rule=None, endgame_tb: EndgameTablebase = None):
+        self.rule = RuleKernel() if rule is None else rule
+        self.endgame_tb = EndgameTablebase(DEFAULT_TB_FILE) if endgame_tb is None else endgame_tb
+        self._algorithms = {
+            ROLLOUT: (self._rollout, True),
+            ALPHABETA: (self._alphabeta, True),
+            MCTS: (self._mcts, False),
+            ISMCTS: (self._ismcts, False),
+        }
+
+    def register(self, name: str, fn, perfect_information: bool) -> None:
+        """
+        Eigenen Algorithmus einhängen: fn(state, candidates, budget, rng, **options) → SearchResult.
+        """
+        self._algorithms[name] = (fn, perfect_information)
+
+    def evaluate(self, state, algorithm: str, budget=None, rng: np.random.Generator = None, **options):
+        """
+        Bewertet die gültigen Karten des Spielers am Zug.
+
+        Args:
+            state: GameState (perfekte Information) oder GameObservation (MCTS)
+            algorithm: ROLLOUT, ALPHABETA, MCTS, ISMCTS oder ein registrierter Name
+            budget: ROLLOUT: Playouts pro Kandidat, MCTS/ISMCTS: Iterationen, ALPHABETA: ungenutzt
+            rng: Zufallsgenerator (Standard: neuer, nicht reproduzierbarer)
+            options: algorithmusspezifische Optionen
+
+        Returns:
+            SearchResult
+        """
+        fn, perfect_information = self._algorithms[algorithm]
+        rng = np.random.default_rng() if rng is None else rng
+        start = time.perf_counter()
+
+        if perfect_information:
+            valid = np.flatnonzero(self.rule.get_valid_cards_from_state(state))
+        else:
+            valid = np.flatnonzero(self.rule.get_valid_cards_from_obs(state))
+
+        if valid.size == 1:
+            return SearchResult(valid[0], searched=False, nr_valid=1, elapsed=time.perf_counter() - start)
+
+        # Endspiel: exaktes Resultat, keine Suche nötig
+        if perfect_information and options.pop("endgame", True):
+            result = self.endgame_tb.probe(state)
+            if result is not None:
+                visits = np.zeros(36, dtype=np.int64)
+                totals = np.zeros(36, dtype=np.float64)
+                visits[result[1]] = 1
+                totals[result[1]] = result[0][team[state.player]]
+                return SearchResult(result[1], visits, totals, tablebase=True, nr_valid=int(valid.size),
+                                    elapsed=time.perf_counter() - start)
+
+        # ein Repräsentant pro Klasse gleichwertiger Karten
+        classes = equivalence_classes(valid, state.trump, gone_mask(state.tricks, state.nr_tricks))
+        if len(classes) == 1:
+            return SearchResult(min(classes[0]), searched=False, nr_valid=int(valid.size), nr_classes=1,
+                                elapsed=time.perf_counter() - start)
+        candidates = representatives(classes)
+
+        result = fn(state, candidates, budget, rng, **options)
+        result.stats["nr_valid"] = int(valid.size)
+        result.stats["nr_classes"] = len(classes)
+        result.stats["elapsed"] = time.perf_counter() - start
+        return result
+
+    # ---------------------------------------------------------
+    # ROLLOUT: Successive Halving mit zufälligen Playouts
+    # ---------------------------------------------------------
+    def _rollout(self, state, candidates: np.ndarray, budget: float, rng: np.random.Generator,
+                 simulator: str = "batch") -> SearchResult:
+        """
+        Budget = budget * #Kandidaten Playouts; pro Runde gleich viele Playouts für
+        jede verbleibende Karte, danach fliegt die schlechtere Hälfte raus.
+        Wert = durchschnittliche Endpunkte des eigenen Teams.
+
+        simulator: "batch" (vektorisiert, batch_playout) oder "gamesim" (GameSim-Schleife)
+        """
+        my_team = team[state.player]
+        playout = BatchPlayout(state) if simulator == "batch" else _GameSimPlayout(self, state)
+
+        total = np.zeros(36, dtype=np.float64)
+        count = np.zeros(36, dtype=np.int64)
+
+        total_budget = max(len(candidates), int(budget * len(candidates)))
+        nr_rounds = max(1, math.ceil(math.log2(len(candidates))))
+
+        for _ in range(nr_rounds):
+            per_card = max(1, total_budget // (nr_rounds * len(candidates)))
+            cards = np.repeat(candidates, per_card)
+
+            points = playout.run(cards, rng)[:, my_team]
+            total += np.bincount(cards, weights=points, minlength=36)
+            count += np.bincount(cards, minlength=36)
+
+            if len(candidates) > 1:
+                # bessere Hälfte behalten (stabil sortiert → bei Gleichstand tiefere Karte zuerst)
+                means = total[candidates] / count[candidates]
+                keep = (len(candidates) + 1) // 2
+                order = np.argsort(-means, kind='stable')[:keep]
+                candidates = np.sort(candidates[order])
+
+        means = total[candidates] / count[candidates]
+        card = int(candidates[int(np.argmax(means))])
+        return SearchResult(card, count, total, playouts=int(count.sum()))
+
+    # ---------------------------------------------------------
+    # ALPHABETA: laufender Stich, Bitmasken
+    # ---------------------------------------------------------
+    def _alphabeta(self, state, candidates: np.ndarray, budget, rng: np.random.Generator) -> SearchResult:
+        """
+        Alpha-Beta über den laufenden Stich. Wert = Punkte des Stichs,
+        positiv wenn das eigene Team ihn gewinnt, sonst negativ.
+        """
+        hands = hands_to_bits(state.hands)
+        n = state.nr_cards_in_trick
+        trick = [int(c) for c in state.tricks[state.nr_tricks, :n]]
+        first = int(state.trick_first_player[state.nr_tricks]) if n > 0 else int(state.player)
+        trump = int(state.trump)
+        my_team = team[state.player]
+        bonus = 5 if state.nr_tricks == 8 else 0
+
+        values = np.zeros(36, dtype=np.float64)
+        visits = np.zeros(36, dtype=np.int64)
+        nodes = [0]
+
+        player = state.player
+        hand = hands[player]
+        best_card = int(candidates[0])
+        best_value = -9999
+        for card in candidates:
+            card = int(card)
+            hands[player] = hand & ~CARD_BITS[card]
+            trick.append(card)
+            value = self._trick_alphabeta(hands, trick, first, trump, my_team, bonus, best_value, 9999, nodes)
+            trick.pop()
+            values[card] = value
+            visits[card] = 1
+            if value > best_value:
+                best_value = value
+                best_card = card
+        hands[player] = hand
+        return SearchResult(best_card, visits, values.copy(), values, nodes=nodes[0])
+
+    def _trick_alphabeta(self, hands, trick, first: int, trump: int, my_team: int, bonus: int,
+                         alpha: int, beta: int, nodes: list) -> int:
+        nodes[0] += 1
+        n = len(trick)
+        if n == 4:
+            strength = STRENGTH[trump][trick[0] // 9]
+            best_pos = 0
+            for pos in range(1, 4):
+                if strength[trick[pos]] > strength[trick[best_pos]]:
+                    best_pos = pos
+            points_table = CARD_POINTS[trump]
+            points = points_table[trick[0]] + points_table[trick[1]] + points_table[trick[2]] + \
+                points_table[trick[3]] + bonus
+            return points if team[(first - best_pos) % 4] == my_team else -points
+
+        player = (first - n) % 4
+        valid = valid_card_bits(hands[player], trick, trump)
+        if valid & (valid - 1):
+            alive = hands[0] | hands[1] | hands[2] | hands[3]
+            for card in trick:
+                alive |= CARD_BITS[card]
+            valid = reduce_card_bits(valid, alive, trump)
+
+        maximize = team[player] == my_team
+        hand = hands[player]
+        value = -9999 if maximize else 9999
+        while valid:
+            low = valid & -valid
+            valid ^= low
+            card = low.bit_length() - 1
+            hands[player] = hand & ~low
+            trick.append(card)
+            child = self._trick_alphabeta(hands, trick, first, trump, my_team, bonus, alpha, beta, nodes)
+            trick.pop()
+            if maximize:
+                value = max(value, child)
+                alpha = max(alpha, value)
+            else:
+                value = min(value, child)
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+        hands[player] = hand
+        return value
+
+    # ---------------------------------------------------------
+    # MCTS: Root-UCB über Determinizations
+    # ---------------------------------------------------------
+    def _mcts(self, obs, candidates: np.ndarray, budget: int, rng: np.random.Generator,
+              exploration_c: float = 1.4, endgame_tricks: int = 2, early_stop: bool = True,
+              convergence_check: int = 10, sampler=None, weighted: bool = False) -> SearchResult:
+        """
+        Root-MCTS mit Determinization:
+        - pro Iteration versteckte Hände sampeln (sampler(obs, rng), Standard: gleichverteilt
+          aus der Historie der Observation, GameSession.sample_hidden_hands)
+        - weighted: sampler gibt (hands, weight) zurück, der Wert einer Karte ist
+          dann der gewichtete Mittelwert (Importance Sampling), die Besuche zählen ungewichtet
+        - Karte mit UCB1 wählen, Rest zufällig (letzte Stiche exakt) fertig spielen
+        - Abbruch, sobald die meistbesuchte Karte nicht mehr überholt werden kann
+        Wert = Punktdifferenz eigenes Team - Gegner; gewählt wird die meistbesuchte Karte.
+        """
+        if sampler is None:
+            # Historie einmal pro Zug statt in jeder Iteration durchsuchen
+            session = GameSession(0)
+            session.update(obs)
+            sampler = session.sample_hidden_hands
+        valid_cards = candidates
+        my_team = team[obs.player]
+
+        # Statistik pro Karte (global über alle Determinizations)
+        N = np.zeros(36, dtype=np.int32)    # Besuchszahlen
+        W = np.zeros(36, dtype=np.float32)  # Summe der Rewards
+        S = np.zeros(36, dtype=np.float64) if weighted else N   # Summe der Gewichte
+
+        C = exploration_c
+        iterations = budget
+        nr_done = iterations
+
+        # State-Vorlage einmal pro Zug, pro Iteration werden nur die Hände gesetzt
+        template = StateTemplate(self.rule, obs)
+
+        for it in range(iterations):
+            # ---- 1) Determinization: versteckte Hände sampeln ----
+            weight = 1.0
+            if weighted:
+                hands, weight = sampler(obs, rng)
+            else:
+                hands = sampler(obs, rng)
+
+            # ---- 2) Selection: wähle Karte mit UCB1 ----
+            total_visits = 1 + N[valid_cards].sum()
+
+            best_ucb = -1e18
+            best_card = int(valid_cards[0])
+
+            for card in valid_cards:
+                n = N[card]
+                if n == 0:
+                    ucb = 1e9  # Erzwinge mind. 1 Besuch
+                else:
+                    exploit = W[card] / S[card]
+                    explore = C * np.sqrt(np.log(total_visits) / n)
+                    ucb = exploit + explore
+
+                if ucb > best_ucb:
+                    best_ucb = ucb
+                    best_card = int(card)
+
+            # ---- 3) Simulation: best_card spielen, Rest zufällig ----
+            sim = template.stamp(hands)
+            sim.action_play_card(best_card)
+            reward = self.random_rollout(sim, my_team, rng, endgame_tricks)
+
+            # ---- 4) Backpropagation ----
+            N[best_card] += 1
+            if weighted:
+                S[best_card] += weight
+                W[best_card] += weight * reward
+            else:
+                W[best_card] += reward
+
+            # ---- Konvergenz: kann die meistbesuchte Karte noch überholt werden? ----
+            done = it + 1
+            if early_stop and done >= valid_cards.size and done % convergence_check == 0:
+                top2 = np.partition(N[valid_cards], -2)[-2:]
+                if iterations - done < top2[1] - top2[0]:
+                    nr_done = done
+                    break
+
+        # Karte mit den meisten Besuchen
+        card = int(valid_cards[int(np.argmax(N[valid_cards]))])
+        if weighted:
+            # Summen so skalieren, dass totals / visits der gewichtete Mittelwert ist
+            values = np.zeros(36, dtype=np.float64)
+            np.divide(W, S, out=values, where=S > 0)
+            return SearchResult(card, N, (values * N).astype(np.float32), iterations=nr_done)
+        return SearchResult(card, N, W, iterations=nr_done)
+
+    # ---------------------------------------------------------
+    # ISMCTS: Baumsuche über Determinizations, Knoten im NodePool
+    # ---------------------------------------------------------
+    def _ismcts(self, obs, candidates: np.ndarray, budget: int, rng: np.random.Generator,
+                exploration_c: float = 1.4, endgame_tricks: int = 2, early_stop: bool = True,
+                convergence_check: int = 10, sampler=None, session: GameSession = None,
+                pool: NodePool = None, reuse: bool = True) -> SearchResult:
+        """
+        Single-Observer-ISMCTS: ein Baum über die Kartenfolgen ab der Stellung, pro
+        Iteration eine Determinization. Ein Knoten bekommt beim Expandieren Kinder für
+        alle Karten, die der Spieler am Zug haben kann (eigene Hand bzw. unbekannte,
+        nicht ausgeschlossene Karten); verfügbar sind davon nur die in der
+        Determinization gültigen (UCB mit Verfügbarkeits-Zähler statt Elternbesuchen).
+        Ab dem ersten unbesuchten Knoten zufälliger Rollout (letzte Stiche exakt).
+
+        - session: GameSession, auf obs nachgeführt (unbekannte und ausgeschlossene
+          Karten; Standard: neu aus obs)
+        - pool: NodePool (Standard: neuer mit DEFAULT_MAX_NODES); ist er voll, gilt
+          dessen full_policy
+        - reuse: Teilbaum unter den seit der letzten Suche im Pool gespielten Karten
+          weiterverwenden
+        Wert = Punktdifferenz eigenes Team - Gegner; gewählt wird die meistbesuchte Karte.
+        """
+        if session is None:
+            session = GameSession(0)
+            session.update(obs)
+        if sampler is None:
+            sampler = session.sample_hidden_hands
+        pool = NodePool() if pool is None else pool
+        me = int(obs.player)
+        my_team = team[me]
+        nr_played = int(obs.nr_played_cards)
+
+        # Wurzel: Teilbaum der letzten Suche übernehmen oder neu
+        reused = False
+        if reuse and 0 <= pool.root_nr_played <= nr_played and pool.size > 0:
+            cards_since = [int(c) for c in np.asarray(obs.tricks).reshape(-1)[pool.root_nr_played:nr_played]]
+            reused = pool.reroot(cards_since, nr_played)
+        else:
+            pool.reset(nr_played)
+        if pool.first_child[0] < 0 and not pool.add_children(0, candidates):
+            # übernommener Teilbaum füllt den Pool: neu beginnen
+            reused = False
+            pool.reset(nr_played)
+            pool.add_children(0, candidates)
+        nr_full_before = pool.nr_full
+
+        # mögliche Karten pro Spieler (Kinder beim Expandieren)
+        possible = np.zeros((4, 36), dtype=bool)
+        possible[:, session.unknown_cards] = True
+        possible &= ~session.excluded
+        possible[me] = np.asarray(obs.hand, dtype=bool)
+        is_candidate = np.zeros(36, dtype=bool)
+        is_candidate[candidates] = True
+
+        visits, avail, value = pool.visits, pool.avail, pool.value
+        C = exploration_c
+        template = StateTemplate(self.rule, obs)
+        nr_done = budget
+
+        for it in range(budget):
+            pool.make_room()
+            sim = template.stamp(sampler(obs, rng))
+            played = np.zeros(36, dtype=bool)
+            node = 0
+            path = []
+
+            # ---- Selection / Expansion ----
+            while True:
+                state = sim.state
+                if state.nr_played_cards >= 36:
+                    break
+                if node != 0 and state.nr_cards_in_trick == 0 and 9 - state.nr_tricks <= endgame_tricks:
+                    break
+                if pool.first_child[node] < 0:
+                    if node == 0:
+                        cards = candidates
+                    else:
+                        cards = np.flatnonzero(possible[state.player] & ~played)
+                    if not pool.add_children(node, cards):
+                        break
+                start = int(pool.first_child[node])
+                children = np.arange(start, start + int(pool.nr_children[node]))
+                valid = self.rule.get_valid_cards_from_state(state).astype(bool)
+                child_cards = pool.card[children]
+                available = valid[child_cards]
+                if node == 0:
+                    available &= is_candidate[child_cards]
+                children = children[available]
+                if children.size == 0:
+                    break
+                avail[children] += 1
+
+                unvisited = children[visits[children] == 0]
+                if unvisited.size > 0:
+                    child = int(unvisited[0])
+                else:
+                    n = visits[children].astype(np.float64)
+                    sign = 1.0 if team[state.player] == my_team else -1.0
+                    ucb = sign * value[children] / n + C * np.sqrt(np.log(avail[children]) / n)
+                    child = int(children[int(np.argmax(ucb))])
+
+                card = int(pool.card[child])
+                sim.action_play_card(card)
+                played[card] = True
+                path.append(child)
+                node = child
+                if unvisited.size > 0:
+                    break
+
+            # ---- Rollout und Backpropagation ----
+            reward = self.random_rollout(sim, my_team, rng, endgame_tricks)
+            if path:
+                visits[path] += 1
+                value[path] += reward
+
+            # ---- Konvergenz an der Wurzel ----
+            done = it + 1
+            if early_stop and done >= len(candidates) and done % convergence_check == 0:
+                root_visits = self._root_stats(pool, candidates)[0][candidates]
+                top2 = np.partition(root_visits, -2)[-2:]
+                if budget - done < top2[1] - top2[0]:
+                    nr_done = done
+                    break
+
+        N, W = self._root_stats(pool, candidates)
+        card = int(candidates[int(np.argmax(N[candidates]))])
+        return SearchResult(card, N, W, iterations=nr_done, nodes=pool.size, reused=reused,
+                            pool_full=pool.nr_full - nr_full_before)
+
+    @staticmethod
+    def _root_stats(pool: NodePool, candidates: np.ndarray):
+        """
+        Besuche und Wertsummen der Kinder der Wurzel pro Karte (36,).
+        """
+        N = np.zeros(36, dtype=np.int32)
+        W = np.zeros(36, dtype=np.float32)
+        start = int(pool.first_child[0])
+        if start >= 0:
+            children = np.arange(start, start + int(pool.nr_children[0]))
+            cards = pool.card[children].astype(np.int64)
+            N[cards] = pool.visits[children]
+            W[cards] = pool.value[children]
+        keep = np.zeros(36, dtype=bool)
+        keep[candidates] = True
+        N[~keep] = 0
+        W[~keep] = 0.0
+        return N, W
+
+    def random_rollout(self, sim: GameSim, my_team: int, rng: np.random.Generator, endgame_tricks: int) -> float:
+        """
+        Rollout: spielt den Simulator (in-place) zufällig zu Ende und gibt
+        (Punkte_mein_Team - Punkte_anderes_Team) zurück.
+        Die letzten endgame_tricks Stiche werden exakt über die Tablebase gelöst.
+        """
+        points = None
+        while not sim.is_done():
+            # Endspiel erreicht → exaktes Resultat statt Zufall
+            if sim.state.nr_cards_in_trick == 0 and 9 - sim.state.nr_tricks <= endgame_tricks:
+                result = self.endgame_tb.probe(sim.state, endgame_tricks)
+                if result is not None:
+                    points = result[0]
+                    break
+
+            valid_indices = np.flatnonzero(self.rule.get_valid_cards_from_state(sim.state))
+            if valid_indices.size == 0:
+                break
+            sim.action_play_card(int(rng.choice(valid_indices)))
+
+        if points is None:
+            points = sim.state.points
+
+        points0 = int(points[0])
+        points1 = int(points[1])
+        return float(points0 - points1) if my_team == 0 else float(points1 - points0)
+
+
+class _GameSimPlayout:
+    """
+    Gleiche Schnittstelle wie BatchPlayout, aber eine GameSim-Schleife pro Playout.
+    """
+
+    def __init__(self, engine: SearchEngine, state):
+        self._engine = engine
+        self._state = state
+
+    def run(self, first_cards: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        points = np.zeros((len(first_cards), 2), dtype=np.int64)
+        for i, card in enumerate(first_cards):
+            sim = GameSim(rule=self._engine.rule)
+            sim.init_from_state(self._state)
+            sim.action_play_card(int(card))
+            while not sim.is_done():
+                valid = np.flatnonzero(self._engine.rule.get_valid_cards_from_state(sim.state))
+                sim.action_play_card(int(rng.choice(valid)))
+            points[i] = sim.state.points
+        return points
+
+
+_shared_engine = None
+
+
+def shared_engine() -> SearchEngine:
+    """
+    Eine Engine pro Prozess: alle Agenten teilen Tablebase und Cache.
+    """
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = SearchEngine()
+    return _shared_engine
@@ -0,0 +1,77 @@
+# seeding.py
+#
+# Reproduzierbare Zufallszahlen für die Agenten.
+#
+# Aus einem Master-Seed werden per np.random.SeedSequence unabhängige Seeds pro
+# Agent, pro Spiel und pro Zug abgeleitet:
+#
+#   SeedSequence(entropy=master_seed, spawn_key=(agent_id, game_key, move_nr))
+#
+# game_key und move_nr werden nur aus der Observation (bzw. dem GameState)
+# berechnet. Damit lässt sich jeder Zug allein aus Observation + Master-Seed
+# bit-genau wiederholen, auch wenn ein Agent im Service viele Spiele parallel
+# bearbeitet.
+
+import numpy as np
+
+
+# move_nr für die Trumpfwahl (Kartenzüge sind 0..35)
+TRUMP_MOVE_FOREHAND = 36
+TRUMP_MOVE_REARHAND = 37
+
+_CARD_WEIGHTS = 1 << np.arange(36, dtype=np.uint64)
+
+
+def new_master_seed() -> int:
+    """
+    Neuer zufälliger Master-Seed (128 Bit), wenn der Agent ohne Seed erstellt wird.
+    """
+    return int(np.random.SeedSequence().entropy) & ((1 << 128) - 1)
+
+
+def initial_hand_bits(hand: np.ndarray, tricks: np.ndarray, trick_first_player: np.ndarray,
+                      nr_played_cards: int, player: int) -> int:
+    """
+    Starthand eines Spielers als Bitmaske: aktuelle Hand plus alle Karten,
+    die der Spieler bereits gespielt hat.
+    """
+    bits = int(np.dot(hand.astype(np.uint64), _CARD_WEIGHTS))
+    for i in range(nr_played_cards):
+        t, pos = divmod(i, 4)
+        first = trick_first_player[t]
+        if first == -1:
+            continue
+        if (first - pos) % 4 == player:
+            bits |= 1 << int(tricks[t, pos])
+    return bits
+
+
+def game_key(obs) -> int:
+    """
+    Schlüssel eines Spiels aus Sicht des Spielers am Zug (Starthand + Geber).
+    Funktioniert für GameObservation und GameState.
+    """
+    player = obs.player
+    hand = obs.hand if hasattr(obs, 'hand') else obs.hands[player]
+    bits = initial_hand_bits(hand, obs.tricks, obs.trick_first_player, obs.nr_played_cards, player)
+    return (bits << 2) | int(obs.dealer)
+
+
+def move_nr(obs) -> int:
+    """
+    Nummer des Zuges im Spiel: 0..35 für Karten, 36/37 für die Trumpfwahl.
+    """
+    if obs.trump == -1:
+        return TRUMP_MOVE_REARHAND if obs.forehand == 0 else TRUMP_MOVE_FOREHAND
+    return int(obs.nr_played_cards)
+
+
+def move_seed_sequence(master_seed: int, agent_id: int, key: int, move: int) -> np.random.SeedSequence:
+    return np.random.SeedSequence(entropy=master_seed, spawn_key=(agent_id, key, move))
+
+
+def move_rng(master_seed: int, agent_id: int, obs) -> np.random.Generator:
+    """
+    Zufallsgenerator für genau diesen Zug dieses Agenten in diesem Spiel.
+    """
+    return np.random.default_rng(move_seed_sequence(master_seed, agent_id, game_key(obs), move_nr(obs)))
@@ -0,0 +1,197 @@
+# selfplay.py
+#
+# Self-Play-Farm: erzeugt Trainingsdaten aus Spielen zwischen unseren Agenten.
+#
+# - Sitzplätze frei konfigurierbar: complex (MyAgentcomplex), mc (MonteCarloTrickAgent),
+#   random (AgentRandomSchieber)
+# - Spiele laufen in einem Prozess-Pool über alle Kerne, jeder Job spielt einen Shard
+# - Ausgabe im Shard-Format von trump_data.py (Data/selfplay_shards/shard_*.npz):
+#     hands, y, fh_hands, pushed   wie bei den Swisslos-Daten (direkt für train_trump_model.py)
+#     start_hands (N, 4, 9)         Starthände aller Spieler (gepackt)
+#     dealer, trump, declarer       (N,)
+#     tricks (N, 9, 4), trick_first_player (N, 9), points (N, 2)
+#     visits (N, 36, 36), values (N, 36, 36)
+#         Suchstatistik pro Kartenzug: Zeile = Zug 0..35, Spalte = Karte,
+#         N = Besuche/Playouts, W = Summe der Werte (Einheit je nach Agent, siehe agents)
+#     agents (N, 4)                 Agent-Name pro Sitzplatz
+# - Wiederaufnehmbar: Master-Seed und Konfiguration stehen in selfplay.json im
+#   Ausgabeordner, jeder Shard hängt nur von (Master-Seed, Shard-Nummer) ab.
+#   Ein neuer Lauf spielt nur die noch fehlenden Shards.
+#
+# Aufruf:
+#   python selfplay.py --games 10000 --agents complex random complex random
+#   python selfplay.py --out Data/selfplay_shards        # abgebrochenen Lauf fortsetzen
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from jass.agents.agent_cheating import AgentCheating
+from jass.game.const import PUSH, next_player
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+from jass.game.rule_schieber import RuleSchieber
+
+from seeding import new_master_seed
+from trump_data import list_shards, pack_hands, shard_path, write_shards
+
+DEFAULT_OUT_DIR = "Data/selfplay_shards"
+MANIFEST_FILE = "selfplay.json"
+
+AGENT_NAMES = ("complex", "mc", "random")
+
+# spawn_key-Präfix für die Farm (Agenten verwenden (agent_id, game_key, move_nr))
+SELFPLAY_KEY = 1 << 32
+
+
+def make_agent(name: str, master_seed: int, seat: int, rng: np.random.Generator):
+    """
+    Agent für einen Sitzplatz. Die Such-Agenten leiten ihre Seeds pro Zug selbst
+    aus (master_seed, seat, Spiel, Zug) ab, der Random-Agent bekommt einen eigenen RNG.
+    """
+    if name == "complex":
+        from my_agentcomplex import MyAgentcomplex
+        return MyAgentcomplex(seed=master_seed, agent_id=seat)
+    if name == "mc":
+        from MCTS_Cheating import MonteCarloTrickAgent
+        return MonteCarloTrickAgent(seed=master_seed, agent_id=seat)
+    if name == "random":
+        from jass.agents.agent_random_schieber import AgentRandomSchieber
+        agent = AgentRandomSchieber()
+        agent._rng = np.random.default_rng(rng.integers(1 << 63))
+        return agent
+    raise ValueError(f"Unbekannter Agent: {name} (erlaubt: {', '.join(AGENT_NAMES)})")
+
+
+def play_game(sim: GameSim, agents: list, hands: np.ndarray, dealer: int, move_seconds: np.ndarray = None) -> dict:
+    """
+    Spielt ein Spiel wie die Arena und zeichnet pro Kartenzug die Suchstatistik auf.
+    Mit move_seconds (36,) wird zusätzlich die Rechenzeit jedes Kartenzugs eingetragen.
+    """
+    sim.init_from_cards(hands, dealer)
+
+    def ask(player):
+        agent = agents[player]
+        return agent, (sim.state if isinstance(agent, AgentCheating) else sim.get_observation())
+
+    agent, obs = ask(sim.state.player)
+    action = agent.action_trump(obs)
+    sim.action_trump(action)
+    if action == PUSH:
+        agent, obs = ask(sim.state.player)
+        sim.action_trump(agent.action_trump(obs))
+
+    visits = np.zeros((36, 36), dtype=np.uint16)
+    values = np.zeros((36, 36), dtype=np.float32)
+    for move in range(36):
+        agent, obs = ask(sim.state.player)
+        start = time.perf_counter()
+        card = agent.action_play_card(obs)
+        if move_seconds is not None:
+            move_seconds[move] = time.perf_counter() - start
+        stats = getattr(agent, "last_search_stats", None)
+        if stats is not None:
+            visits[move] = np.minimum(stats[0], np.iinfo(np.uint16).max)
+            values[move] = stats[1]
+        sim.action_play_card(card)
+
+    state = sim.state
+    return dict(start_hands=pack_hands(hands), dealer=dealer, trump=state.trump, declarer=state.declared_trump,
+                pushed=int(state.forehand == 0), tricks=state.tricks.copy(),
+                trick_first_player=state.trick_first_player.copy(), points=state.points.copy(),
+                visits=visits, values=values)
+
+
+def play_shard(out_dir: str, index: int, nr_games: int, agent_names: list, master_seed: int):
+    """
+    Einstiegspunkt für den Prozess-Pool: spielt nr_games Spiele und schreibt Shard index.
+
+    Returns:
+        (index, Anzahl Spiele, Sekunden)
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(np.random.SeedSequence(entropy=master_seed, spawn_key=(SELFPLAY_KEY, index)))
+    agents = [make_agent(name, master_seed, seat, rng) for seat, name in enumerate(agent_names)]
+    sim = GameSim(rule=RuleSchieber())
+
+    games = []
+    for game_nr in range(nr_games):
+        # Karten mischen mit dem Shard-RNG (deal_random_hand verwendet np.random)
+        np.random.seed(rng.integers(1 << 32))
+        hands = deal_random_hand()
+        games.append(play_game(sim, agents, hands, dealer=(index * nr_games + game_nr) % 4))
+
+    records = {key: np.stack([np.asarray(game[key]) for game in games]) for key in games[0]}
+    start_hands = records["start_hands"]
+    rows = np.arange(nr_games)
+    forehand = np.asarray(next_player)[records["dealer"]]
+    write_shards(out_dir, start_hands[rows, records["declarer"]], records["trump"], start_index=index, min_shards=1,
+                 fh_hands=start_hands[rows, forehand], agents=np.array([agent_names] * nr_games),
+                 **{key: value.astype(np.int8) if key in ("dealer", "trump", "declarer", "pushed", "tricks",
+                                                          "trick_first_player") else value
+                    for key, value in records.items()})
+    return index, nr_games, time.perf_counter() - start
+
+
+def load_manifest(out_dir: str, args) -> dict:
+    """
+    Konfiguration des Laufs: aus selfplay.json (Fortsetzen) oder neu aus den Argumenten.
+    """
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        print(f"Setze Lauf fort: {path} (Agenten {manifest['agents']}, Seed {manifest['master_seed']})")
+        if args.games is not None:
+            manifest["nr_shards"] = -(-args.games // manifest["games_per_shard"])
+    else:
+        master_seed = new_master_seed() if args.seed is None else args.seed
+        games = 1000 if args.games is None else args.games
+        manifest = dict(agents=args.agents, master_seed=master_seed, games_per_shard=args.games_per_shard,
+                        nr_shards=-(-games // args.games_per_shard))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-Play-Daten erzeugen")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="Ausgabeordner")
+    parser.add_argument("--games", type=int, default=None, help="Anzahl Spiele insgesamt (Standard 1000)")
+    parser.add_argument("--agents", nargs=4, default=["complex", "random", "complex", "random"],
+                        choices=AGENT_NAMES, help="Agent pro Sitzplatz 0..3")
+    parser.add_argument("--games-per-shard", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=None, help="Master-Seed (Standard: zufällig)")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.out, args)
+    done = {int(os.path.basename(path)[6:11]) for path in list_shards(args.out)}
+    todo = [i for i in range(manifest["nr_shards"]) if i not in done]
+    print(f"{len(done)} Shards vorhanden, {len(todo)} zu spielen "
+          f"({manifest['games_per_shard']} Spiele pro Shard, {args.workers} Prozesse)")
+
+    start = time.perf_counter()
+    nr_games = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        jobs = [pool.submit(play_shard, args.out, i, manifest["games_per_shard"], manifest["agents"],
+                            manifest["master_seed"]) for i in todo]
+        for job in as_completed(jobs):
+            index, games, seconds = job.result()
+            nr_games += games
+            elapsed = time.perf_counter() - start
+            print(f"{shard_path(args.out, index)}: {games} Spiele in {seconds:.1f}s, "
+                  f"gesamt {nr_games} Spiele, {nr_games / elapsed * 3600:.0f} Spiele/h")
+
+    elapsed = time.perf_counter() - start
+    if nr_games:
+        print(f"Fertig: {nr_games} Spiele in {elapsed:.1f}s = {nr_games / elapsed * 3600:.0f} Spiele/h")
+
+
+if __name__ == "__main__":
+    main()
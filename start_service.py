@@ -1,10 +1,46 @@
 import os
+from flask import jsonify
 from jass.service.player_service_app import PlayerServiceApp
 from my_agent import MyAgent
 from my_agentcomplex import MyAgentcomplex
+from inference_batcher import InferenceBatcher
+from game_session import SessionStore
 
 app = PlayerServiceApp(__name__)
-app.add_player('GruppeMarcoPatrik', MyAgentcomplex())
+agent = MyAgentcomplex()
+app.add_player('GruppeMarcoPatrik', agent)
+
+# Zustand pro Spiel zwischen den Anfragen behalten
+# (nach SESSION_IDLE_TIMEOUT_S ohne Zug gelöscht, höchstens SESSION_MAX_MB insgesamt)
+sessions = SessionStore(idle_timeout=float(os.environ.get("SESSION_IDLE_TIMEOUT_S", 600)),
+                        max_bytes=int(float(os.environ.get("SESSION_MAX_MB", 64)) * 1024 * 1024))
+agent.set_session_store(sessions)
+
+# Baumsuche mit SEARCH_TREE_NODES Knoten pro Spiel (0 = aus, Root-MCTS);
+# SEARCH_TREE_POLICY: "stop" oder "recycle", wenn der Pool voll ist;
+# SEARCH_TREE_REUSE=0: Teilbaum nicht weiterverwenden (jeder Zug bleibt im Replay nachrechenbar)
+search_tree_nodes = int(os.environ.get("SEARCH_TREE_NODES", 0))
+if search_tree_nodes > 0:
+    agent.enable_tree_search(max_nodes=search_tree_nodes,
+                             full_policy=os.environ.get("SEARCH_TREE_POLICY", "stop"),
+                             reuse=os.environ.get("SEARCH_TREE_REUSE", "1") != "0")
+
+# Trumpf-Anfragen aller Tische gebündelt durch das Fused-Modell rechnen
+# (INFERENCE_BATCH_SIZE Anfragen oder INFERENCE_MAX_LATENCY_MS Wartezeit)
+trump_batcher = None
+if agent._fused_model is not None:
+    trump_batcher = InferenceBatcher(agent._fused_model.predict,
+                                     max_batch_size=int(os.environ.get("INFERENCE_BATCH_SIZE", 32)),
+                                     max_latency=float(os.environ.get("INFERENCE_MAX_LATENCY_MS", 2)) / 1000,
+                                     name="trump")
+    agent.set_trump_batcher(trump_batcher)
+
+
+@app.route('/metrics')
+def metrics():
+    return jsonify(inference=[trump_batcher.metrics()] if trump_batcher is not None else [],
+                   sessions=sessions.metrics())
+
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,65 @@
+# state_template.py
+#
+# Schneller Aufbau der Determinization-States für die Suche.
+#
+# state_from_observation(obs, hands) + GameSim.init_from_state(state) kopiert pro
+# Iteration die komplette Stich-Historie (deepcopy). Dabei unterscheiden sich die
+# Determinizations eines Zuges nur in den versteckten Händen. StateTemplate baut
+# den State deshalb einmal pro Zug aus der Observation und setzt vor jeder
+# Iteration nur die Hände und die veränderlichen Felder (ab dem laufenden Stich)
+# in einem vorab allozierten GameSim zurück.
+
+import numpy as np
+
+from jass.game.game_rule import GameRule
+from jass.game.game_sim import GameSim
+from jass.game.game_state_util import state_from_observation
+
+
+class StateTemplate:
+    """
+    Vorlage für alle Determinizations eines Zuges.
+    """
+
+    def __init__(self, rule: GameRule, obs):
+        self._template = state_from_observation(obs, np.zeros((4, 36), dtype=np.int32))
+
+        # Arbeits-Simulator: einmalige Kopie der Vorlage, danach nur noch in-place Updates
+        self._sim = GameSim(rule=rule)
+        self._sim.init_from_state(self._template)
+
+    @property
+    def template(self):
+        return self._template
+
+    def stamp(self, hands: np.ndarray) -> GameSim:
+        """
+        Setzt den Arbeits-Simulator auf die Vorlage mit den gegebenen Händen zurück.
+
+        Nur der laufende und die folgenden Stiche werden zurückgesetzt, da
+        abgeschlossene Stiche in einer Simulation nicht verändert werden.
+
+        Args:
+            hands: (4, 36) Hände aller Spieler
+
+        Returns:
+            der (wiederverwendete) GameSim, bereit für action_play_card
+        """
+        tpl = self._template
+        state = self._sim.state
+        t = tpl.nr_tricks
+
+        state.hands[:, :] = hands
+        state.tricks[t:, :] = tpl.tricks[t:, :]
+        state.trick_winner[t:] = tpl.trick_winner[t:]
+        state.trick_points[t:] = tpl.trick_points[t:]
+        state.trick_first_player[t:] = tpl.trick_first_player[t:]
+        state.points[:] = tpl.points
+
+        state.player = tpl.player
+        state.nr_tricks = t
+        state.nr_cards_in_trick = tpl.nr_cards_in_trick
+        state.nr_played_cards = tpl.nr_played_cards
+        state.current_trick = state.tricks[t] if tpl.nr_played_cards < 36 else None
+
+        return self._sim
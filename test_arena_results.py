@@ -0,0 +1,75 @@
+# test_arena_results.py
+#
+# Prüft die Resultat-Ablage der Evaluation (arena_results.py):
+# - angehängte Spiele kommen unverändert zurück, auch über mehrere Writer hinweg
+# - eine angefangene Zeile (Abbruch beim Schreiben) wird verworfen
+# - Auswertung in kleinen Blöcken = direkte Rechnung auf allen Spielen
+# - Latenz-Perzentile aus dem Histogramm stimmen auf ~1% mit np.percentile
+
+import os
+import tempfile
+
+import numpy as np
+
+from arena_results import ResultWriter, open_columns, summarize
+
+
+def random_row(rng, game: int) -> dict:
+    points = int(rng.integers(0, 158))
+    return dict(game=game, seed=int(rng.integers(1 << 32)), seats=rng.integers(0, 3, size=4),
+                dealer=game % 4, trump=int(rng.integers(6)), declarer=int(rng.integers(4)),
+                pushed=int(rng.integers(2)), points=[points, 157 - points],
+                move_ms=rng.lognormal(0.0, 2.0, size=(4, 9)).astype(np.float32))
+
+
+def main():
+    rng = np.random.default_rng(3)
+    with tempfile.TemporaryDirectory() as results_dir:
+        rows = []
+        for run in range(2):
+            writer = ResultWriter(results_dir, master_seed=7)
+            for name in ("complex", "mc", "random"):
+                writer.agent_code(name)
+            first = writer.reserve_games(500)
+            for game in range(first, first + 500):
+                rows.append(random_row(rng, game))
+                writer.append(**rows[-1])
+            writer.close()
+
+        # Abbruch mitten im Schreiben: nur ein Teil der Spalten hat die nächste Zeile
+        with open(os.path.join(results_dir, "game.bin"), "ab") as f:
+            f.write(np.uint64(1000).tobytes())
+        manifest, columns = open_columns(results_dir)
+        assert columns["game"].shape[0] == 1000 and manifest["next_game"] == 1000
+        ResultWriter(results_dir).close()
+        assert os.path.getsize(os.path.join(results_dir, "game.bin")) == 1000 * 8
+
+        for name in rows[0]:
+            expected = np.array([row[name] for row in rows])
+            assert np.array_equal(np.asarray(columns[name]), expected.astype(columns[name].dtype)), name
+        print(f"{len(rows)} Spiele zurückgelesen, angefangene Zeile verworfen")
+
+        # Auswertung in Blöcken gegen direkte Rechnung
+        summary, manifest = summarize(results_dir, chunk=77)
+        seats = np.array([row["seats"] for row in rows])
+        points = np.array([row["points"] for row in rows])
+        diff = points[:, 0] - points[:, 1]
+        for (team0, team1), (n, wins, s, _) in summary.matchups.items():
+            mask = np.all(seats == [team0[0], team1[0], team0[1], team1[1]], axis=1)
+            assert n == mask.sum()
+            assert np.isclose(wins, np.sum(diff[mask] > 0) + 0.5 * np.sum(diff[mask] == 0))
+            assert np.isclose(s, diff[mask].sum())
+        assert sum(acc[0] for acc in summary.matchups.values()) == len(rows)
+
+        move_ms = np.array([row["move_ms"] for row in rows])
+        for code in range(3):
+            latencies = move_ms[np.broadcast_to(seats[:, :, None], move_ms.shape) == code]
+            expected = np.percentile(latencies, [50, 95, 99, 100], method="inverted_cdf")
+            measured = summary.latency_percentiles(code)
+            assert np.allclose(measured, expected, rtol=0.01), (measured, expected)
+        print(f"Auswertung in Blöcken: {len(summary.matchups)} Paarungen, Perzentile auf 1% genau")
+        summary.print(manifest["agents"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# test_endgame_tablebase.py
+#
+# Prüft die Endspiel-Tablebase gegen eine vollständige Minimax-Suche mit GameSim
+# und schreibt/liest eine kleine Tablebase-Datei.
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+from jass.game.rule_schieber import RuleSchieber
+from endgame_tablebase import EndgameTablebase, build_tablebase
+
+
+def brute_force_points_team_0(rule, sim) -> int:
+    """
+    Exakte Punkte von Team 0 am Spielende über vollständigen Minimax mit GameSim.
+    """
+    state = sim.state
+    if state.nr_played_cards == 36:
+        return int(state.points[0])
+
+    values = []
+    for card in np.flatnonzero(rule.get_valid_cards_from_state(state)):
+        child = GameSim(rule=rule)
+        child.init_from_state(state)
+        child.action_play_card(int(card))
+        values.append(brute_force_points_team_0(rule, child))
+
+    return max(values) if state.player % 2 == 0 else min(values)
+
+
+def random_endgame(rule, rng, min_played: int) -> GameSim:
+    sim = GameSim(rule=rule)
+    sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+    sim.action_trump(int(rng.integers(6)))
+    stop = int(rng.integers(min_played, 36))
+    while sim.state.nr_played_cards < stop:
+        valid = np.flatnonzero(rule.get_valid_cards_from_state(sim.state))
+        sim.action_play_card(int(rng.choice(valid)))
+    return sim
+
+
+def main():
+    np.random.seed(0)
+    rng = np.random.default_rng(0)
+    rule = RuleSchieber()
+
+    nr_positions = 200
+    tb = EndgameTablebase()
+
+    start = time.time()
+    for _ in range(nr_positions):
+        sim = random_endgame(rule, rng, 24)
+        result = tb.probe(sim.state)
+        assert result is not None
+        points, best_card = result
+
+        expected = brute_force_points_team_0(rule, sim)
+        assert points[0] == expected, (points, expected)
+        assert points.sum() == 157
+
+        # die gelieferte Karte muss den exakten Wert auch erreichen
+        child = GameSim(rule=rule)
+        child.init_from_state(sim.state)
+        child.action_play_card(best_card)
+        assert brute_force_points_team_0(rule, child) == expected
+
+    print(f"{nr_positions} Endspiele korrekt gelöst ({time.time() - start:.1f}s)")
+
+    # Datei schreiben und wieder einlesen (memory-mapped)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tb.bin')
+        count = build_tablebase(path, max_tricks=3, nr_positions=500, seed=1)
+        tb_file = EndgameTablebase(path)
+        assert tb_file.nr_file_entries == count
+
+        np.random.seed(1)
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            sim = random_endgame(rule, rng, 24)
+            assert tb_file.probe(sim.state)[0][0] == tb.probe(sim.state)[0][0]
+
+        print(f"Tablebase-Datei: {count} Einträge, {tb_file.nr_file_hits} Treffer aus der Datei")
+
+
+if __name__ == "__main__":
+    main()
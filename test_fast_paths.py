@@ -0,0 +1,306 @@
+# test_fast_paths.py
+#
+# Differenzieller Test aller schnellen Pfade gegen jass-kit (GameSim / RuleSchieber)
+# und Durchsatz-Schranke gegen eine gespeicherte Baseline.
+#
+# 1) Zufallsspiele (zufällige Karten, Trumpf, Geber und gültige Züge), bei jedem Zug:
+#    - gültige Karten: RuleKernel, valid_card_bits, valid_cards_batch = RuleSchieber
+#    - GameHistory (inkrementell nachgeführt) = Spielstand von GameSim
+#    - Determinizations (GameSession, OpponentModelSampler) passen zum Spielstand
+#    nach jedem Stich Gewinner und Punkte über STRENGTH / CARD_POINTS = GameSim,
+#    bei 2 restlichen Stichen Tablebase = Minimax mit GameSim
+# 2) BatchPlayout ab zufälligen Stellungen: jedes aufgezeichnete Playout wird in
+#    GameSim nachgespielt, jede Karte muss gültig sein, Endpunkte gleich
+# 3) Durchsatz der schnellen Pfade als Speedup gegenüber der jass-kit-Referenz im
+#    gleichen Lauf (damit unabhängig von der Maschine). Fehler, wenn ein Speedup
+#    mehr als die Toleranz unter der Baseline (perf_baseline.json) liegt.
+#
+# Jedes Spiel hängt nur von (Seed, Spielnummer) ab; bei einer Abweichung steht der
+# Aufruf zum Nachspielen in der Fehlermeldung.
+#
+#   python test_fast_paths.py                          # 300 Spiele + Durchsatz
+#   python test_fast_paths.py --games 20000 --no-perf
+#   python test_fast_paths.py --seed 1 --game 17       # ein Spiel nachspielen
+#   python test_fast_paths.py --update-baseline        # Baseline neu schreiben
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from jass.game.const import color_of_card
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+from jass.game.rule_schieber import RuleSchieber
+
+from batch_playout import BatchPlayout
+from endgame_tablebase import CARD_POINTS, STRENGTH, EndgameTablebase, hands_to_bits
+from game_history import GameHistory
+from game_session import GameSession
+from opponent_model import OpponentModelSampler
+from rule_kernel import RuleKernel, valid_card_bits, valid_cards_batch
+from search_engine import _GameSimPlayout, SearchEngine
+from test_endgame_tablebase import brute_force_points_team_0
+from test_rule_kernel import random_positions
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_baseline.json")
+DEFAULT_TOLERANCE = 0.3
+PLAYOUTS_PER_POSITION = 16
+
+
+class Mismatch(AssertionError):
+    pass
+
+
+def check(condition: bool, context: str, what: str) -> None:
+    if not condition:
+        raise Mismatch(f"{what} ({context})")
+
+
+# ---------------------------------------------------------
+# 1) Zufallsspiele Zug für Zug
+# ---------------------------------------------------------
+
+def check_game(seed: int, game: int, reference: RuleSchieber, kernel: RuleKernel, tb: EndgameTablebase) -> int:
+    """
+    Spielt ein Zufallsspiel und vergleicht bei jedem Zug. Gibt die Anzahl Züge zurück.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(entropy=seed, spawn_key=(game,)))
+    np.random.seed(int(rng.integers(1 << 32)))
+    sim = GameSim(rule=reference)
+    sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+    sim.action_trump(int(rng.integers(6)))
+    trump = int(sim.state.trump)
+    history = GameHistory()
+    session = GameSession(game)
+
+    while not sim.is_done():
+        state = sim.state
+        context = f"--seed {seed} --game {game}, Zug {state.nr_played_cards}"
+        hand = state.hands[state.player]
+        n = int(state.nr_cards_in_trick)
+        trick = [int(c) for c in state.current_trick[:n]]
+
+        # gültige Karten
+        expected = reference.get_valid_cards_from_state(state).astype(bool)
+        check(np.array_equal(kernel.get_valid_cards_from_state(state).astype(bool), expected), context,
+              "RuleKernel.get_valid_cards")
+        bits = valid_card_bits(hands_to_bits(state.hands)[state.player], trick, trump)
+        check(bits == sum(1 << int(c) for c in np.flatnonzero(expected)), context, "valid_card_bits")
+        batch = valid_cards_batch(hand[None, :].astype(bool), np.maximum(state.current_trick, 0)[None, :], n, trump)
+        check(np.array_equal(batch[0], expected), context, "valid_cards_batch")
+
+        # Historie
+        history.update(state)
+        check(np.array_equal(history.points, state.points), context, "GameHistory.points")
+        check(np.array_equal(9 - history.nr_played, state.hands.sum(axis=1)), context, "GameHistory.nr_played")
+        check(not np.any(history.excluded & state.hands.astype(bool)), context, "GameHistory.excluded")
+
+        # Determinizations
+        obs = sim.get_observation()
+        session.update(obs)
+        hidden = state.hands.sum(axis=1)
+        hands = session.sample_hidden_hands(obs, rng)
+        check(np.array_equal(hands.sum(axis=1), hidden) and np.array_equal(hands[state.player], hand)
+              and np.array_equal(hands.sum(axis=0), state.hands.sum(axis=0)), context, "GameSession.sample_hidden_hands")
+        sampler = OpponentModelSampler(obs, session)
+        hands, weight = sampler(obs, rng)
+        check(np.array_equal(hands.sum(axis=1), hidden) and np.array_equal(hands.sum(axis=0), state.hands.sum(axis=0))
+              and weight > 0.0, context, "OpponentModelSampler")
+        if sampler.nr_conflicts == 0:
+            check(not np.any(session.excluded & hands.astype(bool)), context, "OpponentModelSampler.excluded")
+
+        # Tablebase bei 2 restlichen Stichen
+        if state.nr_played_cards == 28:
+            result = tb.probe(state, 2)
+            check(result is not None and int(result[0][0]) == brute_force_points_team_0(reference, sim), context,
+                  "EndgameTablebase.probe")
+
+        card = int(rng.choice(np.flatnonzero(expected)))
+        sim.action_play_card(card)
+
+        # abgeschlossener Stich: Gewinner und Punkte
+        if n == 3:
+            t = sim.state.nr_tricks - 1
+            cards = [int(c) for c in sim.state.tricks[t]]
+            strength = STRENGTH[trump][color_of_card[cards[0]]]
+            winner_pos = max(range(4), key=lambda pos: strength[cards[pos]])
+            first = int(sim.state.trick_first_player[t])
+            points = sum(CARD_POINTS[trump][c] for c in cards) + (5 if t == 8 else 0)
+            check((first - winner_pos) % 4 == sim.state.trick_winner[t], context, "Stichgewinner (STRENGTH)")
+            check(points == sim.state.trick_points[t], context, "Stichpunkte (CARD_POINTS)")
+
+    history.update(sim.state)
+    check(np.array_equal(history.points, sim.state.points), f"--seed {seed} --game {game}", "Endpunkte")
+    return 36
+
+
+# ---------------------------------------------------------
+# 2) BatchPlayout gegen GameSim
+# ---------------------------------------------------------
+
+def check_batch_playouts(seed: int, game: int, reference: RuleSchieber) -> int:
+    """
+    Spielt aufgezeichnete Batch-Playouts ab einer zufälligen Stellung in GameSim nach.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(entropy=seed, spawn_key=(game, 1)))
+    np.random.seed(int(rng.integers(1 << 32)))
+    sim = GameSim(rule=reference)
+    sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+    sim.action_trump(int(rng.integers(6)))
+    stop = int(rng.integers(0, 36))
+    while sim.state.nr_played_cards < stop:
+        sim.action_play_card(int(rng.choice(np.flatnonzero(reference.get_valid_cards_from_state(sim.state)))))
+
+    state = sim.state
+    first_cards = rng.choice(np.flatnonzero(reference.get_valid_cards_from_state(state)), PLAYOUTS_PER_POSITION)
+    played = np.zeros((PLAYOUTS_PER_POSITION, 36 - state.nr_played_cards), dtype=np.int64)
+    points = BatchPlayout(state).run(first_cards, rng, played=played)
+
+    for i in range(PLAYOUTS_PER_POSITION):
+        context = f"--seed {seed} --game {game}, BatchPlayout ab Zug {state.nr_played_cards}, Playout {i}"
+        replay = GameSim(rule=reference)
+        replay.init_from_state(state)
+        for card in played[i]:
+            check(reference.get_valid_cards_from_state(replay.state)[card], context, f"ungültige Karte {card}")
+            replay.action_play_card(int(card))
+        check(np.array_equal(points[i], replay.state.points), context, "BatchPlayout Endpunkte")
+    return PLAYOUTS_PER_POSITION
+
+
+# ---------------------------------------------------------
+# 3) Durchsatz
+# ---------------------------------------------------------
+
+NR_ROUNDS = 7
+
+
+def _paired_timing(reference_fn, fast_fn, nr_calls: int, rounds: int = NR_ROUNDS):
+    """
+    Referenz und schneller Pfad abwechselnd messen; Median der Zeiten und des
+    Speedups pro Runde (robust gegen Last von anderen Prozessen).
+
+    Returns:
+        (µs Referenz, µs schneller Pfad, Speedup)
+    """
+    reference_times, fast_times, speedups = [], [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        reference_fn()
+        reference_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        fast_fn()
+        fast_times.append(time.perf_counter() - start)
+        speedups.append(reference_times[-1] / fast_times[-1])
+    return (float(np.median(reference_times)) / nr_calls * 1e6, float(np.median(fast_times)) / nr_calls * 1e6,
+            float(np.median(speedups)))
+
+
+def measure_throughput(seed: int) -> dict:
+    """
+    Zeit pro Aufruf der Referenz und der schnellen Pfade.
+
+    Returns:
+        {Name: (µs Referenz, µs schneller Pfad, Speedup)}
+    """
+    rng = np.random.default_rng(seed)
+    nr_positions = 5000
+    hands, tricks, nr_in_trick, trump = random_positions(rng, nr_positions)
+    hands_int = hands.astype(np.int32)
+    hand_bits = (hands.astype(np.uint64) @ (1 << np.arange(36, dtype=np.uint64))).tolist()
+    tricks_list = [row[:n] for row, n in zip(tricks.tolist(), nr_in_trick.tolist())]
+    nr_in_trick_list = nr_in_trick.tolist()
+    trump_list = trump.tolist()
+    reference = RuleSchieber()
+    kernel = RuleKernel()
+
+    def run_rule(rule):
+        return lambda: [rule.get_valid_cards(hands_int[i], tricks[i], nr_in_trick_list[i], trump_list[i])
+                        for i in range(nr_positions)]
+
+    def run_bits():
+        return [valid_card_bits(hand_bits[i], tricks_list[i], trump_list[i]) for i in range(nr_positions)]
+
+    groups = [np.flatnonzero((nr_in_trick == n) & (trump == t)) for n in range(4) for t in range(6)]
+
+    def run_batch():
+        for index, rows in enumerate(groups):
+            valid_cards_batch(hands[rows], np.maximum(tricks[rows], 0), index // 6, index % 6)
+
+    results = {
+        "valid_cards.RuleKernel": _paired_timing(run_rule(reference), run_rule(kernel), nr_positions),
+        "valid_cards.bits": _paired_timing(run_rule(reference), run_bits, nr_positions),
+        "valid_cards.batch": _paired_timing(run_rule(reference), run_batch, nr_positions),
+    }
+
+    # Playouts ab Spielbeginn (nach Trumpf): GameSim-Schleife gegen BatchPlayout,
+    # beide mit gleich vielen Playouts pro Runde
+    np.random.seed(seed)
+    sim = GameSim(rule=reference)
+    sim.init_from_cards(deal_random_hand(), 0)
+    sim.action_trump(0)
+    first_cards = np.repeat(np.flatnonzero(reference.get_valid_cards_from_state(sim.state)), 4)
+    gamesim = _GameSimPlayout(SearchEngine(reference), sim.state)
+    batch = BatchPlayout(sim.state)
+    results["playout.batch"] = _paired_timing(lambda: gamesim.run(first_cards, rng),
+                                              lambda: batch.run(first_cards, rng), len(first_cards))
+    return results
+
+
+def check_throughput(results: dict, baseline: dict) -> list:
+    """
+    Vergleicht die Speedups mit der Baseline. Gibt die Namen der zu langsamen Pfade zurück.
+    """
+    tolerance = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    slower = []
+    print(f"{'Pfad':<24} {'Referenz µs':>12} {'µs':>9} {'Speedup':>8} {'Baseline':>9}")
+    for name, (reference_us, fast_us, speedup) in results.items():
+        expected = baseline["speedups"].get(name)
+        flag = ""
+        if expected is not None and speedup < expected * (1.0 - tolerance):
+            slower.append(name)
+            flag = "  LANGSAMER"
+        expected_text = f"{expected:.1f}" if expected is not None else "-"
+        print(f"{name:<24} {reference_us:>12.2f} {fast_us:>9.2f} {speedup:>8.1f} {expected_text:>9}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schnelle Pfade gegen jass-kit prüfen")
+    parser.add_argument("--games", type=int, default=300, help="Anzahl Zufallsspiele")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--game", type=int, default=None, help="nur dieses Spiel (zum Nachspielen)")
+    parser.add_argument("--no-perf", action="store_true", help="Durchsatz nicht messen")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Baseline neu schreiben ({BASELINE_FILE})")
+    args = parser.parse_args()
+
+    reference = RuleSchieber()
+    kernel = RuleKernel()
+    tb = EndgameTablebase()
+    games = [args.game] if args.game is not None else range(args.games)
+
+    start = time.perf_counter()
+    nr_moves = sum(check_game(args.seed, game, reference, kernel, tb) for game in games)
+    nr_playouts = sum(check_batch_playouts(args.seed, game, reference) for game in games)
+    print(f"{len(games)} Spiele, {nr_moves} Züge und {nr_playouts} Batch-Playouts identisch zu GameSim "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    if args.no_perf or args.game is not None:
+        return
+    results = measure_throughput(args.seed)
+    if args.update_baseline:
+        baseline = dict(tolerance=DEFAULT_TOLERANCE,
+                        speedups={name: round(speedup, 2) for name, (_, _, speedup) in results.items()})
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline geschrieben: {BASELINE_FILE}")
+    with open(BASELINE_FILE) as f:
+        baseline = json.load(f)
+    slower = check_throughput(results, baseline)
+    assert not slower, f"langsamer als die Baseline: {', '.join(slower)}"
+
+
+if __name__ == "__main__":
+    main()
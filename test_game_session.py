@@ -0,0 +1,126 @@
+# test_game_session.py
+#
+# Prüft die Sessions pro Spiel (game_session.py):
+# - Vorgaben der Determinizations stimmen mit dem echten Spielstand überein
+#   (Kartenzahl pro Spieler, ausgeschlossene Karten nie in der echten Hand)
+# - Session, die Zug um Zug nachgeführt wird = Session neu aus der Observation
+# - Historie (game_history.py): gespielte Karten pro Spieler, Farben, Punkte
+# - gewichtete Determinizations (opponent_model.py) halten die Vorgaben ein
+# - Leerlauf-Timeout und Speicherlimit (LRU-Verdrängung), inkl. Suchbaum
+
+import numpy as np
+
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+from jass.game.rule_schieber import RuleSchieber
+
+from game_session import GameSession, SessionStore
+from node_pool import NodePool
+from opponent_model import OpponentModelSampler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def play_random_game(rule, rng, store: SessionStore, player: int) -> int:
+    """
+    Spielt ein Zufallsspiel und prüft bei jedem Zug von player die Session.
+    Gibt die Anzahl geprüfter Züge zurück.
+    """
+    sim = GameSim(rule=rule)
+    sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+    sim.action_trump(int(rng.integers(6)))
+    nr_checked = 0
+    while not sim.is_done():
+        state = sim.state
+        if state.player == player:
+            obs = sim.get_observation()
+            warm = store.get(obs)
+            cold = GameSession(warm.key)
+            cold.update(obs)
+
+            assert np.array_equal(warm.unknown_cards, cold.unknown_cards)
+            assert np.array_equal(warm.hidden_counts, cold.hidden_counts)
+            assert np.array_equal(warm.excluded, cold.excluded)
+
+            assert np.array_equal(warm.hidden_counts, state.hands.sum(axis=1))
+            history = warm.history
+            assert np.array_equal(history.points, state.points)
+            for p in range(4):
+                assert history.nr_played[p] == history.played[p].sum() == 9 - state.hands[p].sum()
+                for colour in np.flatnonzero(history.voids[p]):
+                    assert not state.hands[p, colour * 9:colour * 9 + 9].any() or colour == state.trump
+            assert not np.any(warm.excluded & state.hands.astype(bool))
+            hidden = state.hands.astype(bool).copy()
+            hidden[player] = False
+            assert np.array_equal(np.flatnonzero(hidden.any(axis=0)), warm.unknown_cards)
+
+            hands = warm.sample_hidden_hands(obs, rng)
+            assert np.array_equal(hands.sum(axis=1), state.hands.sum(axis=1))
+            assert hands.sum(axis=0).max() == 1
+
+            # gewichtete Determinizations halten zusätzlich die ausgeschlossenen Karten ein
+            hands, weight = OpponentModelSampler(obs, warm)(obs, rng)
+            assert np.array_equal(hands.sum(axis=1), state.hands.sum(axis=1))
+            assert hands.sum(axis=0).max() == 1 and weight > 0.0
+            assert not np.any(warm.excluded & hands.astype(bool))
+            nr_checked += 1
+        sim.action_play_card(int(rng.choice(np.flatnonzero(rule.get_valid_cards_from_state(sim.state)))))
+    return nr_checked
+
+
+def main():
+    rule = RuleSchieber()
+    rng = np.random.default_rng(5)
+    np.random.seed(5)
+
+    # 1) Vorgaben gegen den echten Spielstand
+    store = SessionStore()
+    nr_checked = sum(play_random_game(rule, rng, store, player=i % 4) for i in range(200))
+    print(f"{nr_checked} Züge: Session = echter Spielstand, nachgeführt = neu aufgebaut")
+
+    # 2) Timeout und Speicherlimit
+    clock = FakeClock()
+    session_bytes = GameSession(0).nbytes() + 8 * 27
+    store = SessionStore(idle_timeout=10.0, max_bytes=3 * session_bytes, clock=clock)
+    observations = []
+    for _ in range(4):
+        sim = GameSim(rule=rule)
+        sim.init_from_cards(deal_random_hand(), 0)
+        sim.action_trump(0)
+        observations.append(sim.get_observation())
+
+    for obs in observations:
+        store.get(obs)
+        clock.now += 1.0
+    assert len(store) == 3 and store.nr_evicted == 1
+
+    store.get(observations[1])          # wird zur zuletzt benutzten Session
+    clock.now += 8.5
+    store.get(observations[3])          # Session 2 (länger als 10 s nicht benutzt) läuft ab
+    metrics = store.metrics()
+    assert metrics["expired"] == 1 and metrics["sessions"] == 2, metrics
+    print(f"Timeout/Speicherlimit: {metrics}")
+
+    # 3) Suchbaum zählt sofort zum Speicherlimit
+    tree = NodePool(64)
+    store = SessionStore(max_bytes=2 * session_bytes, clock=clock)
+    for obs in observations[:3]:
+        session = store.get(obs)
+    assert len(store) == 2 and store.nr_evicted == 1
+    store.attach_search_tree(session, tree)
+    assert session.search_tree is tree and session.stored_bytes == session.nbytes()
+    assert len(store) == 1 and store.nr_evicted == 2
+    assert store.metrics()["bytes"] == session.nbytes()
+    store.discard(session.key)
+    assert store.metrics()["bytes"] == 0
+    print(f"Suchbaum: {tree.nbytes} Byte sofort verbucht, ältere Session verdrängt")
+
+
+if __name__ == "__main__":
+    main()
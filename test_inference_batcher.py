@@ -0,0 +1,86 @@
+# test_inference_batcher.py
+#
+# Viele Threads (= gleichzeitige Tische) fragen das Trumpf/Schiebe-Modell an:
+# - Resultate über den InferenceBatcher müssen gleich sein wie direkt
+# - Vergleich Durchsatz: Einzel-Forward-Pass pro Anfrage vs. Batcher
+#
+# Ohne trainiertes Modell (Data/trump_model_fused.npz) wird ein zufälliges
+# Netz derselben Grösse verwendet.
+
+import threading
+import time
+
+import numpy as np
+
+from inference_batcher import InferenceBatcher
+from trump_model import FusedTrumpModel, load_fused_model
+
+
+def random_model(rng) -> FusedTrumpModel:
+    sizes = [36, 128 + 64, 64 + 64, 6 + 1]
+    weights = [rng.normal(0, 0.1, (a, b)) for a, b in zip(sizes[:-1], sizes[1:])]
+    biases = [np.zeros(b) for b in sizes[1:]]
+    return FusedTrumpModel(weights, biases)
+
+
+def random_hands(rng, n: int) -> np.ndarray:
+    X = np.zeros((n, 36))
+    for i in range(n):
+        X[i, rng.choice(36, 9, replace=False)] = 1.0
+    return X
+
+
+def run_threads(fn, hands: np.ndarray, nr_threads: int) -> float:
+    """
+    nr_threads Threads arbeiten je ihren Teil der Hände ab, gibt die Wall-Time zurück.
+    """
+    parts = np.array_split(np.arange(hands.shape[0]), nr_threads)
+    threads = [threading.Thread(target=lambda idx=idx: [fn(i) for i in idx]) for idx in parts]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(1)
+    model = load_fused_model() or random_model(rng)
+
+    n = 4000
+    nr_threads = 32
+    hands = random_hands(rng, n)
+    expected_trump, expected_push = model.predict(hands)
+
+    # 1) direkt: ein Forward-Pass pro Anfrage
+    results = [None] * n
+
+    def direct(i):
+        results[i] = model.predict(hands[i:i + 1])
+
+    t_direct = run_threads(direct, hands, nr_threads)
+
+    # 2) gebündelt
+    batcher = InferenceBatcher(model.predict, max_batch_size=32, max_latency=0.002)
+
+    def batched(i):
+        results[i] = batcher.predict(hands[i])
+
+    t_batched = run_threads(batched, hands, nr_threads)
+    metrics = batcher.metrics()
+    batcher.close()
+
+    for i in range(n):
+        trump_proba, push_proba = results[i]
+        assert np.allclose(trump_proba, expected_trump[i]) and np.isclose(push_proba, expected_push[i])
+
+    print(f"{n} Anfragen aus {nr_threads} Threads, Resultate identisch")
+    print(f"direkt:   {n / t_direct:.0f} Anfragen/s")
+    print(f"Batcher:  {n / t_batched:.0f} Anfragen/s")
+    for key, value in metrics.items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@ def main():
     nr_games_to_play = 100
     arena = Arena(nr_games_to_play, cheating_mode=True)
 
-    mcts = MonteCarloTrickAgent(simulations_per_card=100)
+    mcts = MonteCarloTrickAgent(simulations_per_card=100, seed=0)
     mini = MinimaxTrickAgent()
     rnd = AgentCheatingRandomSchieber()
 
@@ -0,0 +1,105 @@
+# test_myagent_batch.py
+#
+# Prüft die Batch-Auswertung von MyAgent (action_play_card_batch, action_trump_batch)
+# gegen die Methoden pro Observation:
+# - Kartenwahl auf allen Stellungen aus Zufallsspielen
+# - Trumpfwahl auf zufälligen Händen, für alle drei Zweige (Heuristik,
+#   scikit-learn-Modell, Fused-Modell), mit und ohne Schieben
+# und misst die Geschwindigkeit beider Varianten.
+
+import time
+import warnings
+
+import numpy as np
+from sklearn.neural_network import MLPClassifier
+
+from jass.game.const import PUSH
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+
+from my_agent import MyAgent
+from rule_kernel import RuleKernel
+from trump_model import FusedTrumpModel
+
+
+def logged_positions(rule, rng, nr_games: int):
+    """
+    Observations aller Kartenzüge aus Zufallsspielen.
+    """
+    observations = []
+    for _ in range(nr_games):
+        sim = GameSim(rule=rule)
+        sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+        sim.action_trump(int(rng.integers(6)))
+        while not sim.is_done():
+            observations.append(sim.get_observation())
+            sim.action_play_card(int(rng.choice(np.flatnonzero(rule.get_valid_cards_from_state(sim.state)))))
+    return observations
+
+
+def random_trump_observations(rng, nr_hands: int):
+    observations = []
+    for _ in range(nr_hands):
+        sim = GameSim(rule=RuleKernel())
+        sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+        obs = sim.get_observation()
+        obs.push_allowed = bool(rng.integers(2))
+        observations.append(obs)
+    return observations
+
+
+def check_trump(agent, observations, name: str) -> None:
+    hands = np.array([obs.hand for obs in observations])
+    push_allowed = np.array([obs.push_allowed for obs in observations])
+    expected = np.array([agent.action_trump(obs) for obs in observations])
+    result = agent.action_trump_batch(hands, push_allowed)
+    assert np.array_equal(result, expected), name
+    print(f"Trumpf {name:<12} {len(observations)} Hände identisch, {np.mean(expected == PUSH):.0%} geschoben")
+
+
+def main():
+    rng = np.random.default_rng(43)
+    np.random.seed(43)
+    rule = RuleKernel()
+    agent = MyAgent()
+    agent._trump_model = None
+    agent._fused_model = None
+
+    # 1) Kartenwahl
+    observations = logged_positions(rule, rng, 300)
+    hands = np.array([obs.hand for obs in observations])
+    valid = np.array([rule.get_valid_cards_from_obs(obs) for obs in observations])
+    trumps = np.array([obs.trump for obs in observations])
+
+    start = time.perf_counter()
+    expected = np.array([agent.action_play_card(obs) for obs in observations])
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    result = agent.action_play_card_batch(hands, valid, trumps)
+    batch = time.perf_counter() - start
+    assert np.array_equal(result, expected)
+    print(f"Karten: {len(observations)} Stellungen identisch, pro Observation {single / len(observations) * 1e6:.1f} µs, "
+          f"Batch {batch / len(observations) * 1e6:.2f} µs")
+
+    # 2) Trumpfwahl, alle drei Zweige
+    observations = random_trump_observations(rng, 2000)
+    check_trump(agent, observations, "Heuristik")
+
+    X = rng.integers(0, 2, size=(600, 36)).astype(np.float32)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        agent._trump_model = MLPClassifier(hidden_layer_sizes=(16,), max_iter=50, random_state=0).fit(
+            X, rng.integers(0, 6, size=600))
+    check_trump(agent, observations, "sklearn")
+
+    weights = [rng.normal(size=(36, 16)), rng.normal(size=(16, 7))]
+    biases = [rng.normal(size=16), rng.normal(size=7)]
+    model = FusedTrumpModel(weights, biases)
+    # Schiebe-Kopf so verschieben, dass etwa die Hälfte der Hände schieben will
+    model._biases[-1][6] -= np.median(model.logits(np.array([obs.hand for obs in observations]))[1])
+    agent._fused_model = model
+    check_trump(agent, observations, "Fused")
+
+
+if __name__ == "__main__":
+    main()
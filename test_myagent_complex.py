@@ -18,9 +18,9 @@ def main():
     # Team 0: Spieler 0 und 2 = dein Agent
     # Team 1: Spieler 1 und 3 = Random-Agent
     arena.set_players(
-        MyAgentcomplex(),              # Spieler 0
+        MyAgentcomplex(seed=1, agent_id=0),  # Spieler 0
         AgentRandomSchieber(),  # Spieler 1
-        MyAgentcomplex(),              # Spieler 2
+        MyAgentcomplex(seed=1, agent_id=2),  # Spieler 2
         AgentRandomSchieber()   # Spieler 3
     )
 
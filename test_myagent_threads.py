@@ -0,0 +1,117 @@
+# test_myagent_threads.py
+#
+# Prüft, dass ein MyAgentcomplex mehrere Spiele gleichzeitig spielen kann (wie im
+# Service, ein Agent für alle Tische): die gleichen Spiele einmal nacheinander und
+# einmal je in einem eigenen Thread mit demselben Agenten müssen die gleichen
+# Entscheidungen und die gleichen Einträge im Entscheidungs-Log ergeben
+# (Karte, Budget des Zuges), und jeder geloggte Zug lässt sich wiederholen.
+# Ebenso mit gewichteten Determinizations (enable_opponent_model): der Schalter
+# steht im Log und das Replay rechnet mit ihm.
+
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from jass.agents.agent_random_schieber import AgentRandomSchieber
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+
+from decision_log import DecisionLog, read_log, replay
+from my_agentcomplex import MyAgentcomplex
+from rule_kernel import RuleKernel
+
+NR_GAMES = 4
+
+
+def play_game(agent, hands, dealer: int, seed: int, barrier=None) -> list:
+    """
+    Spielt ein Spiel, MyAgentcomplex auf den Plätzen 0 und 2. Gibt die Karten und
+    die Suchstatistik der Züge von agent zurück.
+    """
+    opponent = AgentRandomSchieber()
+    opponent._rng = np.random.default_rng(seed)
+    players = [agent, opponent, agent, opponent]
+    sim = GameSim(rule=RuleKernel())
+    sim.init_from_cards(hands, dealer)
+    sim.action_trump(players[sim.state.player].action_trump(sim.get_observation()))
+    if sim.state.trump == -1:
+        sim.action_trump(players[sim.state.player].action_trump(sim.get_observation()))
+
+    moves = []
+    while not sim.is_done():
+        if barrier is not None:
+            barrier.wait()
+        player = players[sim.state.player]
+        card = player.action_play_card(sim.get_observation())
+        if player is agent:
+            stats = agent.last_search_stats
+            moves.append((card, None if stats is None else stats[0].tolist()))
+        sim.action_play_card(card)
+    return moves
+
+
+def logged_moves(path: str) -> list:
+    records = read_log(path)
+    keys = [(rec['hands'].tobytes(), int(rec['nr_played_cards']), int(rec['kind']), int(rec['action']),
+             rec['params'].tobytes()) for rec in records]
+    return sorted(keys), records
+
+
+def replay_mismatches(records) -> int:
+    return sum(replay(rec)[0] != int(rec['action']) for rec in records)
+
+
+def main():
+    rng = np.random.default_rng(37)
+    np.random.seed(37)
+    games = [(deal_random_hand(), int(rng.integers(4))) for _ in range(NR_GAMES)]
+    directory = tempfile.mkdtemp()
+
+    # nacheinander
+    path = os.path.join(directory, "sequential.bin")
+    log = DecisionLog(path)
+    agent = MyAgentcomplex(seed=37, decision_log=log)
+    expected = [play_game(agent, hands, dealer, i) for i, (hands, dealer) in enumerate(games)]
+    expected_log, _ = logged_moves(path)
+
+    # gleichzeitig, ein Agent für alle Spiele, die Threads wechseln sich Zug um Zug ab
+    path = os.path.join(directory, "threads.bin")
+    log = DecisionLog(path)
+    agent = MyAgentcomplex(seed=37, decision_log=log)
+    barrier = threading.Barrier(NR_GAMES)
+    result = [None] * NR_GAMES
+
+    def run(i):
+        hands, dealer = games[i]
+        result[i] = play_game(agent, hands, dealer, i, barrier)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(NR_GAMES)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    threaded_log, records = logged_moves(path)
+
+    assert result == expected
+    assert threaded_log == expected_log
+    assert replay_mismatches(records) == 0
+    print(f"{NR_GAMES} Spiele gleichzeitig: {len(records)} Entscheidungen identisch zu nacheinander, "
+          f"Replay ohne Abweichung")
+
+    # gewichtete Determinizations
+    path = os.path.join(directory, "opponent_model.bin")
+    log = DecisionLog(path)
+    agent = MyAgentcomplex(seed=37, decision_log=log)
+    agent.enable_opponent_model()
+    for i, (hands, dealer) in enumerate(games[:2]):
+        play_game(agent, hands, dealer, i)
+    _, records = logged_moves(path)
+    assert np.all(records['params'][:, 4] == 1)
+    assert replay_mismatches(records) == 0
+    print(f"Opponent-Modell: {len(records)} Entscheidungen, Replay ohne Abweichung")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# test_node_pool.py
+#
+# Prüft den Knoten-Pool (node_pool.py) und die Baumsuche ISMCTS (search_engine.py):
+# - Baum nach jeder Suche konsistent: höchstens max_nodes Knoten, Kinder
+#   zusammenhängend und im Pool, Besuche eines Knotens >= Summe der Kinder,
+#   Wurzel-Kinder = Kandidaten
+# - reroot übernimmt den Teilbaum unter den gespielten Karten unverändert
+# - voller Pool: FULL_STOP sucht ohne neue Knoten weiter, FULL_RECYCLE verwirft
+#   die Enkel der Wurzel und behält deren Statistik
+# - gleicher Seed → gleiche Suche
+# - MyAgentcomplex mit Baumsuche: ganze Spiele, Teilbaum wird weiterverwendet,
+#   Speicher der Sessions richtig verbucht
+# - Entscheidungs-Log der Baumsuche: ohne Weiterverwendung lässt sich jeder Zug
+#   wiederholen, mit Weiterverwendung alle Züge ohne alten Teilbaum; die anderen
+#   lehnt das Replay ab
+
+import os
+import tempfile
+
+import numpy as np
+
+from jass.arena.arena import Arena
+from jass.agents.agent_random_schieber import AgentRandomSchieber
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+
+from decision_log import DecisionLog, NotReplayableError, read_log, replay
+from game_session import GameSession, SessionStore
+from my_agentcomplex import MyAgentcomplex
+from node_pool import NodePool, FULL_STOP, FULL_RECYCLE, BYTES_PER_NODE
+from search_engine import ISMCTS, SearchEngine
+
+
+def check_tree(pool: NodePool) -> None:
+    assert 0 < pool.size <= pool.max_nodes
+    assert pool.nbytes == pool.max_nodes * BYTES_PER_NODE
+    stack = [0]
+    seen = 0
+    while stack:
+        node = stack.pop()
+        seen += 1
+        start = int(pool.first_child[node])
+        if start < 0:
+            assert pool.nr_children[node] == 0
+            continue
+        count = int(pool.nr_children[node])
+        assert 0 < start and start + count <= pool.size
+        cards = pool.card[start:start + count]
+        assert len(set(cards.tolist())) == count and np.all(cards >= 0)
+        if node != 0:
+            assert pool.visits[node] >= pool.visits[start:start + count].sum()
+        assert np.all(pool.avail[start:start + count] >= pool.visits[start:start + count])
+        stack.extend(range(start, start + count))
+    assert seen <= pool.size
+
+
+def subtree(pool: NodePool, node: int, prefix=()) -> dict:
+    """
+    Teilbaum als {Kartenfolge: (Besuche, Wert)} (unabhängig von den Indizes).
+    """
+    result = {prefix: (int(pool.visits[node]), float(pool.value[node]))}
+    start = int(pool.first_child[node])
+    if start >= 0:
+        for child in range(start, start + int(pool.nr_children[node])):
+            result.update(subtree(pool, child, prefix + (int(pool.card[child]),)))
+    return result
+
+
+def random_observation(rule, rng, nr_played: int):
+    sim = GameSim(rule=rule)
+    sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+    sim.action_trump(int(rng.integers(6)))
+    while sim.state.nr_played_cards < nr_played:
+        sim.action_play_card(int(rng.choice(np.flatnonzero(rule.get_valid_cards_from_state(sim.state)))))
+    return sim
+
+
+def search(engine, sim, pool, seed: int, budget: int = 300, **options):
+    obs = sim.get_observation()
+    session = GameSession(0)
+    session.update(obs)
+    return engine.evaluate(obs, ISMCTS, budget, rng=np.random.default_rng(seed), early_stop=False,
+                           session=session, pool=pool, **options)
+
+
+class RecordingEngine:
+    """
+    Engine des Agenten, die die Statistik jeder Suche sammelt und jeden Baum prüft.
+    """
+
+    def __init__(self, engine):
+        self._engine = engine
+        self.stats = []
+
+    def evaluate(self, obs, algorithm, budget, **options):
+        assert algorithm == ISMCTS
+        result = self._engine.evaluate(obs, algorithm, budget, **options)
+        if result.searched:
+            # ohne Suche (nur eine Kartenklasse) bleibt ein neuer Pool leer
+            check_tree(options["pool"])
+        self.stats.append(result.stats)
+        return result
+
+
+def play_logged_games(reuse: bool, path: str, nr_games: int = 2) -> np.ndarray:
+    """
+    MyAgentcomplex mit Baumsuche gegen Zufallsspieler, alle Züge im Log.
+    """
+    agent = MyAgentcomplex(seed=45, decision_log=DecisionLog(path))
+    agent.enable_tree_search(max_nodes=2048, full_policy=FULL_RECYCLE, reuse=reuse)
+    opponents = [AgentRandomSchieber(), AgentRandomSchieber()]
+    for i, opponent in enumerate(opponents):
+        opponent._rng = np.random.default_rng(45 + i)
+    arena = Arena(nr_games_to_play=nr_games, print_every_x_games=100)
+    arena.set_players(agent, opponents[0], agent, opponents[1])
+    arena.play_all_games()
+    return read_log(path)
+
+
+def replay_records(records):
+    """
+    Returns:
+        (Anzahl wiederholt, Abweichungen, abgelehnt)
+    """
+    nr_replayed = nr_mismatches = nr_refused = 0
+    for rec in records:
+        try:
+            action = replay(rec)[0]
+        except NotReplayableError:
+            nr_refused += 1
+            continue
+        nr_replayed += 1
+        nr_mismatches += action != int(rec['action'])
+    return nr_replayed, nr_mismatches, nr_refused
+
+
+def main():
+    rng = np.random.default_rng(44)
+    np.random.seed(44)
+    engine = SearchEngine()
+    rule = engine.rule
+
+    # 1) Konsistenz, Kandidaten an der Wurzel, Reproduzierbarkeit
+    nr_searched = 0
+    for i in range(40):
+        sim = random_observation(rule, rng, int(rng.integers(0, 28)))
+        valid = np.flatnonzero(rule.get_valid_cards_from_state(sim.state))
+        pool = NodePool(4096)
+        result = search(engine, sim, pool, i)
+        if not result.searched:
+            continue
+        nr_searched += 1
+        check_tree(pool)
+        assert result.card in valid
+        assert result.stats["iterations"] == 300 and result.visits.sum() == 300
+        assert set(np.flatnonzero(result.visits).tolist()) <= set(valid.tolist())
+        again = search(engine, sim, NodePool(4096), i)
+        assert again.card == result.card and np.array_equal(again.visits, result.visits)
+    print(f"Konsistenz: {nr_searched} Suchen, Bäume gültig und reproduzierbar")
+
+    # 2) reroot: Teilbaum unter zwei gespielten Karten bleibt unverändert
+    nr_rerooted = 0
+    while nr_rerooted < 20:
+        sim = random_observation(rule, rng, int(rng.integers(0, 24)))
+        pool = NodePool(8192)
+        if not search(engine, sim, pool, nr_rerooted, budget=400).searched:
+            continue
+        node = 0
+        cards = []
+        for _ in range(2):
+            start = int(pool.first_child[node])
+            if start < 0:
+                break
+            children = np.arange(start, start + int(pool.nr_children[node]))
+            node = int(children[np.argmax(pool.visits[children])])
+            cards.append(int(pool.card[node]))
+        if len(cards) < 2:
+            continue
+        expected = subtree(pool, node)
+        assert pool.reroot(cards, pool.root_nr_played + 2)
+        check_tree(pool)
+        assert subtree(pool, 0) == expected
+        assert not pool.reroot([36], pool.root_nr_played + 1) and pool.size == 1
+        nr_rerooted += 1
+    print(f"reroot: {nr_rerooted} Teilbäume unverändert übernommen")
+
+    # 3) voller Pool
+    sim = random_observation(rule, rng, 0)
+    pool = NodePool(200, FULL_STOP)
+    result = search(engine, sim, pool, 0, budget=500)
+    check_tree(pool)
+    assert result.stats["iterations"] == 500 and result.stats["pool_full"] > 0 and pool.size <= 200
+
+    pool = NodePool(200, FULL_RECYCLE)
+    result = search(engine, sim, pool, 0, budget=500)
+    check_tree(pool)
+    assert result.stats["iterations"] == 500 and pool.nr_recycled > 0
+    root_visits = result.visits.copy()
+    pool._recycle()
+    check_tree(pool)
+    assert np.array_equal(engine._root_stats(pool, np.flatnonzero(root_visits))[0], root_visits)
+    assert pool.size == 1 + pool.nr_children[0]
+    print(f"voller Pool: stop {result.stats['iterations']} Iterationen mit 200 Knoten, "
+          f"recycle {pool.nr_recycled}x verworfen")
+
+    # 4) MyAgentcomplex mit Baumsuche über ganze Spiele
+    agent = MyAgentcomplex(seed=44)
+    agent.enable_tree_search(max_nodes=2048)
+    store = SessionStore()
+    agent.set_session_store(store)
+    engine = RecordingEngine(agent._engine)
+    agent._engine = engine
+    opponents = [AgentRandomSchieber(), AgentRandomSchieber()]
+    for i, opponent in enumerate(opponents):
+        opponent._rng = np.random.default_rng(44 + i)
+    arena = Arena(nr_games_to_play=4, print_every_x_games=100)
+    arena.set_players(agent, opponents[0], agent, opponents[1])
+    arena.play_all_games()
+    metrics = store.metrics()
+    assert metrics["sessions"] == 0 and metrics["bytes"] == 0
+    nr_searched = sum(stats.get("iterations", 0) > 0 for stats in engine.stats)
+    nr_reused = sum(stats.get("reused", False) for stats in engine.stats)
+    assert nr_reused > 0
+    print(f"MyAgentcomplex: 4 Spiele, {nr_searched} Suchen, Baum {nr_reused}x weiterverwendet, "
+          f"{2048 * BYTES_PER_NODE / 1024:.0f} KiB pro Spiel")
+
+    # 5) Replay der Baumsuche aus dem Entscheidungs-Log
+    directory = tempfile.mkdtemp()
+    records = play_logged_games(False, os.path.join(directory, "fresh.bin"))
+    assert np.all(records['params'][:, 5] == 2048)
+    nr_replayed, nr_mismatches, nr_refused = replay_records(records)
+    assert nr_replayed == len(records) and nr_mismatches == 0 and nr_refused == 0
+    nr_fresh = len(records)
+    records = play_logged_games(True, os.path.join(directory, "reuse.bin"))
+    nr_replayed_reuse, nr_mismatches, nr_refused = replay_records(records)
+    assert nr_mismatches == 0 and nr_refused > 0 and nr_replayed_reuse > 0
+    print(f"Replay: ohne Weiterverwendung {nr_replayed}/{nr_fresh} Züge identisch, mit Weiterverwendung "
+          f"{nr_replayed_reuse} identisch und {nr_refused} abgelehnt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# test_rule_kernel.py
+#
+# Prüft die Regel-Tabelle (rule_kernel.py) gegen RuleSchieber.get_valid_cards:
+# valid_card_bits, valid_cards_batch und RuleKernel.get_valid_cards müssen für
+# zufällige Stellungen genau die gleichen Karten liefern.
+#
+# Stellungen: Trumpf, Anzahl Karten im Stich (0..3) und Handgrösse (1..9) zufällig,
+# die Karten werden mit zufälligen Gewichten pro Farbe gezogen, damit auch seltene
+# Hände (nur Trümpfe, nur noch der Bauer, Farbe blank) oft vorkommen.
+#
+#   python test_rule_kernel.py [Anzahl Stellungen]     # Standard 2'000'000
+
+import sys
+import time
+
+import numpy as np
+
+from jass.game.rule_schieber import RuleSchieber
+
+from rule_kernel import RuleKernel, valid_card_bits, valid_cards_batch
+
+BLOCK = 100_000
+
+
+def random_positions(rng, nr_positions: int):
+    """
+    Zufällige Stellungen: hands (B, 36) bool, tricks (B, 4) int (-1 = leer),
+    nr_cards_in_trick (B,), trump (B,).
+    """
+    # pro Stellung Gewichte pro Farbe, Karten per Gumbel-Top-k ohne Zurücklegen ziehen
+    colour_weights = rng.dirichlet(np.full(4, 0.5), size=nr_positions)
+    keys = np.log(np.repeat(colour_weights, 9, axis=1) + 1e-12) + rng.gumbel(size=(nr_positions, 36))
+    order = np.argsort(-keys, axis=1)
+
+    nr_in_trick = rng.integers(0, 4, size=nr_positions)
+    hand_size = rng.integers(1, 10, size=nr_positions)
+    trump = rng.integers(0, 6, size=nr_positions)
+
+    # die ersten Karten bilden den Stich, die nächsten die Hand
+    tricks = np.where(np.arange(4)[None, :] < nr_in_trick[:, None], order[:, :4], -1)
+    position = np.empty_like(order)
+    np.put_along_axis(position, order, np.arange(36)[None, :], axis=1)
+    hands = (position >= nr_in_trick[:, None]) & (position < (nr_in_trick + hand_size)[:, None])
+    return hands, tricks, nr_in_trick, trump
+
+
+def main():
+    nr_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = np.random.default_rng(41)
+    reference = RuleSchieber()
+    kernel = RuleKernel()
+    bit_weights = 1 << np.arange(36, dtype=np.uint64)
+
+    elapsed = dict(RuleSchieber=0.0, RuleKernel=0.0, bits=0.0, batch=0.0)
+    nr_checked = 0
+    patterns = set()
+    while nr_checked < nr_positions:
+        size = min(BLOCK, nr_positions - nr_checked)
+        hands, tricks, nr_in_trick, trump = random_positions(rng, size)
+        hands_int = hands.astype(np.int32)
+        hand_bits = (hands.astype(np.uint64) @ bit_weights).tolist()
+
+        expected = np.empty((size, 36), dtype=bool)
+        start = time.perf_counter()
+        for i in range(size):
+            expected[i] = reference.get_valid_cards(hands_int[i], tricks[i], int(nr_in_trick[i]), int(trump[i]))
+        elapsed["RuleSchieber"] += time.perf_counter() - start
+
+        valid = np.empty((size, 36), dtype=bool)
+        start = time.perf_counter()
+        for i in range(size):
+            valid[i] = kernel.get_valid_cards(hands_int[i], tricks[i], int(nr_in_trick[i]), int(trump[i]))
+        elapsed["RuleKernel"] += time.perf_counter() - start
+        mismatch = np.flatnonzero(np.any(valid != expected, axis=1))
+        assert mismatch.size == 0, (hands_int[mismatch[0]], tricks[mismatch[0]], trump[mismatch[0]])
+
+        tricks_list = tricks.tolist()
+        expected_bits = (expected.astype(np.uint64) @ bit_weights).tolist()
+        nr_in_trick_list = nr_in_trick.tolist()
+        trump_list = trump.tolist()
+        start = time.perf_counter()
+        valid = [valid_card_bits(hand_bits[i], tricks_list[i][:nr_in_trick_list[i]], trump_list[i])
+                 for i in range(size)]
+        elapsed["bits"] += time.perf_counter() - start
+        assert valid == expected_bits
+
+        # Batch: gleiche Anzahl Karten im Stich und gleicher Trumpf pro Aufruf
+        start = time.perf_counter()
+        for n in range(4):
+            for t in range(6):
+                rows = np.flatnonzero((nr_in_trick == n) & (trump == t))
+                valid = valid_cards_batch(hands[rows], np.maximum(tricks[rows], 0), n, t)
+                assert np.array_equal(valid, expected[rows]), (n, t)
+        elapsed["batch"] += time.perf_counter() - start
+
+        patterns.update(zip(trump.tolist(), nr_in_trick.tolist(), hands.sum(axis=1).tolist(),
+                            expected.sum(axis=1).tolist()))
+        nr_checked += size
+
+    print(f"{nr_checked} Stellungen identisch zu RuleSchieber ({len(patterns)} Muster Trumpf/Stich/Hand/gültig)")
+    for name, seconds in elapsed.items():
+        print(f"  {name:<13} {seconds / nr_checked * 1e6:6.2f} µs/Stellung")
+
+
+if __name__ == "__main__":
+    main()
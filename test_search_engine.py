@@ -0,0 +1,93 @@
+# test_search_engine.py
+#
+# Prüft die gemeinsame Such-Engine auf zufälligen Stellungen:
+# - ALPHABETA: Wert der gewählten Karte = Minimax über GameSim (ohne Bitmasken/Pruning)
+# - ROLLOUT: Batch-Simulator und GameSim-Simulator schätzen ähnliche Werte
+# - MCTS: gleicher Seed → gleiche Karte und Statistik
+
+import time
+
+import numpy as np
+
+from jass.game.const import team
+from jass.game.game_sim import GameSim
+from jass.game.game_util import deal_random_hand
+from jass.game.rule_schieber import RuleSchieber
+
+from search_engine import ALPHABETA, MCTS, ROLLOUT, SearchEngine
+
+
+def random_state(rule, rng):
+    sim = GameSim(rule=rule)
+    sim.init_from_cards(deal_random_hand(), int(rng.integers(4)))
+    sim.action_trump(int(rng.integers(6)))
+    nr_cards = int(rng.integers(0, 24))
+    while sim.state.nr_played_cards < nr_cards:
+        sim.action_play_card(int(rng.choice(np.flatnonzero(rule.get_valid_cards_from_state(sim.state)))))
+    return sim
+
+
+def minimax_trick(rule, state, my_team: int, trick_index: int) -> int:
+    """
+    Referenz: Minimax über den laufenden Stich mit GameSim.
+    """
+    if state.nr_tricks > trick_index:
+        points = int(state.trick_points[trick_index])
+        return points if team[int(state.trick_winner[trick_index])] == my_team else -points
+    values = []
+    for card in np.flatnonzero(rule.get_valid_cards_from_state(state)):
+        sim = GameSim(rule=rule)
+        sim.init_from_state(state)
+        sim.action_play_card(int(card))
+        values.append(minimax_trick(rule, sim.state, my_team, trick_index))
+    return max(values) if team[state.player] == my_team else min(values)
+
+
+def _played(rule, state, card):
+    sim = GameSim(rule=rule)
+    sim.init_from_state(state)
+    sim.action_play_card(int(card))
+    return sim.state
+
+
+def main():
+    rule = RuleSchieber()
+    rng = np.random.default_rng(7)
+    np.random.seed(7)
+    engine = SearchEngine(rule)
+
+    # 1) ALPHABETA gegen GameSim-Minimax
+    nr_checked = 0
+    for _ in range(200):
+        state = random_state(rule, rng).state
+        result = engine.evaluate(state, ALPHABETA, endgame=False)
+        if not result.searched:
+            continue
+        expected = max(minimax_trick(rule, _played(rule, state, card), team[state.player], state.nr_tricks)
+                       for card in np.flatnonzero(rule.get_valid_cards_from_state(state)))
+        assert result.values[result.card] == expected, (result.values[result.card], expected)
+        nr_checked += 1
+    print(f"ALPHABETA: {nr_checked} Stellungen, Werte identisch zum GameSim-Minimax")
+
+    # 2) ROLLOUT mit beiden Simulatoren
+    state = random_state(rule, rng).state
+    means = {}
+    for simulator in ("batch", "gamesim"):
+        start = time.perf_counter()
+        result = engine.evaluate(state, ROLLOUT, 400, rng=np.random.default_rng(1), simulator=simulator)
+        means[simulator] = result.values[result.card]
+        print(f"ROLLOUT {simulator:<8} Karte {result.card:2d}, Wert {means[simulator]:6.1f}, "
+              f"{result.stats['playouts']} Playouts, {time.perf_counter() - start:.2f} s")
+    assert abs(means["batch"] - means["gamesim"]) < 15
+
+    # 3) MCTS reproduzierbar
+    sim = random_state(rule, rng)
+    obs = sim.get_observation()
+    first = engine.evaluate(obs, MCTS, 100, rng=np.random.default_rng(3))
+    second = engine.evaluate(obs, MCTS, 100, rng=np.random.default_rng(3))
+    assert first.card == second.card and np.array_equal(first.visits, second.visits)
+    print(f"MCTS: Karte {first.card}, {first.stats['iterations']} Iterationen, reproduzierbar")
+
+
+if __name__ == "__main__":
+    main()
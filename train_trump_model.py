@@ -2,51 +2,304 @@
 #
 # Trainiert ein Deep-Learning-Modell (MLP) auf den
 # aus den Swisslos-Logs extrahierten Trumpf-Daten.
+#
+# - Mini-Batches werden Shard für Shard von der Disk gestreamt (partial_fit),
+#   der Datensatz muss nicht in den Speicher passen.
+# - Warm-Start vom bestehenden Modell (Data/trump_model_sw.joblib), aber nur, wenn
+#   der Report belegt, dass es den Validierungs-Shard nie gesehen hat (sonst wäre
+#   seine Validierungs-Genauigkeit zu hoch und es würde frischen Modellen
+#   vorgezogen). Die Aufteilung Training/Validierung steht dazu im Report.
+# - Early Stopping auf einem zurückbehaltenen Validierungs-Shard.
+# - Optional Hyperparameter-Sweep über einen Prozess-Pool.
+# - Optional Farb-Permutationen als Augmentation im Loader (--augment).
+# - Am Ende ein Report mit Durchsatz (Beispiele/s) und Wall-Time.
+# - Zweite Stufe: Schiebe-Modell (Hand der Vorhand → geschoben), danach werden
+#   beide Modelle per Temperature Scaling auf dem Validierungs-Shard kalibriert
+#   und als ein Netz gespeichert (Data/trump_model_fused.npz, siehe trump_model.py).
+#
+# Aufruf:
+#   python train_trump_model.py                 # Warm-Start, sonst Standard-Konfiguration
+#   python train_trump_model.py --sweep --workers 4
+#   python train_trump_model.py --augment
+
+import argparse
+import copy
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import joblib
 
-from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPClassifier
-from sklearn.metrics import accuracy_score, classification_report
+from sklearn.metrics import accuracy_score, classification_report, log_loss
+
+from trump_data import DEFAULT_SHARD_DIR, has_task, iter_batches, list_shards, load_all
+from trump_model import FUSED_MODEL_FILE, FusedTrumpModel
 
 
-DATA_FILE = "Data/trump_train_sw.npz"
 MODEL_FILE = "Data/trump_model_sw.joblib"
+PUSH_MODEL_FILE = "Data/push_model_sw.joblib"
+REPORT_FILE = "Data/trump_training_report.json"
 
+CLASSES = np.arange(6)
+PUSH_CLASSES = np.arange(2)
+TASK_CLASSES = {"trump": CLASSES, "push": PUSH_CLASSES}
 
-def main():
-    data = np.load(DATA_FILE)
-    X = data["X"]
-    y = data["y"]
+DEFAULT_CONFIG = dict(hidden_layer_sizes=(128, 64), alpha=1e-4, learning_rate_init=1e-3)
 
-    print("Daten geladen:", X.shape, y.shape)
+SWEEP_CONFIGS = [
+    dict(hidden_layer_sizes=(128, 64), alpha=1e-4, learning_rate_init=1e-3),
+    dict(hidden_layer_sizes=(128, 64), alpha=1e-3, learning_rate_init=1e-3),
+    dict(hidden_layer_sizes=(256, 128), alpha=1e-4, learning_rate_init=1e-3),
+    dict(hidden_layer_sizes=(64,), alpha=1e-4, learning_rate_init=3e-3),
+]
 
-    X_train, X_val, y_train, y_val = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+PUSH_CONFIG = dict(hidden_layer_sizes=(64,), alpha=1e-4, learning_rate_init=1e-3)
 
-    clf = MLPClassifier(
-        hidden_layer_sizes=(128, 64),
+
+def make_model(config: dict) -> MLPClassifier:
+    return MLPClassifier(
+        hidden_layer_sizes=tuple(config["hidden_layer_sizes"]),
         activation="relu",
         solver="adam",
-        alpha=1e-4,
+        alpha=config["alpha"],
+        learning_rate_init=config["learning_rate_init"],
         batch_size=256,
-        max_iter=30,
-        verbose=True,
     )
 
-    print("Training startet...")
-    clf.fit(X_train, y_train)
+
+def train_one(name: str, clf: MLPClassifier, train_shards: list, X_val: np.ndarray, y_val: np.ndarray,
+              max_epochs: int, patience: int, chunk_size: int, seed: int, augment: bool = False,
+              task: str = "trump"):
+    """
+    Trainiert ein Modell per partial_fit über die gestreamten Shards mit Early Stopping.
+
+    Returns:
+        (bestes Modell, Report-Dict)
+    """
+    rng = np.random.default_rng(seed)
+
+    best_clf = None
+    best_acc = -1.0
+    epochs_without_improvement = 0
+    nr_samples = 0
+    epochs = []
+
+    start = time.perf_counter()
+    for epoch in range(max_epochs):
+        epoch_start = time.perf_counter()
+        epoch_samples = 0
+        for X, y in iter_batches(train_shards, chunk_size, rng, augment=augment, task=task):
+            clf.partial_fit(X, y, classes=TASK_CLASSES[task])
+            epoch_samples += X.shape[0]
+        epoch_time = time.perf_counter() - epoch_start
+        nr_samples += epoch_samples
+
+        acc = float(accuracy_score(y_val, clf.predict(X_val)))
+        epochs.append(dict(epoch=epoch, val_accuracy=acc, seconds=epoch_time,
+                           samples_per_second=epoch_samples / max(epoch_time, 1e-9)))
+        print(f"[{name}] Epoche {epoch}: val_acc={acc:.4f}, "
+              f"{epoch_samples / max(epoch_time, 1e-9):.0f} Beispiele/s")
+
+        if acc > best_acc:
+            best_acc = acc
+            best_clf = copy.deepcopy(clf)
+            epochs_without_improvement = 0
+        else:
+            epochs_without_improvement += 1
+            if epochs_without_improvement >= patience:
+                print(f"[{name}] Early Stopping nach Epoche {epoch}")
+                break
+
+    wall_time = time.perf_counter() - start
+    report = dict(name=name, val_accuracy=best_acc, epochs=len(epochs), samples=nr_samples,
+                  wall_time=wall_time, samples_per_second=nr_samples / max(wall_time, 1e-9),
+                  per_epoch=epochs)
+    return best_clf, report
+
+
+def _train_config(args):
+    """
+    Einstiegspunkt für den Prozess-Pool (muss auf Modulebene liegen).
+    """
+    name, config, train_shards, X_val, y_val, max_epochs, patience, chunk_size, seed, augment = args
+    clf = make_model(config)
+    clf, report = train_one(name, clf, train_shards, X_val, y_val, max_epochs, patience, chunk_size, seed,
+                            augment)
+    report["config"] = {key: list(value) if isinstance(value, tuple) else value for key, value in config.items()}
+    return clf, report
+
+
+def load_warm_start(path: str, classes: np.ndarray = CLASSES):
+    """
+    Bestehendes Modell laden, falls vorhanden und mit partial_fit weitertrainierbar.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        clf = joblib.load(path)
+    except Exception as e:
+        print(f"Warm-Start nicht möglich ({path}): {e}")
+        return None
+    if not isinstance(clf, MLPClassifier) or not np.array_equal(clf.classes_, classes):
+        print(f"Warm-Start nicht möglich ({path}): kein passender MLPClassifier")
+        return None
+    return clf
+
+
+def trained_split(report_file: str = REPORT_FILE):
+    """
+    Aufteilung (train, val) aus dem Report des bestehenden Modells, None ohne Report
+    oder für Modelle, die nicht von diesem Skript trainiert wurden.
+    """
+    try:
+        with open(report_file) as f:
+            split = json.load(f)["split"]
+        return list(split["train"]), list(split["val"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def warm_start_allowed(val_shards: list, report_file: str = REPORT_FILE) -> bool:
+    """
+    Warm-Start nur, wenn das bestehende Modell nachweislich ohne die Validierungs-Shards
+    trainiert wurde.
+    """
+    split = trained_split(report_file)
+    if split is None:
+        print(f"Kein Warm-Start: Aufteilung des bestehenden Modells unbekannt ({report_file})")
+        return False
+    overlap = set(split[0]) & set(val_shards)
+    if overlap:
+        print(f"Kein Warm-Start: bestehendes Modell wurde auf {sorted(overlap)} trainiert")
+        return False
+    return True
+
+
+def train_push_and_fuse(clf: MLPClassifier, args, train_shards: list, val_shards: list,
+                        X_val: np.ndarray, y_val: np.ndarray, warm_start: bool):
+    """
+    Schiebe-Modell trainieren, beide Köpfe kalibrieren und als Fused-Modell speichern.
+
+    Returns:
+        Report-Dict oder None, wenn die Shards keine Schiebe-Daten enthalten
+    """
+    if not all(has_task(path, "push") for path in train_shards + val_shards):
+        print("Shards ohne Schiebe-Daten, extract_trump_data.py neu ausführen für das Schiebe-Modell")
+        return None
+
+    X_val_push, y_val_push = load_all(val_shards, "push")
+    print(f"Schiebe-Modell: {X_val_push.shape[0]} Validierungs-Beispiele, "
+          f"davon geschoben: {y_val_push.mean():.1%}")
+
+    push_clf = load_warm_start(PUSH_MODEL_FILE, PUSH_CLASSES) if warm_start else None
+    if push_clf is None:
+        push_clf = make_model(PUSH_CONFIG)
+    else:
+        print(f"Warm-Start von {PUSH_MODEL_FILE}")
+    push_clf, push_report = train_one("push", push_clf, train_shards, X_val_push, y_val_push, args.epochs,
+                                      args.patience, args.chunk_size, args.seed, args.augment, task="push")
+    joblib.dump(push_clf, PUSH_MODEL_FILE)
+    print("Schiebe-Modell gespeichert als:", PUSH_MODEL_FILE)
+
+    fused = FusedTrumpModel.from_classifiers(clf, push_clf)
+    trump_before, push_before = fused.predict(X_val)[0], fused.predict(X_val_push)[1]
+    fused.calibrate(X_val, y_val, X_val_push, y_val_push)
+    trump_after, push_after = fused.predict(X_val)[0], fused.predict(X_val_push)[1]
+
+    report = dict(push=push_report, temperature_trump=fused.temperature_trump,
+                  temperature_push=fused.temperature_push,
+                  trump_nll=[float(log_loss(y_val, trump_before, labels=CLASSES)),
+                             float(log_loss(y_val, trump_after, labels=CLASSES))],
+                  push_nll=[float(log_loss(y_val_push, push_before, labels=PUSH_CLASSES)),
+                            float(log_loss(y_val_push, push_after, labels=PUSH_CLASSES))])
+    print(f"Kalibrierung: T_trump={fused.temperature_trump:.3f}, T_push={fused.temperature_push:.3f}")
+    print(f"NLL Trumpf: {report['trump_nll'][0]:.4f} → {report['trump_nll'][1]:.4f}, "
+          f"NLL Schieben: {report['push_nll'][0]:.4f} → {report['push_nll'][1]:.4f}")
+
+    fused.save(FUSED_MODEL_FILE)
+    print("Fused-Modell gespeichert als:", FUSED_MODEL_FILE)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trumpf-Modell trainieren")
+    parser.add_argument("--shards", nargs="+", default=[DEFAULT_SHARD_DIR], help="Shard-Ordner")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--patience", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Beispiele pro partial_fit-Aufruf")
+    parser.add_argument("--no-warm-start", action="store_true")
+    parser.add_argument("--sweep", action="store_true", help="Hyperparameter-Sweep")
+    parser.add_argument("--augment", action="store_true", help="zufällige Farb-Permutationen im Loader")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    shards = sorted(os.path.normpath(path) for shard_dir in args.shards for path in list_shards(shard_dir))
+    if len(shards) < 2:
+        print(f"Mindestens 2 Shards nötig (gefunden: {len(shards)}), zuerst extract_trump_data.py ausführen")
+        return
+
+    # letzter Shard = Validierung
+    train_shards, val_shards = shards[:-1], shards[-1:]
+    X_val, y_val = load_all(val_shards)
+    print(f"{len(train_shards)} Trainings-Shards, Validierung: {val_shards[0]} ({X_val.shape[0]} Beispiele)")
+
+    start = time.perf_counter()
+    candidates = []
+
+    warm_start = not args.no_warm_start and warm_start_allowed(val_shards)
+    warm = load_warm_start(MODEL_FILE) if warm_start else None
+    if warm is not None:
+        print(f"Warm-Start von {MODEL_FILE}")
+        baseline = float(accuracy_score(y_val, warm.predict(X_val)))
+        print(f"Validation Accuracy vor dem Training: {baseline}")
+        clf, report = train_one("warm", warm, train_shards, X_val, y_val,
+                                args.epochs, args.patience, args.chunk_size, args.seed, args.augment)
+        if baseline >= report["val_accuracy"]:
+            # Weitertrainieren hat nichts gebracht → altes Modell behalten
+            clf, report["val_accuracy"] = joblib.load(MODEL_FILE), baseline
+        candidates.append((clf, report))
+
+    if args.sweep or warm is None:
+        configs = SWEEP_CONFIGS if args.sweep else [DEFAULT_CONFIG]
+        jobs = [(f"config{i}", config, train_shards, X_val, y_val, args.epochs, args.patience,
+                 args.chunk_size, args.seed + i, args.augment) for i, config in enumerate(configs)]
+        if len(jobs) > 1 and args.workers > 1:
+            with ProcessPoolExecutor(max_workers=min(args.workers, len(jobs))) as pool:
+                candidates.extend(pool.map(_train_config, jobs))
+        else:
+            candidates.extend(_train_config(job) for job in jobs)
+
+    clf, best_report = max(candidates, key=lambda c: c[1]["val_accuracy"])
+    wall_time = time.perf_counter() - start
 
     y_pred = clf.predict(X_val)
-    acc = accuracy_score(y_val, y_pred)
-    print("Validation Accuracy:", acc)
+    print("Validation Accuracy:", accuracy_score(y_val, y_pred))
     print(classification_report(y_val, y_pred))
 
+    # Report: Durchsatz und Wall-Time pro Kandidat
+    print(f"{'Kandidat':<10} {'val_acc':>8} {'Epochen':>8} {'Beispiele':>10} {'Beisp./s':>10} {'Zeit [s]':>9}")
+    for _, report in candidates:
+        print(f"{report['name']:<10} {report['val_accuracy']:>8.4f} {report['epochs']:>8} "
+              f"{report['samples']:>10} {report['samples_per_second']:>10.0f} {report['wall_time']:>9.1f}")
+    print(f"Gewählt: {best_report['name']}, Wall-Time gesamt: {wall_time:.1f}s")
+
     joblib.dump(clf, MODEL_FILE)
     print("Modell gespeichert als:", MODEL_FILE)
 
+    push_report = train_push_and_fuse(clf, args, train_shards, val_shards, X_val, y_val, warm_start)
+
+    # Aufteilung festhalten: ein Warm-Start aus einem früheren Lauf zählt auch dessen
+    # Trainings-Shards (das Modell hat sie gesehen)
+    previous = trained_split() if warm_start else None
+    trained_on = sorted(set(train_shards) | set(previous[0] if previous else []))
+    with open(REPORT_FILE, "w") as f:
+        json.dump(dict(split=dict(train=trained_on, val=val_shards), best=best_report["name"],
+                       wall_time=wall_time, candidates=[report for _, report in candidates], push=push_report), f, indent=2)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,178 @@
+# trump_data.py
+#
+# Shard-Format und Streaming-Loader für die Trumpf-Trainingsdaten.
+#
+# Die Beispiele liegen als mehrere kleine .npz-Dateien (Shards) in einem Ordner:
+#   hands: (N, 9) uint8, die 9 Karten (0..35) der Hand, aufsteigend sortiert ("gepackt")
+#   y:     (N,)   int8,  Trumpf-Label 0..5 (Hand des Spielers, der den Trumpf angesagt hat)
+#   fh_hands: (N, 9) uint8, Hand der Vorhand (optional)
+#   pushed:   (N,)   int8,  1 = Vorhand hat geschoben (optional)
+#
+# Zwei Aufgaben lesen aus denselben Shards: "trump" (hands → y) und
+# "push" (fh_hands → pushed).
+#
+# Beim Training wird immer nur ein Shard geladen und in Mini-Batches zerlegt,
+# der ganze Datensatz muss also nie in den Speicher passen.
+#
+# Augmentation: Das Trumpf-Label ist äquivariant unter Permutation der vier Farben
+# (Farbtrumpf folgt der Permutation, OBE_ABE/UNE_UFE bleiben gleich). Der Loader
+# kann deshalb jede Hand on the fly mit einer zufälligen der 24 Farb-Permutationen
+# umfärben (reiner Index-Gather auf den gepackten Händen, nichts wird gespeichert).
+# Das Schiebe-Label ist invariant, dort werden nur die Hände umgefärbt.
+
+import glob
+import itertools
+import os
+
+import numpy as np
+
+DEFAULT_SHARD_DIR = "Data/trump_shards"
+SHARD_SIZE = 50000
+MIN_SHARDS = 5
+
+# alle 24 Permutationen der Farben: COLOUR_PERMUTATIONS[i, alte Farbe] = neue Farbe
+COLOUR_PERMUTATIONS = np.array(list(itertools.permutations(range(4))), dtype=np.uint8)
+
+# CARD_PERMUTATIONS[i, karte] = umgefärbte Karte (Rang bleibt gleich)
+CARD_PERMUTATIONS = (COLOUR_PERMUTATIONS[:, np.arange(36) // 9] * 9 + np.arange(36) % 9).astype(np.uint8)
+
+# LABEL_PERMUTATIONS[i, trumpf] = umgefärbter Trumpf (OBE_ABE=4 / UNE_UFE=5 unverändert)
+LABEL_PERMUTATIONS = np.concatenate(
+    [COLOUR_PERMUTATIONS, np.tile(np.array([4, 5], dtype=np.uint8), (24, 1))], axis=1).astype(np.int8)
+
+# Aufgabe → (Schlüssel der Hände, Schlüssel der Labels) im Shard
+TASK_KEYS = {
+    "trump": ("hands", "y"),
+    "push": ("fh_hands", "pushed"),
+}
+
+
+def pack_hands(X: np.ndarray) -> np.ndarray:
+    """
+    One-Hot-Hände (N, 36) → gepackte Kartenindizes (N, 9).
+    """
+    rows, cards = np.nonzero(X)
+    counts = np.bincount(rows, minlength=X.shape[0])
+    if not np.all(counts == 9):
+        raise ValueError("Jede Hand muss genau 9 Karten haben")
+    return cards.reshape(X.shape[0], 9).astype(np.uint8)
+
+
+def unpack_hands(packed: np.ndarray) -> np.ndarray:
+    """
+    Gepackte Kartenindizes (N, 9) → One-Hot-Hände (N, 36) als float32 (Modell-Input).
+    """
+    X = np.zeros((packed.shape[0], 36), dtype=np.float32)
+    X[np.arange(packed.shape[0])[:, None], packed] = 1.0
+    return X
+
+
+def permute_colours(packed: np.ndarray, y: np.ndarray, perm_ids: np.ndarray):
+    """
+    Hände und Labels mit je einer Farb-Permutation pro Zeile umfärben.
+
+    Args:
+        packed: gepackte Hände (N, 9)
+        y: Trumpf-Labels (N,)
+        perm_ids: Index 0..23 der Permutation pro Zeile (N,)
+
+    Returns:
+        (umgefärbte Hände, umgefärbte Labels)
+    """
+    return CARD_PERMUTATIONS[perm_ids[:, None], packed], LABEL_PERMUTATIONS[perm_ids, y]
+
+
+def shard_path(shard_dir: str, index: int) -> str:
+    return os.path.join(shard_dir, f"shard_{index:05d}.npz")
+
+
+def list_shards(shard_dir: str = DEFAULT_SHARD_DIR) -> list:
+    return sorted(glob.glob(os.path.join(shard_dir, "shard_*.npz")))
+
+
+def write_shards(shard_dir: str, hands: np.ndarray, y: np.ndarray, start_index: int = 0,
+                 min_shards: int = MIN_SHARDS, **extra) -> list:
+    """
+    Schreibt die Beispiele in Shards, mindestens min_shards (damit ein Shard
+    als Validierung zurückbehalten werden kann), höchstens SHARD_SIZE pro Shard.
+
+    Jeder Shard wird zuerst in eine temporäre Datei geschrieben und dann
+    umbenannt, ein abgebrochener Lauf hinterlässt also keine halben Shards.
+
+    Args:
+        shard_dir: Zielordner
+        hands: gepackte Hände (N, 9)
+        y: Labels (N,)
+        start_index: Nummer des ersten Shards
+        min_shards: minimale Anzahl Shards
+        extra: weitere Arrays mit N Zeilen, die mitgespeichert werden
+
+    Returns:
+        Liste der geschriebenen Pfade
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    n = hands.shape[0]
+    size = max(1, min(SHARD_SIZE, -(-n // min_shards)))
+
+    paths = []
+    for i, begin in enumerate(range(0, n, size)):
+        end = min(n, begin + size)
+        path = shard_path(shard_dir, start_index + i)
+        arrays = {key: value[begin:end] for key, value in extra.items()}
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, hands=hands[begin:end].astype(np.uint8), y=y[begin:end].astype(np.int8), **arrays)
+        os.replace(path + ".tmp", path)
+        paths.append(path)
+    return paths
+
+
+def load_shard(path: str, task: str = "trump"):
+    """
+    Returns:
+        (gepackte Hände, Labels) für die Aufgabe task ("trump" oder "push")
+    """
+    hands_key, y_key = TASK_KEYS[task]
+    with np.load(path) as data:
+        return data[hands_key], data[y_key]
+
+
+def has_task(path: str, task: str) -> bool:
+    """
+    Enthält der Shard die Arrays für die Aufgabe? (ältere Shards haben kein fh_hands/pushed)
+    """
+    with np.load(path) as data:
+        return all(key in data.files for key in TASK_KEYS[task])
+
+
+def iter_batches(paths: list, batch_size: int, rng: np.random.Generator, augment: bool = False,
+                 task: str = "trump"):
+    """
+    Streamt einmal über alle Shards (zufällige Shard-Reihenfolge, innerhalb
+    eines Shards gemischt) und liefert Mini-Batches (X (B, 36) float32, y (B,)).
+
+    Mit augment=True wird jede Hand mit einer zufälligen Farb-Permutation
+    umgefärbt, jede Epoche sieht also andere Varianten derselben Spiele.
+    """
+    for shard_idx in rng.permutation(len(paths)):
+        hands, y = load_shard(paths[shard_idx], task)
+        order = rng.permutation(hands.shape[0])
+        for begin in range(0, order.shape[0], batch_size):
+            idx = order[begin:begin + batch_size]
+            batch_hands, batch_y = hands[idx], y[idx]
+            if augment:
+                perm_ids = rng.integers(0, COLOUR_PERMUTATIONS.shape[0], size=idx.shape[0])
+                if task == "trump":
+                    batch_hands, batch_y = permute_colours(batch_hands, batch_y, perm_ids)
+                else:
+                    batch_hands = CARD_PERMUTATIONS[perm_ids[:, None], batch_hands]
+            yield unpack_hands(batch_hands), batch_y
+
+
+def load_all(paths: list, task: str = "trump"):
+    """
+    Alle Shards in den Speicher laden (nur für kleine Mengen, z.B. Validierung).
+    """
+    parts = [load_shard(path, task) for path in paths]
+    hands = np.concatenate([h for h, _ in parts], axis=0)
+    y = np.concatenate([labels for _, labels in parts], axis=0)
+    return unpack_hands(hands), y
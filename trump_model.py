@@ -0,0 +1,177 @@
+# trump_model.py
+#
+# Zweistufiges Trumpf-Modell mit kalibrierten Wahrscheinlichkeiten.
+#
+# - Trumpf-Modell: MLP, Hand (36) → Trumpf 0..5 (wie bisher)
+# - Schiebe-Modell: MLP, Hand der Vorhand (36) → P(schieben)
+# - Kalibrierung: Temperature Scaling pro Kopf, auf dem Validierungs-Shard gefittet
+#
+# Für die Inferenz werden beide scikit-learn-MLPs zu einem einzigen Netz
+# zusammengelegt (Block-Diagonal-Gewichte), ein Forward-Pass in NumPy liefert
+# beide Köpfe gleichzeitig. Gespeichert wird nur eine .npz-Datei mit den Gewichten.
+
+import os
+
+import numpy as np
+
+from jass.game.const import PUSH
+
+FUSED_MODEL_FILE = os.path.join(os.path.dirname(__file__), 'Data', 'trump_model_fused.npz')
+
+NR_TRUMPS = 6
+
+
+def push_allowed(obs) -> bool:
+    """
+    Schieben ist erlaubt, solange die Vorhand noch nicht entschieden hat.
+    """
+    return bool(getattr(obs, "push_allowed", obs.forehand == -1))
+
+
+def decide_trump(trump_proba: np.ndarray, push_proba: float, obs) -> int:
+    """
+    Entscheidung aus den kalibrierten Wahrscheinlichkeiten einer Hand:
+    PUSH, wenn erlaubt und P(schieben) > 0.5, sonst der wahrscheinlichste Trumpf.
+    """
+    if push_allowed(obs) and push_proba > 0.5:
+        return PUSH
+    return int(np.argmax(trump_proba))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _block_diag(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    out = np.zeros((a.shape[0] + b.shape[0], a.shape[1] + b.shape[1]), dtype=np.float64)
+    out[:a.shape[0], :a.shape[1]] = a
+    out[a.shape[0]:, a.shape[1]:] = b
+    return out
+
+
+def _padded_layers(clf, depth: int):
+    """
+    Gewichte eines MLP auf depth versteckte Schichten auffüllen. Nach ReLU sind
+    die Aktivierungen >= 0, eine Identitäts-Schicht mit ReLU ändert also nichts.
+    """
+    weights = list(clf.coefs_)
+    biases = list(clf.intercepts_)
+    hidden_w, hidden_b = weights[:-1], biases[:-1]
+    while len(hidden_w) < depth:
+        size = hidden_w[-1].shape[1]
+        hidden_w.append(np.eye(size))
+        hidden_b.append(np.zeros(size))
+    return hidden_w + weights[-1:], hidden_b + biases[-1:]
+
+
+def fit_temperature(logits: np.ndarray, y: np.ndarray, binary: bool = False) -> float:
+    """
+    Temperature Scaling: T so wählen, dass die Log-Likelihood auf (logits, y) maximal ist.
+    """
+    def nll(t: float) -> float:
+        if binary:
+            p = np.clip(_sigmoid(logits / t), 1e-12, 1 - 1e-12)
+            return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+        p = _softmax(logits / t)
+        return float(-np.mean(np.log(np.clip(p[np.arange(y.shape[0]), y], 1e-12, None))))
+
+    # grobes Raster im Log-Raum, dann Verfeinerung um das beste T
+    grid = np.exp(np.linspace(np.log(0.2), np.log(5.0), 41))
+    best = min(grid, key=nll)
+    fine = best * np.exp(np.linspace(-0.1, 0.1, 21))
+    return float(min(fine, key=nll))
+
+
+class FusedTrumpModel:
+    """
+    Trumpf- und Schiebe-Modell in einem Forward-Pass.
+    """
+
+    def __init__(self, weights: list, biases: list, temperature_trump: float = 1.0, temperature_push: float = 1.0):
+        self._weights = [np.asarray(w, dtype=np.float64) for w in weights]
+        self._biases = [np.asarray(b, dtype=np.float64) for b in biases]
+        self.temperature_trump = temperature_trump
+        self.temperature_push = temperature_push
+
+    @classmethod
+    def from_classifiers(cls, trump_clf, push_clf):
+        """
+        Zwei trainierte MLPClassifier (ReLU) zusammenlegen:
+        trump_clf mit 6 Klassen (softmax), push_clf binär (logistic).
+        """
+        depth = max(len(trump_clf.coefs_), len(push_clf.coefs_)) - 1
+        trump_w, trump_b = _padded_layers(trump_clf, depth)
+        push_w, push_b = _padded_layers(push_clf, depth)
+
+        weights = [np.concatenate([trump_w[0], push_w[0]], axis=1)]
+        weights += [_block_diag(tw, pw) for tw, pw in zip(trump_w[1:], push_w[1:])]
+        biases = [np.concatenate([tb, pb]) for tb, pb in zip(trump_b, push_b)]
+        return cls(weights, biases)
+
+    def logits(self, X: np.ndarray):
+        """
+        Returns:
+            (Trumpf-Logits (N, 6), Schiebe-Logit (N,)), unkalibriert
+        """
+        h = np.asarray(X, dtype=np.float64)
+        for w, b in zip(self._weights[:-1], self._biases[:-1]):
+            h = np.maximum(h @ w + b, 0.0)
+        out = h @ self._weights[-1] + self._biases[-1]
+        return out[:, :NR_TRUMPS], out[:, NR_TRUMPS]
+
+    def predict(self, X: np.ndarray):
+        """
+        Returns:
+            (kalibrierte Trumpf-Wahrscheinlichkeiten (N, 6), P(schieben) (N,))
+        """
+        trump_logits, push_logit = self.logits(X)
+        return _softmax(trump_logits / self.temperature_trump), _sigmoid(push_logit / self.temperature_push)
+
+    def calibrate(self, X_trump: np.ndarray, y_trump: np.ndarray, X_push: np.ndarray, y_push: np.ndarray) -> None:
+        """
+        Temperaturen beider Köpfe auf Validierungsdaten fitten.
+        """
+        self.temperature_trump = fit_temperature(self.logits(X_trump)[0], y_trump.astype(np.int64))
+        self.temperature_push = fit_temperature(self.logits(X_push)[1], y_push.astype(np.float64), binary=True)
+
+    def choose_trump(self, obs) -> int:
+        """
+        Trumpf oder PUSH für eine Observation.
+        """
+        hand_vec = np.asarray(obs.hand, dtype=np.float64).reshape(1, -1)
+        trump_proba, push_proba = self.predict(hand_vec)
+        return decide_trump(trump_proba[0], push_proba[0], obs)
+
+    def save(self, path: str) -> None:
+        arrays = {f"w{i}": w for i, w in enumerate(self._weights)}
+        arrays.update({f"b{i}": b for i, b in enumerate(self._biases)})
+        np.savez(path, nr_layers=len(self._weights), temperatures=[self.temperature_trump, self.temperature_push],
+                 **arrays)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            n = int(data["nr_layers"])
+            weights = [data[f"w{i}"] for i in range(n)]
+            biases = [data[f"b{i}"] for i in range(n)]
+            temperature_trump, temperature_push = data["temperatures"]
+        return cls(weights, biases, float(temperature_trump), float(temperature_push))
+
+
+def load_fused_model(path: str = FUSED_MODEL_FILE):
+    """
+    Fused-Modell laden oder None, wenn es (noch) nicht existiert.
+    """
+    try:
+        model = FusedTrumpModel.load(path)
+        print(f"[MyAgent] Trumpf/Schiebe-Modell geladen: {path}")
+        return model
+    except Exception as e:
+        print(f"[MyAgent] Konnte Trumpf/Schiebe-Modell nicht laden ({path}): {e}")
+        return None